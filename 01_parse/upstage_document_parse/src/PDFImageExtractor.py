@@ -1,48 +1,86 @@
 import os
 import re
 import sys
+from collections import OrderedDict
 import fitz  # PyMuPDF
 from PIL import Image
 
 sys.dont_write_bytecode = True
 
-class PDFImageExtractor:
-    def __new__(cls, pdf_file, dpi=300, elements=None, out_dir=None):
-        # 만약 elements와 out_dir이 전달되면, 추출 후 바로 리스트를 반환하도록 함
-        instance = super().__new__(cls)
-        instance.__init__(pdf_file, dpi)
-        if elements is not None and out_dir is not None:
-            return instance.extract_elements(elements, out_dir)
-        return instance
+# 렌더링한 페이지 이미지 캐시의 최대 메모리 (300dpi A4 한 페이지 ≈ 26MB)
+PAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
 
-    def __init__(self, pdf_file, dpi=300):
+class PDFImageExtractor:
+    def __new__(cls, pdf_file, dpi=300, elements=None, out_dir=None, cache_max_bytes=PAGE_CACHE_MAX_BYTES):
         """
         :param pdf_file: PDF 파일 경로 (파일명에 페이지범위가 포함되어 있어야 함, 예: "문서_51~100.pdf")
         :param dpi: 페이지 렌더링 해상도 (기본 300)
+        :param elements: API 응답의 elements 리스트 (out_dir과 함께 전달하면 추출 후 이미지 경로 리스트를 바로 반환)
+        :param out_dir: 크롭한 이미지 저장 폴더
+        :param cache_max_bytes: 렌더링한 페이지 이미지 LRU 캐시의 최대 메모리 (바이트)
+        → 상태 초기화는 생성할 때마다 새 인스턴스에 한 번만 수행 (__init__을 두지 않으므로 다시 초기화되지 않음)
         """
-        self.pdf_file = pdf_file
-        self.dpi = dpi
-        self.doc = fitz.open(pdf_file)
+        instance = super().__new__(cls)
+        instance.pdf_file = pdf_file
+        instance.dpi = dpi
+        instance.doc = fitz.open(pdf_file)
+        # 페이지 번호(0-based) → PIL.Image, 최근에 사용한 페이지가 뒤에 위치
+        instance.cache_max_bytes = cache_max_bytes
+        instance._page_cache = OrderedDict()
+        instance._page_cache_bytes = 0
         # 파일명에서 시작 페이지 번호를 추출 (정규식 사용)
         base = os.path.basename(pdf_file)
         m = re.search(r'_(\d+)~(\d+)\.pdf$', base)
         if m:
             # 시작 페이지 (예: "51"이면 start_page = 51)
-            self.start_page = int(m.group(1))
+            instance.start_page = int(m.group(1))
         else:
-            self.start_page = 1  # 분할 정보가 없으면 1페이지부터 시작
+            instance.start_page = 1  # 분할 정보가 없으면 1페이지부터 시작
+        # 만약 elements와 out_dir이 전달되면, 추출 후 바로 리스트를 반환하도록 함
+        if elements is not None and out_dir is not None:
+            return instance.extract_elements(elements, out_dir)
+        return instance
 
     def get_page_image(self, page_number):
         """
         PDF의 해당 페이지(0-based 인덱스)를 PIL.Image 객체로 반환
+        → 렌더링한 페이지는 메모리 한도(cache_max_bytes) 안에서 LRU로 캐시하여 같은 페이지를 다시 렌더링하지 않음
         """
+        img = self._page_cache.get(page_number)
+        if img is not None:
+            self._page_cache.move_to_end(page_number)
+            return img
+
         page = self.doc.load_page(page_number)
         zoom = self.dpi / 72  # 72dpi 기준 배율 계산
         mat = fitz.Matrix(zoom, zoom)
         pix = page.get_pixmap(matrix=mat, alpha=False)
         img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+        # 한도를 넘으면 가장 오래 사용하지 않은 페이지부터 제거 (한도보다 큰 페이지는 캐시하지 않음)
+        size = len(pix.samples)
+        if size <= self.cache_max_bytes:
+            while self._page_cache and self._page_cache_bytes + size > self.cache_max_bytes:
+                self.evict_page(next(iter(self._page_cache)))
+            self._page_cache[page_number] = img
+            self._page_cache_bytes += size
         return img
 
+    def evict_page(self, page_number):
+        """
+        해당 페이지(0-based 인덱스)의 렌더링 이미지를 캐시에서 제거
+        """
+        img = self._page_cache.pop(page_number, None)
+        if img is not None:
+            self._page_cache_bytes -= img.width * img.height * 3
+
+    def clear_page_cache(self):
+        """
+        렌더링한 페이지 이미지 캐시를 비움
+        """
+        self._page_cache.clear()
+        self._page_cache_bytes = 0
+
     @staticmethod
     def get_pixel_coordinates(coordinates, page_size):
         """
@@ -96,23 +134,30 @@ class PDFImageExtractor:
     def extract_elements(self, elements, out_dir):
         """
         요소 리스트에서 카테고리가 chart, table, figure인 항목만 골라 크롭 및 저장
+        → 요소를 페이지별로 묶어 처리하므로 페이지마다 한 번만 렌더링하고, 처리가 끝난 페이지는 캐시에서 제거
+        → 파일명의 순번과 반환 순서는 elements 순서 그대로 유지
         :param elements: API 응답의 elements 리스트
         :param out_dir: 크롭한 이미지 저장 폴더
         :return: 추출된 모든 이미지 경로 리스트
         """
         os.makedirs(out_dir, exist_ok=True)
         counts = {}  # (relative_page, category)별 순번 관리
-        extracted_image_paths = []
+        pages = {}   # relative_page → [(elements 내 순서, element, 순번), ...]
 
-        for element in elements:
+        for order, element in enumerate(elements):
             category = element.get("category", "").lower()
             if category in ["chart", "table", "figure"]:
                 page = element.get("page", 1)
                 key = (page, category)
                 counts[key] = counts.get(key, 0) + 1
+                pages.setdefault(page, []).append((order, element, counts[key]))
 
-                img_path = self.crop_and_save_element(element, out_dir, counts[key])
+        extracted = []  # (elements 내 순서, 이미지 경로)
+        for page, page_elements in pages.items():
+            for order, element, page_count in page_elements:
+                img_path = self.crop_and_save_element(element, out_dir, page_count)
                 if img_path:
-                    extracted_image_paths.append(img_path)
+                    extracted.append((order, img_path))
+            self.evict_page(page - 1)
 
-        return extracted_image_paths
+        return [img_path for _, img_path in sorted(extracted)]
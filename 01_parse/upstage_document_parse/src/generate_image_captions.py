@@ -5,10 +5,16 @@ import base64
 import re
 import pandas as pd
 from dotenv import load_dotenv
-from openai import OpenAI
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# 공용 API 클라이언트(common/api_clients.py)를 불러올 수 있도록 경로 추가
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), "common")
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+from api_clients import get_client
+
 def load_result(base_folder):
     """
     base_folder 내에서 _result.json으로 끝나는 파일을 찾아 로드합니다.
@@ -50,7 +56,8 @@ def get_image_caption(image_path, api_key, prompt_context=""):
     except Exception as e:
         return ""
     
-    client = OpenAI(api_key=api_key)
+    # 모든 이미지 스레드가 같은 클라이언트(커넥션 풀)를 공유
+    client = get_client("openai", api_key=api_key)
     
     # 프롬프트 구성: 전달받은 prompt_context(해당 페이지의 내용)를 포함
     prompt = (
@@ -0,0 +1,74 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from construct_content_metadata import (
+    CONTENT_STRATEGIES,
+    METADATA_STRATEGIES,
+    build_page_index,
+    build_combination_outputs
+)
+
+def make_synthetic_df(n_elements=50000, elements_per_page=20, seed=0):
+    """
+    html_to_excel 결과와 같은 컬럼 구조의 합성 DataFrame 생성
+    (파일명 | 페이지숫자 | elementid | data-category | alt | 내용 | 이미지설명)
+    """
+    rng = np.random.default_rng(seed)
+    # 페이지당 요소 수를 조금씩 다르게 하여 실제 문서처럼 구성
+    page_sizes = rng.integers(max(1, elements_per_page // 2), elements_per_page * 3 // 2 + 1, size=n_elements)
+    pages = np.repeat(np.arange(1, len(page_sizes) + 1), page_sizes)[:n_elements]
+    categories = rng.choice(["paragraph", "table", "heading1", "list", "figure"], size=n_elements)
+    contents = [f"요소 {i} 본문 내용입니다. " * int(k) for i, k in enumerate(rng.integers(1, 8, size=n_elements))]
+    return pd.DataFrame({
+        "파일명": "synthetic",
+        "페이지숫자": pages,
+        "elementid": np.arange(n_elements),
+        "data-category": categories,
+        "alt": "",
+        "내용": contents,
+        "이미지설명": ""
+    })
+
+def run_benchmark(df, combinations=None):
+    """
+    content×metadata 조합(기본 11개 전체)을 생성하며 단계별 소요 시간(초)을 반환
+    → 페이지 인덱스와 각 전략을 개별 측정한 뒤, build_combination_outputs 전체 시간을 측정
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    page_index = build_page_index(df)
+    timings["page_index"] = time.perf_counter() - start
+
+    for content_id, (content_name, content_func) in CONTENT_STRATEGIES.items():
+        start = time.perf_counter()
+        content_func(df, page_index)
+        timings[f"content {content_id}_{content_name}"] = time.perf_counter() - start
+    for meta_id, metadata_func in METADATA_STRATEGIES.items():
+        start = time.perf_counter()
+        metadata_func(df, page_index)
+        timings[f"metadata {meta_id}"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    outputs = build_combination_outputs(df, combinations)
+    timings[f"{len(outputs)}개 조합 생성"] = time.perf_counter() - start
+    for content_list, metadata_list in outputs.values():
+        assert len(content_list) == len(metadata_list) == len(df)
+    return timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="02_construct content|metadata 생성 벤치마크")
+    parser.add_argument("--elements", type=int, default=50000, help="합성 요소(행) 수")
+    parser.add_argument("--per-page", type=int, default=20, help="페이지당 평균 요소 수")
+    parser.add_argument("--combinations", nargs="*", default=None, help="생성할 조합 (예: 1-1 3-2, 기본값 11개 전체)")
+    args = parser.parse_args()
+
+    df = make_synthetic_df(args.elements, args.per_page)
+    print("╔════════════════════════════════════════")
+    print(f"║ 합성 데이터: 요소 {len(df)}개, 페이지 {df['페이지숫자'].nunique()}개")
+    timings = run_benchmark(df, args.combinations)
+    for name, seconds in timings.items():
+        print(f"║   -> {name:<28} {seconds:8.3f}초")
+    print("╚════════════════════════════════════════\n")
@@ -1,10 +1,17 @@
 import os
 import json
+import hashlib
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from tqdm import tqdm
 from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+from openpyxl.utils import get_column_letter
 
 def extract_neighbors_by_elementid(df):
     """
@@ -12,7 +19,7 @@ def extract_neighbors_by_elementid(df):
     → 이전청크, 현재청크, 다음청크 각각에 라벨을 붙여 결합
     """
     df["elementid"] = df["elementid"].astype(int)
-    df_sorted = df.sort_values(by="elementid").reset_index(drop=True)
+    df_sorted = df.sort_values(by="elementid", kind="stable").reset_index(drop=True)
     # "내용" 열은 이미지설명이 반영된 상태라고 가정
     elementid_to_content = dict(zip(df_sorted["elementid"], df_sorted["내용"]))
     content_list = []
@@ -29,17 +36,65 @@ def extract_neighbors_by_elementid(df):
         content_list.append(combined)
     return content_list
 
-def extract_page_plus_chunk(df):
+def build_page_index(df):
+    """
+    페이지 인덱스 생성 함수 (DataFrame 당 1회)
+    → 행마다 df를 다시 필터링하지 않도록 페이지별 elementid/전체내용/첫·마지막 청크를
+       groupby(NumPy 정렬) 한 번으로 미리 계산하고, 모든 content/metadata 함수가 재사용
+
+    dict 형식:
+    {
+        "row_pages": [int, ...],          # df 행 순서의 페이지숫자
+        "text": {page: str},              # 페이지 전체내용 (df 행 순서로 결합)
+        "ids": {page: [int, ...]},        # 페이지의 elementid (df 행 순서)
+        "sorted_text": {page: str},       # 페이지 전체내용 (elementid 순서로 결합)
+        "sorted_ids": {page: [int, ...]}, # 페이지의 elementid (오름차순)
+        "first": {page: str},             # elementid 기준 페이지 첫번째 청크
+        "last": {page: str}               # elementid 기준 페이지 마지막 청크
+    }
+    """
+    pages = df["페이지숫자"].astype(int).to_numpy()
+    eids = df["elementid"].astype(int).to_numpy()
+    contents = df["내용"].to_numpy(dtype=object)
+
+    index = {
+        "row_pages": pages.tolist(),
+        "text": {}, "ids": {},
+        "sorted_text": {}, "sorted_ids": {},
+        "first": {}, "last": {}
+    }
+    if len(pages) == 0:
+        return index
+
+    # 페이지 기준 stable 정렬 → 같은 페이지 안에서는 df 행 순서 유지
+    by_page = np.argsort(pages, kind="stable")
+    # (페이지, elementid) 기준 정렬 → 같은 elementid는 df 행 순서 유지
+    by_page_eid = np.lexsort((eids, pages))
+    unique_pages, starts = np.unique(pages[by_page], return_index=True)
+    ends = np.append(starts[1:], len(pages))
+
+    for page, start, end in zip(unique_pages.tolist(), starts.tolist(), ends.tolist()):
+        rows = by_page[start:end]
+        sorted_rows = by_page_eid[start:end]
+        sorted_contents = contents[sorted_rows].tolist()
+        index["text"][page] = "\n\n".join(contents[rows].tolist())
+        index["ids"][page] = eids[rows].tolist()
+        index["sorted_text"][page] = "\n\n".join(sorted_contents)
+        index["sorted_ids"][page] = eids[sorted_rows].tolist()
+        index["first"][page] = sorted_contents[0]
+        index["last"][page] = sorted_contents[-1]
+    return index
+
+def extract_page_plus_chunk(df, page_index=None):
     """
     content (page_plus_chunk) 생성 함수  
     → 현재페이지 전체내용과 현재청크에 대해 라벨을 붙여 결합
     """
-    df["페이지숫자"] = df["페이지숫자"].astype(str)
-    page_to_all_text = df.groupby("페이지숫자")["내용"].apply(lambda x: "\n\n".join(x)).to_dict()
+    if page_index is None:
+        page_index = build_page_index(df)
+    page_to_all_text = page_index["text"]
     content_list = []
-    for _, row in df.iterrows():
-        page = row["페이지숫자"]
-        chunk = row["내용"]
+    for page, chunk in zip(page_index["row_pages"], df["내용"].tolist()):
         full_page = page_to_all_text.get(page, "")
         parts = [
             "[[[[[[현재페이지 전체내용]", full_page,
@@ -49,20 +104,19 @@ def extract_page_plus_chunk(df):
         content_list.append(combined)
     return content_list
 
-def extract_page_only(df):
+def extract_page_only(df, page_index=None):
     """
     content (page_only) 생성 함수  
     → 현재페이지 전체내용을 라벨과 함께 표시
     """
-    df["페이지숫자"] = df["페이지숫자"].astype(str)
-    page_to_all_text = df.groupby("페이지숫자")["내용"].apply(lambda x: "\n\n".join(x)).to_dict()
-    content_list = []
-    for _, row in df.iterrows():
-        page = row["페이지숫자"]
-        full_page = page_to_all_text.get(page, "")
-        combined = "[[[[[[현재페이지 전체내용]\n\n" + full_page
-        content_list.append(combined)
-    return content_list
+    if page_index is None:
+        page_index = build_page_index(df)
+    # 같은 페이지의 행은 동일한 문자열을 공유
+    page_to_content = {
+        page: "[[[[[[현재페이지 전체내용]\n\n" + text
+        for page, text in page_index["text"].items()
+    }
+    return [page_to_content[page] for page in page_index["row_pages"]]
 
 def get_neighbor_metadata(df):
     """
@@ -81,11 +135,13 @@ def get_neighbor_metadata(df):
     """
     df["elementid"] = df["elementid"].astype(int)
     df["페이지숫자"] = df["페이지숫자"].astype(int)
-    df_sorted = df.sort_values(by="elementid").reset_index(drop=True)
+    df_sorted = df.sort_values(by="elementid", kind="stable").reset_index(drop=True)
     elementid_to_content = dict(zip(df_sorted["elementid"], df_sorted["내용"]))
     metadata = []
-    for _, row in df_sorted.iterrows():
-        eid = row["elementid"]
+    for eid, category, filename, page in zip(
+        df_sorted["elementid"].tolist(), df_sorted["data-category"].tolist(),
+        df_sorted["파일명"].tolist(), df_sorted["페이지숫자"].tolist()
+    ):
         prev = elementid_to_content.get(eid - 1, "")
         curr = elementid_to_content.get(eid, "")
         next_ = elementid_to_content.get(eid + 1, "")
@@ -97,15 +153,15 @@ def get_neighbor_metadata(df):
         combined_text = "\n\n".join(parts)
         meta_obj = {
             "elementid": [eid],
-            "category": row["data-category"],
-            "filename": row["파일명"],
-            "page": [row["페이지숫자"]],
+            "category": category,
+            "filename": filename,
+            "page": [page],
             "text": combined_text
         }
         metadata.append(meta_obj)
     return metadata
 
-def get_3page_metadata(df):
+def get_3page_metadata(df, page_index=None):
     """
     metadata -2 생성 함수 (페이지 기반)  
     → 이전페이지, 현재페이지, 다음페이지 전체 내용을 라벨과 함께 결합하고,
@@ -120,36 +176,38 @@ def get_3page_metadata(df):
         "text": str                  # 라벨 포함 결합 텍스트
     }
     """
-    df["페이지숫자"] = df["페이지숫자"].astype(int)
-    page_to_text = df.groupby("페이지숫자")["내용"].apply(lambda x: "\n\n".join(x)).to_dict()
-    metadata = []
-    for _, row in df.iterrows():
-        current_page = int(row["페이지숫자"])
-        prev_text = page_to_text.get(current_page - 1, "")
-        current_text = page_to_text.get(current_page, "")
-        next_text = page_to_text.get(current_page + 1, "")
+    if page_index is None:
+        page_index = build_page_index(df)
+    page_to_text = page_index["text"]
+    page_to_ids = page_index["ids"]
+    # 3페이지 윈도우는 페이지마다 한 번만 계산하고, 같은 페이지의 행들이 공유
+    windows = {}
+    for current_page in page_to_text:
         parts = [
-            "[[[[[[이전페이지]", prev_text,
-            "[[[[[[현재페이지]", current_text,
-            "[[[[[[다음페이지]", next_text
+            "[[[[[[이전페이지]", page_to_text.get(current_page - 1, ""),
+            "[[[[[[현재페이지]", page_to_text.get(current_page, ""),
+            "[[[[[[다음페이지]", page_to_text.get(current_page + 1, "")
         ]
-        combined_text = "\n\n".join(parts)
-        prev_ids = df[df["페이지숫자"] == (current_page - 1)]["elementid"].tolist()
-        curr_ids = df[df["페이지숫자"] == current_page]["elementid"].tolist()
-        next_ids = df[df["페이지숫자"] == (current_page + 1)]["elementid"].tolist()
-        all_ids = prev_ids + curr_ids + next_ids
+        prev_ids = page_to_ids.get(current_page - 1, [])
+        curr_ids = page_to_ids[current_page]
+        next_ids = page_to_ids.get(current_page + 1, [])
         all_pages = ([current_page - 1] * len(prev_ids)) + ([current_page] * len(curr_ids)) + ([current_page + 1] * len(next_ids))
+        windows[current_page] = (prev_ids + curr_ids + next_ids, all_pages, "\n\n".join(parts))
+
+    metadata = []
+    for current_page, category, filename in zip(page_index["row_pages"], df["data-category"].tolist(), df["파일명"].tolist()):
+        all_ids, all_pages, combined_text = windows[current_page]
         meta_obj = {
             "elementid": all_ids,
-            "category": row["data-category"],
-            "filename": row["파일명"],
+            "category": category,
+            "filename": filename,
             "page": all_pages,
             "text": combined_text
         }
         metadata.append(meta_obj)
     return metadata
 
-def get_cross_page_metadata(df):
+def get_cross_page_metadata(df, page_index=None):
     """
     metadata -3 생성 함수 (페이지 기반)  
     → 현재페이지 전체내용, 이전페이지 마지막 청크, 다음페이지 첫번째 청크를 라벨과 함께 결합하고,
@@ -164,32 +222,19 @@ def get_cross_page_metadata(df):
         "text": str              # 라벨 포함 결합 텍스트
     }
     """
-    df["elementid"] = df["elementid"].astype(int)
-    df["페이지숫자"] = df["페이지숫자"].astype(int)
-    page_groups = df.groupby("페이지숫자")
-    page_dict = {}
-    for page, group in page_groups:
-        group_sorted = group.sort_values("elementid")
-        full_text = "\n\n".join(group_sorted["내용"].tolist())
-        first_chunk = group_sorted.iloc[0]["내용"]
-        last_chunk = group_sorted.iloc[-1]["내용"]
-        elem_ids = group_sorted["elementid"].tolist()
-        page_dict[page] = {"full": full_text, "first": first_chunk, "last": last_chunk, "ids": elem_ids}
-    metadata = []
-    for _, row in df.iterrows():
-        current_page = int(row["페이지숫자"])
-        current_full = page_dict.get(current_page, {}).get("full", "")
-        prev_last = page_dict.get(current_page - 1, {}).get("last", "")
-        next_first = page_dict.get(current_page + 1, {}).get("first", "")
+    if page_index is None:
+        page_index = build_page_index(df)
+    page_to_ids = page_index["sorted_ids"]
+    windows = {}
+    for current_page, current_ids in page_to_ids.items():
         parts = [
-            "[[[[[[현재페이지 전체내용]", current_full,
-            "[[[[[[이전페이지 마지막 청크]", prev_last,
-            "[[[[[[다음페이지 첫번째 청크]", next_first
+            "[[[[[[현재페이지 전체내용]", page_index["sorted_text"][current_page],
+            "[[[[[[이전페이지 마지막 청크]", page_index["last"].get(current_page - 1, ""),
+            "[[[[[[다음페이지 첫번째 청크]", page_index["first"].get(current_page + 1, "")
         ]
-        combined_text = "\n\n".join(parts)
-        current_ids = page_dict.get(current_page, {}).get("ids", [])
-        prev_ids = df[df["페이지숫자"] == (current_page - 1)]["elementid"].tolist()
-        next_ids = df[df["페이지숫자"] == (current_page + 1)]["elementid"].tolist()
+        # 이전/다음 페이지의 elementid는 df 행 순서 기준 (마지막 행 / 첫 행)
+        prev_ids = page_index["ids"].get(current_page - 1, [])
+        next_ids = page_index["ids"].get(current_page + 1, [])
         prev_last_id = [prev_ids[-1]] if prev_ids else []
         next_first_id = [next_ids[0]] if next_ids else []
         all_ids = current_ids + prev_last_id + next_first_id
@@ -197,179 +242,402 @@ def get_cross_page_metadata(df):
         prev_page_list = [current_page - 1] if prev_ids else []
         next_page_list = [current_page + 1] if next_ids else []
         all_pages = current_pages + prev_page_list + next_page_list
+        windows[current_page] = (all_ids, all_pages, "\n\n".join(parts))
+
+    metadata = []
+    for current_page, category, filename in zip(page_index["row_pages"], df["data-category"].tolist(), df["파일명"].tolist()):
+        all_ids, all_pages, combined_text = windows[current_page]
         meta_obj = {
             "elementid": all_ids,
-            "category": row["data-category"],
-            "filename": row["파일명"],
+            "category": category,
+            "filename": filename,
             "page": all_pages,
             "text": combined_text
         }
         metadata.append(meta_obj)
     return metadata
 
+# content 전략 번호 → (content 이름, 생성 함수(df, page_index))
+CONTENT_STRATEGIES = {
+    "1": ("chunk_only", lambda df, page_index: df["내용"].tolist()),
+    "2": ("chunk_with_neighbors", lambda df, page_index: extract_neighbors_by_elementid(df)),
+    "3": ("page_plus_chunk", extract_page_plus_chunk),
+    "4": ("page_only", extract_page_only)
+}
+
+# metadata 전략 번호 → 생성 함수(df, page_index)
+METADATA_STRATEGIES = {
+    "1": lambda df, page_index: get_neighbor_metadata(df),
+    "2": get_3page_metadata,
+    "3": get_cross_page_metadata
+}
+
+# 생성 가능한 content-metadata 조합 (page_only는 metadata 2, 3만 사용)
+ALL_COMBINATIONS = [
+    "1-1", "1-2", "1-3",
+    "2-1", "2-2", "2-3",
+    "3-1", "3-2", "3-3",
+    "4-2", "4-3"
+]
+
+def resolve_combinations(combinations=None):
+    """
+    생성할 조합 목록을 검증하여 반환 (None이면 11개 전체)
+    → "1-2" 또는 "1-2_chunk_only" 형식 모두 허용하며, 중복은 제거하고 입력 순서를 유지
+    """
+    if combinations is None:
+        return list(ALL_COMBINATIONS)
+    resolved = []
+    for combination in combinations:
+        combination_id = str(combination).split("_", 1)[0]
+        if combination_id not in ALL_COMBINATIONS:
+            raise ValueError(f"지원하지 않는 content|metadata 조합입니다: {combination} (가능: {', '.join(ALL_COMBINATIONS)})")
+        if combination_id not in resolved:
+            resolved.append(combination_id)
+    return resolved
+
+def combination_name(combination_id):
+    """
+    조합 번호("1-2")를 출력 파일 이름("1-2_chunk_only")으로 변환
+    """
+    content_id = combination_id.split("-")[0]
+    return f"{combination_id}_{CONTENT_STRATEGIES[content_id][0]}"
+
+def build_combination_outputs(df, combinations=None):
+    """
+    DataFrame 하나에 대해 요청된 content|metadata 조합을 생성
+    → 각 content 전략과 metadata 전략은 입력 DataFrame 당 정확히 한 번만 계산(memoize)하고,
+       해당 전략을 사용하는 모든 조합에 같은 리스트를 공유
+
+    반환값:
+        {"1-1_chunk_only": (content_list, metadata_list), ...}  (조합 순서 유지)
+    """
+    combination_ids = resolve_combinations(combinations)
+    page_index = build_page_index(df)
+    contents = {}
+    metadatas = {}
+    outputs = {}
+    for combination_id in combination_ids:
+        content_id, meta_id = combination_id.split("-")
+        if content_id not in contents:
+            contents[content_id] = CONTENT_STRATEGIES[content_id][1](df, page_index)
+        if meta_id not in metadatas:
+            metadatas[meta_id] = METADATA_STRATEGIES[meta_id](df, page_index)
+        outputs[combination_name(combination_id)] = (contents[content_id], metadatas[meta_id])
+    return outputs
+
+# save_excel 엑셀 내보내기 설정 (셀 최대 글자 수, 열 너비, 헤더 테두리)
+EXCEL_CELL_LIMIT = 32767
+EXCEL_COLUMN_WIDTH = 80
+_THIN = Side(style="thin")
+
 def save_excel(content_list, metadata_list, output_path):
     """
     각 행별로 metadata의 text 필드는 최대 32767글자 단위로 분할하여 C열부터 기록하고,
     B열에는 text를 제외한 나머지 metadata JSON 문자열을 기록합니다.
+    openpyxl write-only 모드로 서식(열 너비, wrap_text)까지 한 번에 기록하므로
+    저장 후 워크북을 다시 열지 않고, 행을 모두 메모리에 올리지 않습니다.
     """
-    # 각 행마다 metadata에서 "text" 필드를 분리하고, 나머지 metadata는 JSON 문자열로 변환
-    new_metadata_rows = []  # B열에 기록될 metadata (text 제외)
-    text_chunks_list = []   # 각 행의 text를 32767글자 단위로 분할한 리스트
-    
-    chunk_size = 32767
+    chunk_size = EXCEL_CELL_LIMIT
+    # 첫 번째 패스: text 분할 열(text_chunk_N)의 개수만 계산
     max_chunks = 0
     for meta in metadata_list:
-        # text 필드 분리
+        text_length = len(meta.get("text", ""))
+        max_chunks = max(max_chunks, -(-text_length // chunk_size))
+
+    wb = Workbook(write_only=True)
+    header_style = NamedStyle(
+        name="header",
+        font=Font(bold=True),
+        border=Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN),
+        alignment=Alignment(horizontal="center", vertical="top")
+    )
+    body_style = NamedStyle(name="wrap_top", alignment=Alignment(wrap_text=True, vertical="top"))
+    wb.add_named_style(header_style)
+    wb.add_named_style(body_style)
+    ws = wb.create_sheet("Sheet1")
+
+    # 열 너비는 행을 쓰기 전에 지정해야 함 (content, metadata, text_chunk_* 모두 80)
+    for col in range(1, 3 + max_chunks):
+        ws.column_dimensions[get_column_letter(col)].width = EXCEL_COLUMN_WIDTH
+
+    def styled_row(values, style):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            cells.append(cell)
+        return cells
+
+    # 컬럼 구성: "content", "metadata", "text_chunk_1", "text_chunk_2", ... 등
+    header = ["content", "metadata"] + [f"text_chunk_{i+1}" for i in range(max_chunks)]
+    ws.append(styled_row(header, "header"))
+
+    # 두 번째 패스: 행 단위로 metadata(text 제외)를 JSON 문자열로 변환하고 text를 분할하여 바로 기록
+    for content, meta in zip(content_list, metadata_list):
         text = meta.get("text", "")
-        # text 제외한 나머지 필드를 JSON 문자열로 변환
         meta_no_text = {k: v for k, v in meta.items() if k != "text"}
-        new_metadata_rows.append(json.dumps(meta_no_text, ensure_ascii=False, indent=4))
-        # text를 최대 chunk_size 크기로 분할
         chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-        text_chunks_list.append(chunks)
-        if len(chunks) > max_chunks:
-            max_chunks = len(chunks)
-    
-    # 데이터프레임에 넣을 컬럼 생성: "content", "metadata", "text_chunk_1", "text_chunk_2", ... 등
-    data = []
-    for content, meta_str, chunks in zip(content_list, new_metadata_rows, text_chunks_list):
-        row = {"content": content, "metadata": meta_str}
-        for i in range(max_chunks):
-            row[f"text_chunk_{i+1}"] = chunks[i] if i < len(chunks) else ""
-        data.append(row)
-    
-    out_df = pd.DataFrame(data)
-    out_df.to_excel(output_path, index=False)
-    
-    # openpyxl을 사용하여 엑셀 서식 적용
-    wb = load_workbook(output_path)
-    ws = wb.active
-    
-    # 예시로 각 열의 너비를 조정 (원하는 크기로 수정 가능)
-    ws.column_dimensions['A'].width = 80   # content
-    ws.column_dimensions['B'].width = 80   # metadata (text 제외)
-    # text_chunk_* 열은 80보다 넓게 설정할 수 있음
-    for col in range(3, 3 + max_chunks):
-        col_letter = ws.cell(row=1, column=col).column_letter
-        ws.column_dimensions[col_letter].width = 80
-    
-    # 각 셀에 wrap_text 적용
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=2+max_chunks):
-        for cell in row:
-            cell.alignment = Alignment(wrap_text=True, vertical='top')
-    
+        chunks += [None] * (max_chunks - len(chunks))
+        ws.append(styled_row([content, json.dumps(meta_no_text, ensure_ascii=False, indent=4)] + chunks, "wrap_top"))
+
     wb.save(output_path)
 
 
-def construct_embedding_contents(folder_list):
+# 단계 간 중간 산출물(Parquet) 스키마
+# → content: 임베딩할 내용, metadata: text를 제외한 메타데이터(struct), text: 메타데이터 결합 텍스트
+METADATA_TYPE = pa.struct([
+    ("elementid", pa.list_(pa.int64())),
+    ("category", pa.string()),
+    ("filename", pa.string()),
+    ("page", pa.list_(pa.int64()))
+])
+CONSTRUCT_SCHEMA = pa.schema([
+    ("content", pa.string()),
+    ("metadata", METADATA_TYPE),
+    ("text", pa.string())
+])
+
+def save_parquet(content_list, metadata_list, output_path):
+    """
+    content|metadata 결과를 CONSTRUCT_SCHEMA 형식의 Parquet 파일로 저장합니다.
+    엑셀과 달리 셀 길이 제한이 없으므로 metadata의 text 필드는 분할하지 않고 text 열에 그대로 기록합니다.
+    """
+    metadata_rows = [{k: v for k, v in meta.items() if k != "text"} for meta in metadata_list]
+    table = pa.table(
+        {
+            "content": pa.array(content_list, type=pa.string(), from_pandas=True),
+            "metadata": pa.array(metadata_rows, type=METADATA_TYPE, from_pandas=True),
+            "text": pa.array([meta.get("text", "") for meta in metadata_list], type=pa.string(), from_pandas=True)
+        },
+        schema=CONSTRUCT_SCHEMA
+    )
+    pq.write_table(table, output_path)
+
+def construct_input_path(folder):
+    """
+    파싱 결과 폴더의 입력 엑셀 경로(<폴더>/<폴더명>.xlsx)를 반환
+    """
+    base_name = os.path.basename(os.path.normpath(folder))
+    return os.path.join(folder, f"{base_name}.xlsx")
+
+def load_construct_frame(folder):
+    """
+    파싱 결과 폴더의 <폴더명>.xlsx를 읽어 content 생성용 DataFrame으로 반환
+    → "이미지설명"이 있는 행은 "내용" 뒤에 이미지설명을 붙임 (파일이 없으면 None)
+    """
+    excel_path = construct_input_path(folder)
+    if not os.path.exists(excel_path):
+        print(f"❌ 엑셀 파일이 존재하지 않습니다: {excel_path}")
+        return None
+    df = pd.read_excel(excel_path)
+    # "이미지설명" 처리: 내용이 float 타입일 수 있으므로 문자열로 변환
+    if "이미지설명" in df.columns:
+        df["내용"] = df.apply(
+            lambda row: str(row["내용"]) + ( "\n\n이미지설명: " + str(row["이미지설명"]) 
+                                        if pd.notna(row["이미지설명"]) and str(row["이미지설명"]).strip() != "" 
+                                        else "" ),
+            axis=1
+        )
+    return df
+
+def save_combination_output(name, content_list, metadata_list, output_folder, export_excel=False):
+    """
+    조합 하나(content|metadata)를 output_folder에 <name>.parquet (및 <name>.xlsx)로 저장
+    """
+    save_parquet(content_list, metadata_list, os.path.join(output_folder, f"{name}.parquet"))
+    if export_excel:
+        save_excel(content_list, metadata_list, os.path.join(output_folder, f"{name}.xlsx"))
+
+def save_combination_outputs(outputs, output_folder, export_excel=False):
+    """
+    build_combination_outputs의 결과를 output_folder에 조합별 Parquet 파일로 저장
+    → export_excel=True이면 사람이 검토할 수 있도록 같은 이름의 엑셀 파일도 함께 저장
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    for name, (content_list, metadata_list) in outputs.items():
+        save_combination_output(name, content_list, metadata_list, output_folder, export_excel)
+
+# 증분 생성을 위한 manifest 파일 이름
+MANIFEST_FILENAME = "construct_manifest.json"
+
+def file_sha256(path, block_size=1 << 20):
+    """
+    파일 내용의 sha256 해시를 반환
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(output_folder):
+    """
+    output_folder의 construct manifest를 읽어 반환 (없거나 읽을 수 없으면 None)
+
+    JSON 형식:
+    {
+        "inputs": [[폴더명, sha256], ...],  # 입력 엑셀 해시 (병합 순서 유지)
+        "combinations": ["1-1", ...],       # 생성된 조합
+        "export_excel": bool                # 엑셀 파일 생성 여부
+    }
+    """
+    manifest_path = os.path.join(output_folder, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ manifest 읽기 실패 ({manifest_path}): {e}")
+        return None
+
+def save_manifest(output_folder, inputs, combination_ids, export_excel):
+    """
+    생성이 끝난 output_folder에 construct manifest를 기록
+    """
+    manifest = {"inputs": inputs, "combinations": combination_ids, "export_excel": export_excel}
+    with open(os.path.join(output_folder, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+def is_up_to_date(output_folder, manifest, inputs, combination_ids, export_excel):
+    """
+    입력 해시가 manifest와 같고, 요청된 조합의 결과 파일이 모두 존재하면 True
+    """
+    if manifest is None or manifest.get("inputs") != inputs:
+        return False
+    if not set(combination_ids) <= set(manifest.get("combinations", [])):
+        return False
+    extensions = [".parquet", ".xlsx"] if export_excel else [".parquet"]
+    return all(
+        os.path.exists(os.path.join(output_folder, combination_name(combination_id) + ext))
+        for combination_id in combination_ids
+        for ext in extensions
+    )
+
+def read_combination_output(path):
+    """
+    save_parquet로 저장한 조합 결과 파일을 (content_list, metadata_list)로 읽음
+    → metadata는 text를 포함한 dict (save_excel 입력 형식과 같음)
+    """
+    table = pq.read_table(path, columns=["content", "metadata", "text"])
+    metadata_list = [
+        dict(meta, text=text)
+        for meta, text in zip(table.column("metadata").to_pylist(), table.column("text").to_pylist())
+    ]
+    return table.column("content").to_pylist(), metadata_list
+
+def merge_combination_output(name, source_folders, output_folder, export_excel=False):
+    """
+    폴더별 조합 결과(<폴더>/<name>.parquet)를 입력 순서대로 이어 붙여 output_folder에 저장
+    → content/metadata는 문서(폴더)마다 따로 계산된 값을 그대로 사용하므로 다시 계산하지 않음
+    """
+    tables = [pq.read_table(os.path.join(folder, f"{name}.parquet")).cast(CONSTRUCT_SCHEMA) for folder in source_folders]
+    output_path = os.path.join(output_folder, f"{name}.parquet")
+    pq.write_table(pa.concat_tables(tables), output_path)
+    if export_excel:
+        content_list, metadata_list = read_combination_output(output_path)
+        save_excel(content_list, metadata_list, os.path.join(output_folder, f"{name}.xlsx"))
+
+def construct_folder(folder, combination_ids, export_excel=False):
+    """
+    폴더 하나의 조합별 파일을 생성 (입력 엑셀이 바뀌지 않았으면 건너뜀)
+    → 프로세스 풀 작업 단위로도 사용되므로 출력 메시지는 직접 출력하지 않고 반환
+
+    반환값:
+        (result, message)
+            - result: (폴더명, 입력 해시), 입력 엑셀이 없으면 None
+            - message: 처리 결과 메시지
+    """
+    excel_path = construct_input_path(folder)
+    if not os.path.exists(excel_path):
+        return None, f"❌ 엑셀 파일이 존재하지 않습니다: {excel_path}"
+    folder_key = os.path.basename(os.path.normpath(folder))
+    inputs = [[folder_key, file_sha256(excel_path)]]
+    if is_up_to_date(folder, load_manifest(folder), inputs, combination_ids, export_excel):
+        return (folder_key, inputs[0][1]), f"║ [{folder}] 입력이 바뀌지 않아 건너뜁니다."
+    df = load_construct_frame(folder)
+    # 개별 폴더에 대해서 기존 폴더 생성 및 파일 저장
+    outputs = build_combination_outputs(df, combination_ids)
+    save_combination_outputs(outputs, folder, export_excel)
+    save_manifest(folder, inputs, combination_ids, export_excel)
+    message = f"║ [{folder}] 에서 {len(outputs)}개의 content|metadata 파일이 생성되었습니다."
+    return (folder_key, inputs[0][1]), message
+
+def construct_embedding_contents(folder_list, combinations=None, export_excel=False, output_folder=None, workers=1):
     """
     폴더 경로 리스트를 입력받아 각 폴더의 엑셀 파일을 읽은 후 데이터를 개별적으로 저장하고,
-    또한 입력받은 모든 폴더의 데이터를 병합하여 현재 시각(YYMMDD-HH24-MM) 이름의 출력 폴더를 만들고,
-    그곳에 11개의 content|metadata 엑셀 파일을 생성함.
+    또한 입력받은 모든 폴더의 결과를 병합하여 현재 시각(YYMMDD-HH24-MM) 이름의 출력 폴더를 만들고,
+    그곳에 content|metadata Parquet 파일을 생성함.
     
-    → 개별 폴더에서는 기존과 같이 base_folder 에 11개의 파일 생성
-    → 병합된 데이터는 출력 폴더(YYMMDD-HH24-MM) 내에 11개의 파일이 생성됨 (합쳐진 결과로 11개만 생성)
+    → 개별 폴더에서는 기존과 같이 base_folder 에 조합별 파일 생성
+    → 병합된 데이터는 출력 폴더(YYMMDD-HH24-MM) 내에 조합별 파일이 생성됨
+    → 페이지/elementid 문맥은 문서(폴더) 안에서만 계산하므로, 병합 결과는 폴더별 결과를 입력 순서대로 이어 붙인 것과 같음
+      (페이지숫자와 elementid는 문서마다 1, 0부터 다시 시작하므로 다른 문서의 같은 페이지를 섞지 않음)
+    → combinations로 생성할 조합을 선택 (예: ["1-1", "3-2"], 기본값 None이면 11개 전체)
+    → 각 content/metadata 전략은 폴더별 DataFrame 당 한 번씩만 계산됨
+    → export_excel=True이면 검토용 엑셀 파일(.xlsx)도 함께 생성
+    → 각 출력 폴더에 입력 엑셀 해시를 manifest로 기록하여, 입력이 바뀌지 않은 폴더는 건너뜀
+      (입력이 바뀐 문서만 다시 계산하고, 나머지 문서는 폴더에 저장된 결과를 그대로 병합)
+    → output_folder를 지정하면 시각 이름 대신 해당 폴더에 병합 결과를 덮어씀 (지정하지 않으면 실행마다 새 폴더)
+    → workers > 1이면 프로세스 풀로 폴더별 생성과 조합별 병합을 병렬 처리 (결과 순서는 입력 순서로 고정)
+      작업자는 결과를 폴더에 Parquet로 저장하고 (폴더명, 입력 해시)만 반환하며, 병합은 그 파일을 읽으므로
+      입력 엑셀은 폴더마다 한 번만 읽음
     """
+    combination_ids = resolve_combinations(combinations)
     
     print("╔════════════════════════════════════════")
-    df_list = []
-    for folder in folder_list:
-        base_name = os.path.basename(os.path.normpath(folder))
-        excel_path = os.path.join(folder, f"{base_name}.xlsx")
-        if not os.path.exists(excel_path):
-            print(f"❌ 엑셀 파일이 존재하지 않습니다: {excel_path}")
+    # 폴더가 여러 개이고 workers > 1이면 폴더별 생성과 병합 결과 저장을 프로세스 풀에서 병렬 수행
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(folder_list) > 1 else None
+    try:
+        return _construct_embedding_contents(folder_list, combination_ids, export_excel, output_folder, executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+def _construct_embedding_contents(folder_list, combination_ids, export_excel, output_folder, executor):
+    sources = []   # (폴더, 폴더명, 입력 해시)
+    if executor is None:
+        results = (construct_folder(folder, combination_ids, export_excel) for folder in folder_list)
+    else:
+        # 제출 순서대로 결과를 모아 출력 순서와 병합 순서를 입력 순서로 고정
+        futures = [executor.submit(construct_folder, folder, combination_ids, export_excel) for folder in folder_list]
+        results = (future.result() for future in futures)
+    for folder, (result, message) in zip(folder_list, results):
+        print(message)
+        if result is None:
             continue
-        df = pd.read_excel(excel_path)
-        df_list.append(df)
-        # 개별 폴더에 대해서 기존 폴더 생성 및 파일 저장
-        # "이미지설명" 처리: 내용이 float 타입일 수 있으므로 문자열로 변환
-        if "이미지설명" in df.columns:
-            df["내용"] = df.apply(
-                lambda row: str(row["내용"]) + ( "\n\n이미지설명: " + str(row["이미지설명"]) 
-                                            if pd.notna(row["이미지설명"]) and str(row["이미지설명"]).strip() != "" 
-                                            else "" ),
-                axis=1
-            )
-        
-        os.makedirs(folder, exist_ok=True)
-        content_map = {
-            "chunk_only": df["내용"].tolist(),
-            "chunk_with_neighbors": extract_neighbors_by_elementid(df),
-            "page_plus_chunk": extract_page_plus_chunk(df),
-            "page_only": extract_page_only(df)
-        }
-        content_type_mapping = {
-            "chunk_only": "1",
-            "chunk_with_neighbors": "2",
-            "page_plus_chunk": "3",
-            "page_only": "4"
-        }
-        metadata_funcs = {
-            "1": get_neighbor_metadata,
-            "2": get_3page_metadata,
-            "3": get_cross_page_metadata
-        }
-        for content_name, content_list in content_map.items():
-            if content_name == "page_only":
-                valid_meta_ids = ["2", "3"]
-            else:
-                valid_meta_ids = ["1", "2", "3"]
-            for meta_id in valid_meta_ids:
-                metadata_list = metadata_funcs[meta_id](df)
-                filename = f"{content_type_mapping[content_name]}-{meta_id}_{content_name}.xlsx"
-                save_file_path = os.path.join(folder, filename)
-                save_excel(content_list, metadata_list, save_file_path)
-        print(f"║ [{folder}] 에서 11개의 content|metadata 엑셀 파일이 생성되었습니다.")
+        folder_key, input_hash = result
+        sources.append((folder, folder_key, input_hash))
     
-    if not df_list:
+    if not sources:
         print("❌ 유효한 엑셀 파일이 하나도 없습니다.")
         return
     
-    # 병합 데이터 생성 (여러 폴더의 데이터를 하나로 병합)
-    combined_df = pd.concat(df_list, ignore_index=True)
-    if "이미지설명" in combined_df.columns:
-        combined_df["내용"] = combined_df.apply(
-            lambda row: str(row["내용"]) + ( "\n\n이미지설명: " + str(row["이미지설명"]) 
-                                        if pd.notna(row["이미지설명"]) and str(row["이미지설명"]).strip() != "" 
-                                        else "" ),
-            axis=1
-        )
-    
-    # 현재 시각을 기반으로 출력 폴더 생성 (YYMMDD-HH24-MM)
-    timestamp = datetime.now().strftime("%y%m%d-%H-%M")
-    output_folder = os.path.join(os.getcwd(),"data", timestamp)
+    if output_folder is None:
+        # 현재 시각을 기반으로 출력 폴더 생성 (YYMMDD-HH24-MM)
+        timestamp = datetime.now().strftime("%y%m%d-%H-%M")
+        output_folder = os.path.join(os.getcwd(),"data", timestamp)
     os.makedirs(output_folder, exist_ok=True)
-    
-    
-    # 병합 데이터로 11개의 엑셀 파일 생성 (내용은 동일한 로직 사용)
-    content_map = {
-        "chunk_only": combined_df["내용"].tolist(),
-        "chunk_with_neighbors": extract_neighbors_by_elementid(combined_df),
-        "page_plus_chunk": extract_page_plus_chunk(combined_df),
-        "page_only": extract_page_only(combined_df)
-    }
-    content_type_mapping = {
-        "chunk_only": "1",
-        "chunk_with_neighbors": "2",
-        "page_plus_chunk": "3",
-        "page_only": "4"
-    }
-    metadata_funcs = {
-        "1": get_neighbor_metadata,
-        "2": get_3page_metadata,
-        "3": get_cross_page_metadata
-    }
-    for content_name, content_list in content_map.items():
-        if content_name == "page_only":
-            valid_meta_ids = ["2", "3"]
-        else:
-            valid_meta_ids = ["1", "2", "3"]
-        for meta_id in valid_meta_ids:
-            metadata_list = metadata_funcs[meta_id](combined_df)
-            filename = f"{content_type_mapping[content_name]}-{meta_id}_{content_name}.xlsx"
-            save_file_path = os.path.join(output_folder, filename)
-            save_excel(content_list, metadata_list, save_file_path)
-    print(f"║ 📁 병합된 데이터로 {output_folder} 에 11개의 content|metadata 엑셀 파일이 생성되었습니다.")
+
+    merged_inputs = [[folder_key, input_hash] for _, folder_key, input_hash in sources]
+    if is_up_to_date(output_folder, load_manifest(output_folder), merged_inputs, combination_ids, export_excel):
+        print(f"║ 📁 병합 입력이 바뀌지 않아 {output_folder} 를 그대로 사용합니다.")
+        return output_folder
+
+    # 병합 데이터 생성 (폴더별 결과 파일을 입력 순서대로 이어 붙임, 입력 엑셀은 다시 읽지 않음)
+    source_folders = [folder for folder, _, _ in sources]
+    names = [combination_name(combination_id) for combination_id in combination_ids]
+    if executor is None:
+        for name in names:
+            merge_combination_output(name, source_folders, output_folder, export_excel)
+    else:
+        # 작업자가 저장한 Parquet를 작업자 프로세스에서 바로 병합 (부모 프로세스로 데이터를 옮기지 않음)
+        futures = [executor.submit(merge_combination_output, name, source_folders, output_folder, export_excel) for name in names]
+        for future in futures:
+            future.result()
+    save_manifest(output_folder, merged_inputs, combination_ids, export_excel)
+    print(f"║ 📁 병합된 데이터로 {output_folder} 에 {len(names)}개의 content|metadata 파일이 생성되었습니다.")
     return output_folder
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+import time
+import argparse
+import numpy as np
+import faiss
+
+from vectorstore_builder import create_index
+
+def make_synthetic_vectors(n_vectors=200000, dim=256, n_clusters=1000, seed=0):
+    """
+    실제 임베딩처럼 군집을 이루는 합성 벡터 (n_vectors, dim) float32 생성
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n_vectors)
+    return centers[labels] + 0.3 * rng.standard_normal((n_vectors, dim)).astype(np.float32)
+
+def load_store_vectors(vdb_index_path):
+    """
+    저장된 벡터스토어(index.faiss)의 벡터를 읽어옵니다.
+    """
+    index = faiss.read_index(f"{vdb_index_path}/index.faiss")
+    return index.reconstruct_n(0, index.ntotal)
+
+def recall_at_k(result_ids, truth_ids):
+    """
+    정답(flat 결과) 대비 recall@k 평균
+    """
+    k = truth_ids.shape[1]
+    return float(np.mean([len(set(r) & set(t)) / k for r, t in zip(result_ids, truth_ids)]))
+
+def run_benchmark(vectors, queries, k=10, index_types=("ivf_flat", "ivf_pq", "hnsw"),
+                  nprobes=(1, 4, 16, 64), ef_searches=(16, 64, 256)):
+    """
+    flat 인덱스 결과를 정답으로 index_types별 생성 시간, recall@k, 쿼리당 지연 시간을 측정합니다.
+
+    Returns:
+        list[dict]: {"index", "param", "build", "recall", "latency_ms"} 리스트
+    """
+    rows = []
+
+    start = time.perf_counter()
+    flat, _ = create_index(vectors, "flat")
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    _, truth = flat.search(queries, k)
+    latency = (time.perf_counter() - start) / len(queries) * 1000
+    rows.append({"index": "flat", "param": "-", "build": build, "recall": 1.0, "latency_ms": latency})
+
+    for index_type in index_types:
+        start = time.perf_counter()
+        index, config = create_index(vectors, index_type)
+        build = time.perf_counter() - start
+
+        if index_type == "hnsw":
+            settings = [("efSearch", ef, lambda ef=ef: setattr(index.hnsw, "efSearch", ef)) for ef in ef_searches]
+        else:
+            settings = [("nprobe", p, lambda p=p: setattr(index, "nprobe", p)) for p in nprobes if p <= config["nlist"]]
+
+        for name, value, apply in settings:
+            apply()
+            start = time.perf_counter()
+            _, ids = index.search(queries, k)
+            latency = (time.perf_counter() - start) / len(queries) * 1000
+            rows.append({
+                "index": index_type, "param": f"{name}={value}", "build": build,
+                "recall": recall_at_k(ids, truth), "latency_ms": latency
+            })
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 종류별 recall / 지연 시간 벤치마크 (flat 기준)")
+    parser.add_argument("--store", default=None, help="벡터를 읽어올 벡터스토어 폴더 (없으면 합성 데이터)")
+    parser.add_argument("--vectors", type=int, default=200000, help="합성 벡터 수")
+    parser.add_argument("--dim", type=int, default=256, help="합성 벡터 차원")
+    parser.add_argument("--queries", type=int, default=1000, help="쿼리 수")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=0, help="FAISS 스레드 수 (0이면 기본값)")
+    args = parser.parse_args()
+
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+
+    if args.store:
+        vectors = np.ascontiguousarray(load_store_vectors(args.store), dtype=np.float32)
+    else:
+        vectors = make_synthetic_vectors(args.vectors, args.dim)
+    # 쿼리: DB 벡터에 잡음을 더한 벡터
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    queries = vectors[picks] + 0.1 * rng.standard_normal((len(picks), vectors.shape[1])).astype(np.float32)
+
+    print("╔════════════════════════════════════════")
+    print(f"║ 벡터 {vectors.shape[0]}개 × {vectors.shape[1]}차원, 쿼리 {len(queries)}개, k={args.k}")
+    for row in run_benchmark(vectors, queries, args.k):
+        print(f"║   -> {row['index']:<9} {row['param']:<13} 생성 {row['build']:7.2f}초 "
+              f"recall@{args.k} {row['recall']:.3f}  쿼리당 {row['latency_ms']:.3f}ms")
+    print("╚════════════════════════════════════════\n")
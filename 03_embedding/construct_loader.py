@@ -0,0 +1,95 @@
+import os
+import re
+import json
+import pandas as pd
+import pyarrow.parquet as pq
+from langchain.schema import Document
+
+# content / metadata text에서 제거할 라벨 패턴
+LABEL_PATTERNS = [
+    "[[[[[[이전청크]", "[[[[[[현재청크]", "[[[[[[다음청크]",
+    "[[[[[[현재페이지 전체내용]", "[[[[[[이전페이지 마지막 청크]", "[[[[[[다음페이지 첫번째 청크]"
+]
+
+# 02_construct 조합 결과 파일명 ("1-2_chunk_only" 처럼 {content 번호}-{metadata 번호}_{content 이름})
+COMBINATION_FILE_PATTERN = re.compile(r"^(\d+)-(\d+)_[a-z_]+$")
+
+def remove_label_patterns(text):
+    """
+    02_construct 단계에서 붙인 라벨 패턴을 텍스트에서 제거합니다.
+    """
+    for pattern in LABEL_PATTERNS:
+        text = text.replace(pattern, "")
+    return text
+
+def find_construct_files(folder_path):
+    """
+    folder_path 내의 02_construct 결과 파일 목록을 반환합니다.
+    같은 이름의 .parquet 파일이 있으면 우선 사용하고,
+    Parquet가 없는 이전 결과 폴더는 엑셀(.xlsx) 파일을 사용합니다.
+    → 조합 파일명(COMBINATION_FILE_PATTERN)과 일치하는 파일만 사용합니다
+      (파싱 결과 엑셀, 증분 생성용 행 정보 파일 등은 제외).
+    """
+    files = {}
+    for f in sorted(os.listdir(folder_path)):
+        stem, ext = os.path.splitext(f)
+        ext = ext.lower()
+        if not COMBINATION_FILE_PATTERN.match(stem):
+            continue
+        if ext == ".parquet" or (ext == ".xlsx" and stem not in files):
+            files[stem] = os.path.join(folder_path, f)
+    return list(files.values())
+
+def load_documents(file):
+    """
+    02_construct 결과 파일(.parquet 또는 .xlsx) 하나를 읽어 Document 리스트로 반환합니다.
+    page_content는 라벨을 제거한 content, metadata는 metadata 필드에 라벨을 제거한 text를 추가한 값입니다.
+    """
+    if file.lower().endswith(".parquet"):
+        return load_parquet_documents(file)
+    return load_excel_documents(file)
+
+def load_parquet_documents(file):
+    """
+    CONSTRUCT_SCHEMA(content, metadata struct, text) 형식의 Parquet 파일을 Document 리스트로 변환합니다.
+    """
+    table = pq.read_table(file, columns=["content", "metadata", "text"])
+    documents = []
+    for row in table.to_pylist():
+        if row["content"] is None or row["metadata"] is None:
+            continue
+        metadata = dict(row["metadata"])
+        metadata["text"] = remove_label_patterns(row["text"] or "")
+        documents.append(Document(page_content=remove_label_patterns(row["content"]), metadata=metadata))
+    return documents
+
+def load_excel_documents(file):
+    """
+    이전 형식의 엑셀 파일(A열 content, B열 metadata JSON, C열부터 32767글자 단위로 분할된 text)을
+    Document 리스트로 변환합니다. 모든 시트를 사용합니다.
+    """
+    documents = []
+    try:
+        sheets = pd.read_excel(file, engine='openpyxl', sheet_name=None)
+    except Exception as e:
+        print(f"Excel 파일 {file} 읽기 실패: {e}")
+        return documents
+
+    for sheet, df in sheets.items():
+        if "content" not in df.columns or "metadata" not in df.columns:
+            print(f"파일 {file}의 시트 {sheet}에 'content' 또는 'metadata' 컬럼이 없습니다.")
+            continue
+
+        df = df.dropna(subset=["content", "metadata"])
+        text_columns = list(df.columns[2:])
+        for index, row in df.iterrows():
+            try:
+                metadata = json.loads(row["metadata"])
+            except Exception as e:
+                print(f"메타데이터 파싱 실패 (파일 {file}, 시트 {sheet}, 행 {index}): {e}")
+                continue
+            # C열 이후로 분할 저장된 text를 다시 이어붙임
+            text = "".join(str(row[col]) for col in text_columns if pd.notna(row[col]))
+            metadata["text"] = remove_label_patterns(text)
+            documents.append(Document(page_content=remove_label_patterns(str(row["content"])), metadata=metadata))
+    return documents
@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+import unicodedata
+import numpy as np
+
+# 임베딩 캐시 기본 위치 (환경변수 EMBEDDING_CACHE_DIR 로 변경 가능)
+CACHE_DIR = os.path.join("vdb", "embedding_cache")
+
+def normalize_text(text):
+    """
+    캐시 키 계산용 텍스트 정규화: 유니코드 NFC + 연속 공백을 공백 1개로 + 앞뒤 공백 제거
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def text_key(text):
+    """
+    정규화한 텍스트의 sha256 해시(hex)를 반환합니다.
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """
+    (모델, 정규화 텍스트 해시) → 임베딩 벡터를 저장하는 디스크 캐시
+    → {cache_dir}/{model}/vectors.f32 : float32 행렬 (행 단위로 이어 붙이며, 읽을 때 memmap 사용)
+    → {cache_dir}/{model}/keys.txt    : 행 순서대로 한 줄에 하나씩 키(해시)
+    → {cache_dir}/{model}/meta.json   : {"model": ..., "dim": ...}
+    벡터를 먼저 쓰고 키를 나중에 쓰므로, 중간에 중단되어도 키가 있는 행만 사용합니다.
+    """
+    def __init__(self, model, cache_dir=None):
+        cache_dir = cache_dir or os.getenv("EMBEDDING_CACHE_DIR") or CACHE_DIR
+        self.model = model
+        self.folder = os.path.join(cache_dir, model.replace("/", "_"))
+        self.vectors_path = os.path.join(self.folder, "vectors.f32")
+        self.keys_path = os.path.join(self.folder, "keys.txt")
+        self.meta_path = os.path.join(self.folder, "meta.json")
+        self.dim = None
+        self.rows = {}
+        self._matrix = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            self.dim = json.load(f)["dim"]
+        if not os.path.exists(self.keys_path) or not os.path.exists(self.vectors_path):
+            return
+        with open(self.keys_path, "r", encoding="utf-8") as f:
+            # 줄바꿈으로 끝나지 않은 마지막 줄(쓰다가 중단된 키)은 버림
+            lines = f.read().split("\n")
+        keys = lines[:-1]
+        n_rows = min(len(keys), os.path.getsize(self.vectors_path) // (4 * self.dim))
+        if n_rows != len(keys) or lines[-1]:
+            with open(self.keys_path, "w", encoding="utf-8") as f:
+                f.write("".join(f"{key}\n" for key in keys[:n_rows]))
+        self.rows = {key: row for row, key in enumerate(keys[:n_rows])}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def matrix(self):
+        """
+        캐시된 벡터 전체를 읽기 전용 memmap (len(self), dim) 으로 반환합니다.
+        """
+        if self._matrix is None and self.rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self.rows), self.dim))
+        return self._matrix
+
+    def get_many(self, keys):
+        """
+        keys 중 캐시에 있는 키의 {키: 벡터(np.ndarray)} 를 반환합니다.
+        """
+        hits = [key for key in keys if key in self.rows]
+        if not hits:
+            return {}
+        vectors = np.asarray(self.matrix()[[self.rows[key] for key in hits]])
+        return dict(zip(hits, vectors))
+
+    def add_many(self, keys, vectors):
+        """
+        캐시에 없는 (키, 벡터)를 파일 끝에 추가합니다.
+        """
+        new_keys = []
+        new_vectors = []
+        for key, vector in zip(keys, vectors):
+            if key in self.rows or key in new_keys:
+                continue
+            new_keys.append(key)
+            new_vectors.append(vector)
+        if not new_keys:
+            return
+
+        matrix = np.asarray(new_vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+            os.makedirs(self.folder, exist_ok=True)
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model, "dim": self.dim}, f)
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"임베딩 차원 불일치: 캐시 {self.dim}, 입력 {matrix.shape[1]}")
+
+        # 파일 크기 기준으로 다음 행 위치를 맞춘 뒤 벡터 → 키 순서로 추가
+        n_rows = len(self.rows)
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(n_rows * 4 * self.dim)
+            f.write(matrix.tobytes())
+        with open(self.keys_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{key}\n" for key in new_keys))
+        for offset, key in enumerate(new_keys):
+            self.rows[key] = n_rows + offset
+        self._matrix = None
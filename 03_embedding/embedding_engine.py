@@ -0,0 +1,346 @@
+import os
+import sys
+import time
+import re
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+import numpy as np
+from openai import APIStatusError, APIConnectionError, APITimeoutError
+
+# 공용 API 클라이언트(common/api_clients.py)를 불러올 수 있도록 경로 추가
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common")
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+from api_clients import create_async_client
+from token_chunker import count_tokens, split_text_into_chunks_by_tokens
+from embedding_cache import EmbeddingCache, text_key
+
+# 공급자별 기본 설정
+# → max_input_tokens: 입력 1개당 최대 토큰 수, chunk_tokens: 이를 넘는 텍스트를 나눌 청크 크기
+# → max_batch_inputs / max_batch_tokens: 요청 1회당 최대 입력 개수 / 합계 토큰 수
+# → rpm / tpm: 분당 요청 수 / 분당 토큰 수 (환경변수 {API키 접두어}_EMBEDDING_RPM, _TPM 으로 덮어쓰기 가능)
+PROVIDERS = {
+    "upstage": {
+        "api_key_env": "UPSTAGE_API_KEY",
+        "base_url_env": "UPSTAGE_BASE_URL",
+        "base_url": "https://api.upstage.ai/v1/solar",
+        "max_input_tokens": 4000,
+        "chunk_tokens": 3800,
+        "max_batch_inputs": 100,
+        "max_batch_tokens": 204800,
+        "rpm": 100,
+        "tpm": 300000,
+    },
+    "openai": {
+        "api_key_env": "OPENAI_API_KEY",
+        "base_url_env": "OPENAI_BASE_URL",
+        "base_url": None,
+        "max_input_tokens": 8191,
+        "chunk_tokens": 7800,
+        "max_batch_inputs": 2048,
+        "max_batch_tokens": 300000,
+        "rpm": 3000,
+        "tpm": 1000000,
+    },
+}
+
+CHUNK_OVERLAP_TOKENS = 200   # 분할된 청크 간 겹치는 토큰 수
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# 400 응답 중 요청 크기(컨텍스트/토큰/입력 개수) 초과로 보는 오류 코드와 메시지 패턴
+BATCH_TOO_LARGE_CODES = {"context_length_exceeded", "string_above_max_length", "too_many_tokens", "too_many_inputs"}
+BATCH_TOO_LARGE_PATTERN = re.compile(
+    r"context length|context window|too many (tokens|inputs)|token limit|maximum .*tokens|(request|payload|batch) too large",
+    re.IGNORECASE
+)
+
+class BatchTooLargeError(Exception):
+    """요청 크기 초과(413, 또는 토큰/컨텍스트 한도 초과 400)로 배치를 줄여야 하는 오류"""
+
+def is_batch_too_large(error):
+    """
+    APIStatusError가 배치를 나누면 성공할 수 있는 크기 초과 오류이면 True
+    → 413은 항상, 400은 오류 코드나 메시지가 컨텍스트/토큰 한도 초과를 가리킬 때만
+      (잘못된 모델, 빈 입력, 잘못된 파라미터 등 다른 400은 나눠도 실패하므로 False)
+    """
+    if error.status_code == 413:
+        return True
+    if error.status_code != 400:
+        return False
+    if getattr(error, "code", None) in BATCH_TOO_LARGE_CODES:
+        return True
+    return bool(BATCH_TOO_LARGE_PATTERN.search(getattr(error, "message", None) or str(error)))
+
+class TokenBucket:
+    """
+    분당 허용량(rate_per_minute)을 초 단위로 균등하게 채우는 토큰 버킷
+    → acquire(amount): 허용량이 찰 때까지 대기 후 차감 (대기 순서대로 처리)
+    → block(seconds): Retry-After 등으로 지정된 시간 동안 모든 요청을 멈춤
+    """
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def block(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self, amount=1):
+        amount = min(float(amount), self.capacity)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+def parse_retry_after(response):
+    """
+    응답 헤더(retry-after-ms, retry-after)에서 재시도 대기 시간(초)을 반환합니다. 없으면 None.
+    """
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def split_texts_for_embedding(texts, max_input_tokens, chunk_tokens, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    texts를 임베딩 요청 단위(item) 리스트로 펼칩니다.
+    → item: (원본 텍스트 인덱스, 입력 텍스트, 토큰 수)
+    → max_input_tokens를 넘는 텍스트는 chunk_tokens 이하의 청크 여러 개로 나뉩니다.
+    """
+    items = []
+    for idx, text in enumerate(texts):
+        n_tokens = count_tokens(text)
+        if n_tokens > max_input_tokens:
+            for chunk in split_text_into_chunks_by_tokens(text, chunk_tokens, overlap_tokens):
+                items.append((idx, chunk, count_tokens(chunk)))
+        else:
+            items.append((idx, text, n_tokens))
+    return items
+
+def next_batch_end(items, start, batch_size, max_batch_tokens):
+    """
+    items[start:]에서 입력 개수 batch_size, 합계 토큰 max_batch_tokens 이내로 담을 수 있는 끝 인덱스를 반환합니다.
+    (첫 item은 항상 포함)
+    """
+    end = start
+    total_tokens = 0
+    while end < len(items) and end - start < batch_size:
+        if end > start and total_tokens + items[end][2] > max_batch_tokens:
+            break
+        total_tokens += items[end][2]
+        end += 1
+    return end
+
+class EmbeddingEngine:
+    """
+    openaiEmbedding / upstageEmbedding이 함께 사용하는 asyncio 기반 임베딩 엔진
+    → 텍스트를 토큰 수 기준으로 배치에 담아 max_concurrency 개까지 동시에 요청합니다.
+    → 분당 요청 수(rpm) / 토큰 수(tpm) 예산을 토큰 버킷으로 지키고,
+      429 등 일시적 오류는 Retry-After 헤더 또는 지터가 있는 지수 백오프 후 재시도합니다.
+    → 크기 초과 오류(413, 토큰 한도 초과 400)는 배치를 절반으로 나눠 다시 요청하고, 성공하면 배치 크기를 다시 키웁니다.
+      그 밖의 400 오류는 나누지 않고 해당 배치를 바로 실패로 처리합니다.
+    → base_url을 지정하면 로컬 mock 서버(mock_embedding_server.py)로도 동작을 확인할 수 있습니다.
+    → cache(EmbeddingCache)를 지정하면 API 요청 전에 캐시를 먼저 조회합니다.
+    → HTTP 클라이언트는 api_clients의 provider별 keep-alive 커넥션 풀 설정으로 생성합니다.
+    """
+    def __init__(self, api_key, model, base_url=None, provider="openai", rpm=None, tpm=None,
+                 max_input_tokens=8191, chunk_tokens=7800, max_batch_inputs=100, max_batch_tokens=200000,
+                 max_concurrency=8, max_retries=6, backoff_base=1.0, backoff_max=60.0, timeout=60.0, cache=None):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self.provider = provider
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_input_tokens = max_input_tokens
+        self.chunk_tokens = chunk_tokens
+        self.max_batch_inputs = max_batch_inputs
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.cache = cache
+        self.dim = None
+
+    def backoff_delay(self, attempt):
+        """
+        attempt번째 재시도의 대기 시간: 지수 증가 상한의 절반 + 무작위 지터
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def request(self, client, buckets, inputs, n_tokens):
+        """
+        inputs 한 배치를 요청하고 입력 순서대로 임베딩 리스트를 반환합니다.
+        """
+        request_bucket, token_bucket = buckets
+        for attempt in range(self.max_retries + 1):
+            if request_bucket is not None:
+                await request_bucket.acquire(1)
+            if token_bucket is not None:
+                await token_bucket.acquire(n_tokens)
+            try:
+                response = await client.embeddings.create(model=self.model, input=inputs)
+                vectors = [None] * len(inputs)
+                for offset, data in enumerate(response.data):
+                    vectors[getattr(data, "index", offset)] = data.embedding
+                return vectors
+            except APIStatusError as e:
+                if is_batch_too_large(e):
+                    raise BatchTooLargeError(str(e)) from e
+                if e.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    raise
+                delay = parse_retry_after(e.response)
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                elif e.status_code == 429:
+                    # 서버가 지정한 시간 동안은 다른 요청도 보내지 않음
+                    for bucket in buckets:
+                        if bucket is not None:
+                            bucket.block(delay)
+            except (APIConnectionError, APITimeoutError):
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+            await asyncio.sleep(delay)
+
+    async def embed_range(self, client, buckets, items, vectors, start, end):
+        """
+        items[start:end]를 한 번에 요청하여 vectors에 채웁니다.
+        크기 초과 오류이면 절반씩 나눠 다시 요청합니다. 단독으로도 거절된 입력은 None으로 남습니다.
+        """
+        batch = items[start:end]
+        try:
+            result = await self.request(client, buckets, [item[1] for item in batch], sum(item[2] for item in batch))
+        except BatchTooLargeError as e:
+            if end - start == 1:
+                print(f"🚨 임베딩 요청 실패 (입력 {start}): {str(e)}")
+                return
+            self.batch_size = max(1, (end - start) // 2)
+            mid = start + (end - start) // 2
+            await self.embed_range(client, buckets, items, vectors, start, mid)
+            await self.embed_range(client, buckets, items, vectors, mid, end)
+            return
+        except Exception as e:
+            print(f"🚨 임베딩 요청 실패 (입력 {start}~{end - 1}): {str(e)}")
+            return
+        vectors[start:end] = result
+        self.batch_size = min(self.max_batch_inputs, self.batch_size + max(1, self.batch_size // 2))
+
+    async def aembed_unique(self, texts):
+        """
+        texts의 임베딩을 비동기로 생성합니다. 분할된 텍스트는 청크 임베딩의 평균, 실패한 텍스트는 None입니다.
+        """
+        items = split_texts_for_embedding(texts, self.max_input_tokens, self.chunk_tokens)
+        vectors = [None] * len(items)
+        buckets = (TokenBucket(self.rpm) if self.rpm else None, TokenBucket(self.tpm) if self.tpm else None)
+        self.batch_size = self.max_batch_inputs
+        cursor = 0
+
+        async def worker(client):
+            nonlocal cursor
+            while cursor < len(items):
+                start = cursor
+                cursor = next_batch_end(items, start, self.batch_size, self.max_batch_tokens)
+                await self.embed_range(client, buckets, items, vectors, start, cursor)
+
+        async with create_async_client(self.provider, self.api_key, self.base_url, max_connections=self.max_concurrency,
+                                       max_retries=0, timeout=self.timeout) as client:
+            await asyncio.gather(*(worker(client) for _ in range(self.max_concurrency)))
+
+        # item 임베딩을 원본 텍스트 단위로 모음 (분할된 텍스트는 평균)
+        grouped = [[] for _ in texts]
+        for (idx, _, _), vector in zip(items, vectors):
+            if vector is not None:
+                grouped[idx].append(vector)
+        embeddings = []
+        for sub_embeddings in grouped:
+            if len(sub_embeddings) == 1:
+                embeddings.append(np.asarray(sub_embeddings[0], dtype=np.float32))
+            elif sub_embeddings:
+                embeddings.append(np.mean(np.array(sub_embeddings, dtype=np.float32), axis=0))
+            else:
+                embeddings.append(None)
+        return embeddings
+
+    async def aembed_texts(self, texts):
+        """
+        texts의 임베딩을 반환합니다. 실패한 텍스트는 0 벡터입니다.
+        → 정규화 텍스트 해시가 같은 텍스트는 한 번만 요청합니다.
+        → 캐시(self.cache)가 있으면 먼저 조회하고, 새로 생성한 임베딩은 캐시에 추가합니다.
+        """
+        keys = [text_key(text) for text in texts]
+        unique = {}
+        for key, text in zip(keys, texts):
+            unique.setdefault(key, text)
+
+        found = self.cache.get_many(list(unique)) if self.cache is not None else {}
+        missing = [key for key in unique if key not in found]
+        if missing:
+            new_vectors = await self.aembed_unique([unique[key] for key in missing])
+            created = {key: vector for key, vector in zip(missing, new_vectors) if vector is not None}
+            if self.cache is not None and created:
+                self.cache.add_many(list(created), list(created.values()))
+            found.update(created)
+        if texts:
+            print(f"║   -> 임베딩 {len(texts)}개 (고유 {len(unique)}개, 캐시 사용 {len(unique) - len(missing)}개, API 요청 {len(missing)}개)")
+
+        for vector in found.values():
+            self.dim = self.dim or len(vector)
+            break
+        if self.dim is None and texts:
+            raise RuntimeError("임베딩을 하나도 생성하지 못했습니다.")
+        zeros = [0.0] * (self.dim or 0)
+        return [found[key].tolist() if key in found else zeros for key in keys]
+
+    def embed_texts(self, texts):
+        """
+        aembed_texts의 동기 버전
+        """
+        return asyncio.run(self.aembed_texts(list(texts)))
+
+def create_engine(provider, model, use_cache=True, **overrides):
+    """
+    PROVIDERS[provider] 설정과 환경변수로 EmbeddingEngine을 생성합니다.
+    → API 키: {api_key_env}, base_url: {base_url_env}
+    → rpm / tpm: {API키 접두어}_EMBEDDING_RPM / _TPM (예: UPSTAGE_EMBEDDING_RPM)
+    → 임베딩 캐시: {EMBEDDING_CACHE_DIR 또는 vdb/embedding_cache}/{model} (use_cache=False면 사용 안 함)
+    → overrides로 전달한 값이 가장 우선합니다.
+    """
+    config = dict(PROVIDERS[provider])
+    prefix = config.pop("api_key_env").replace("_API_KEY", "")
+    api_key = os.getenv(f"{prefix}_API_KEY")
+    base_url = os.getenv(config.pop("base_url_env")) or config.pop("base_url")
+    config.pop("base_url", None)
+    for key in ("rpm", "tpm"):
+        value = os.getenv(f"{prefix}_EMBEDDING_{key.upper()}")
+        if value:
+            config[key] = int(value)
+    config.update(api_key=api_key, base_url=base_url, provider=provider, cache=EmbeddingCache(model) if use_cache else None)
+    config.update(overrides)
+    return EmbeddingEngine(model=model, **config)
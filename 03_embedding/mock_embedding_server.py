@@ -0,0 +1,105 @@
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class MockEmbeddingHandler(BaseHTTPRequestHandler):
+    """
+    OpenAI 호환 POST .../embeddings 엔드포인트를 흉내 내는 로컬 mock 서버 핸들러
+    → 텍스트 해시로 만든 고정 벡터를 반환합니다 (같은 텍스트 → 같은 벡터)
+    → 처음 fail_first개 요청과 error_rate 확률로 429(Retry-After 포함), max_inputs 초과 시 413,
+      빈 문자열 입력이 있으면 400(invalid_request_error)을 반환합니다.
+    → stats["log"]에 요청마다 (도착 시각(time.monotonic), 입력 개수, 응답 상태)를 기록합니다.
+    """
+    dim = 8
+    error_rate = 0.0
+    fail_first = 0
+    retry_after = 1
+    max_inputs = 100
+    stats = {"requests": 0, "inputs": 0, "429": 0, "413": 0, "400": 0, "log": []}
+    lock = threading.Lock()
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/embeddings"):
+            self.send_json(404, {"error": {"message": "not found"}})
+            return
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+        arrived = time.monotonic()
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.stats["requests"] <= self.fail_first or random.random() < self.error_rate:
+                status, body, headers = 429, {"error": {"message": "rate limit"}}, {"Retry-After": str(self.retry_after)}
+            elif len(inputs) > self.max_inputs:
+                status, body, headers = 413, {"error": {"message": "too many inputs"}}, None
+            elif any(not text for text in inputs):
+                status, body, headers = 400, {"error": {"message": "'$.input' is invalid: empty string",
+                                                        "type": "invalid_request_error", "code": None}}, None
+            else:
+                status, body, headers = 200, None, None
+            self.stats["log"].append((arrived, len(inputs), status))
+            if status != 200:
+                self.stats[str(status)] += 1
+                self.send_json(status, body, headers)
+                return
+            self.stats["inputs"] += len(inputs)
+
+        data = []
+        for i, text in enumerate(inputs):
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim).tolist()
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        self.send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": payload.get("model"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0}
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+def start_mock_server(port=0, dim=8, error_rate=0.0, retry_after=1, max_inputs=100, fail_first=0):
+    """
+    mock 서버를 백그라운드 스레드로 시작하고 (server, base_url)을 반환합니다.
+    port=0이면 비어 있는 포트를 사용합니다. 요청 통계는 server.RequestHandlerClass.stats, 종료는 server.shutdown().
+    """
+    handler = type("Handler", (MockEmbeddingHandler,), {
+        "dim": dim, "error_rate": error_rate, "fail_first": fail_first, "retry_after": retry_after, "max_inputs": max_inputs,
+        "stats": {"requests": 0, "inputs": 0, "429": 0, "413": 0, "400": 0, "log": []}, "lock": threading.Lock()
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="임베딩 엔진 확인용 OpenAI 호환 mock 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dim", type=int, default=8, help="반환할 벡터 차원")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429를 반환할 확률")
+    parser.add_argument("--retry-after", type=float, default=1, help="429 응답의 Retry-After(초)")
+    parser.add_argument("--fail-first", type=int, default=0, help="처음 이 개수만큼의 요청에 429 반환")
+    parser.add_argument("--max-inputs", type=int, default=100, help="이보다 많은 입력이면 413 반환")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(args.port, args.dim, args.error_rate, args.retry_after, args.max_inputs, args.fail_first)
+    print(f"║ mock 임베딩 서버 실행 중: {base_url} (예: UPSTAGE_BASE_URL={base_url})")
+    print("║ mock 벡터가 실제 임베딩 캐시에 섞이지 않도록 EMBEDDING_CACHE_DIR을 별도 폴더로 지정하세요.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
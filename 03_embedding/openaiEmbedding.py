@@ -1,114 +1,37 @@
 import os
-import json
-import pandas as pd
-from langchain.schema import Document
-from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from embedding_engine import create_engine
+from vectorstore_builder import build_vectorstores
 
-def process_file(file, sheets, embedding_model, model):
-    documents = []
-    for sheet in sheets:
-        try:
-            df = pd.read_excel(file, engine='openpyxl', sheet_name=sheet)
-        except Exception as e:
-            print(f"시트 {sheet} 읽기 실패: {e}")
-            continue
-
-        # 'content', 'metadata' 컬럼 확인 (첫 두 컬럼)
-        if "content" not in df.columns or "metadata" not in df.columns:
-            print(f"파일 {file}의 시트 {sheet}에 'content' 또는 'metadata' 컬럼이 없습니다.")
-            continue
-
-        df = df.dropna(subset=["content", "metadata"])
-        for index, row in df.iterrows():
-            if pd.isna(row["content"]) or pd.isna(row["metadata"]):
-                continue
-            content = row["content"]
-            # 불필요한 패턴 제거 (content 내)
-            for pattern in ["[[[[[[이전청크]", "[[[[[[현재청크]", "[[[[[[다음청크]",
-                            "[[[[[[현재페이지 전체내용]", "[[[[[[이전페이지 마지막 청크]", "[[[[[[다음페이지 첫번째 청크]"]:
-                content = content.replace(pattern, "")
-            try:
-                metadata = json.loads(row["metadata"])
-            except Exception as e:
-                print(f"메타데이터 파싱 실패 (파일 {file}, 시트 {sheet}, 행 {index}), 메타데이터 글자수 {len(row['metadata'])}: {e}")
-                continue
-            # 엑셀에서 3번째 열(C열)부터 마지막 열까지 텍스트가 분할되어 저장되어 있으면 결합
-            text_parts = []
-            if len(df.columns) > 2:
-                # 첫 두 컬럼은 content, metadata이므로 3번째 컬럼부터 사용
-                for col in df.columns[2:]:
-                    val = row[col]
-                    if pd.notna(val):
-                        text_parts.append(str(val))
-            combined_text = "\n".join(text_parts)
-            # 불필요한 패턴 제거 (metadata의 text 내)
-            for pattern in ["[[[[[[이전청크]", "[[[[[[현재청크]", "[[[[[[다음청크]",
-                            "[[[[[[현재페이지 전체내용]", "[[[[[[이전페이지 마지막 청크]", "[[[[[[다음페이지 첫번째 청크]"]:
-                combined_text = combined_text.replace(pattern, "")
-            # metadata에 text 필드 추가 (기존 내용은 덮어쓰거나, 원한다면 기존과 결합 가능)
-            metadata["text"] = combined_text
-            documents.append(Document(page_content=content, metadata=metadata))
-
-    if not documents:
-        print(f"파일 {file}에서 처리할 문서가 없습니다.")
-        return None
-
-    # 각 Excel 파일별로 벡터스토어 생성
-    vectorstore = FAISS.from_documents(documents=documents, embedding=embedding_model)
-    # 엑셀 파일명(확장자 제거) 사용하여 저장 폴더 지정
-    excel_filename = os.path.splitext(os.path.basename(file))[0]
-    save_path = os.path.join("vdb", "openai_small", f"{excel_filename}_{model}")
-    vectorstore.save_local(save_path)
-    print(f"║   -> {excel_filename} 파일의 임베딩이 성공적으로 저장되었습니다.")
-    return save_path
-
-
-def openaiEmbedding(folder_path):
+def openaiEmbedding(folder_path, index_type="flat", index_params=None, metric="l2"):
     """
-    folder_path 내부에 있는 모든 Excel 파일(.xlsx)을 개별로 처리하여
+    folder_path 내부에 있는 모든 construct 결과 파일(.parquet, 이전 결과는 .xlsx)을 개별로 처리하여
     OpenAI 임베딩 벡터스토어를 생성합니다.
-    각 Excel 파일의 모든 시트를 사용하며, 파일별로 별도의 벡터스토어 폴더를 생성합니다.
-    폴더 이름은 {엑셀파일명}_text-embedding-3-small 형식입니다.
-    병렬처리를 사용하여 임베딩 시간을 단축합니다.
+    파일별로 별도의 벡터스토어 폴더를 생성합니다.
+    폴더 이름은 {파일명}_text-embedding-3-small 형식입니다.
+    임베딩은 공용 임베딩 엔진(embedding_engine)이 rpm/tpm 예산 안에서 동시 요청으로 생성하며,
+    content가 같은 파일(N-1, N-2, N-3)은 임베딩을 공유합니다.
+    FAISS 인덱스 종류는 index_type(flat, ivf_flat, ivf_pq, hnsw)과 index_params로 지정합니다.
+    metric="ip"이면 정규화한 벡터를 내적 인덱스에 저장하여 검색 점수가 곧 코사인 유사도가 됩니다.
     """
     load_dotenv()
 
     # OpenAI API 설정
-    api_key = os.getenv("OPENAI_API_KEY")
-    os.environ["OPENAI_API_KEY"] = api_key
-
-    # folder_path 내의 모든 Excel 파일 찾기
-    excel_files = []
-    for f in os.listdir(folder_path):
-        if f.lower().endswith('.xlsx'):
-            file_path = os.path.join(folder_path, f)
-            try:
-                xl = pd.ExcelFile(file_path, engine='openpyxl')
-                sheets = xl.sheet_names
-                excel_files.append((file_path, sheets))
-            except Exception as e:
-                print(f"Excel 파일 {f} 읽기 실패: {e}")
-
-    if not excel_files:
-        print("처리할 Excel 파일이 없습니다.")
+    if not os.getenv("OPENAI_API_KEY"):
+        print("OPENAI_API_KEY가 .env 파일에 설정되어 있지 않습니다.")
         return
 
-    # 사용할 모델명 및 임베딩 모델 생성
+    # 사용할 모델명 및 임베딩 엔진 생성 (OPENAI_BASE_URL, OPENAI_EMBEDDING_RPM/TPM 으로 설정 변경 가능)
     model = "text-embedding-3-small"
+    engine = create_engine("openai", model)
+    # 저장되는 벡터스토어의 embedding_function (검색 시 쿼리 임베딩용)
     embedding_model = OpenAIEmbeddings(model=model)
 
-    # 각 Excel 파일별로 병렬 처리 시작
-    results = []
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = {executor.submit(process_file, file, sheets, embedding_model, model): file for file, sheets in excel_files}
-        for future in as_completed(futures):
-            result = future.result()
-            if result is not None:
-                results.append(result)
-    return results
+    return build_vectorstores(
+        folder_path, engine, embedding_model, os.path.join("vdb", "openai_small"), model,
+        index_type=index_type, index_params=index_params, metric=metric
+    )
 
 if __name__ == "__main__":
     folder_path = r"C:\Users\yoyo2\fas\RAG_Pre_processing\data\250402-18-31"
@@ -0,0 +1,165 @@
+import re
+import codecs
+import threading
+
+try:
+    import tiktoken  # pip install tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# 요소(문단) 경계 → 문장 경계 순서로 나눈다.
+ELEMENT_SEPARATOR = "\n\n"
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?。])\s+|(?<=다\.)|\n")
+
+_tokenizers = {}
+_tokenizer_lock = threading.Lock()
+
+class _ApproxTokenizer:
+    """
+    tiktoken이 없을 때 사용하는 근사 토크나이저
+    → UTF-8 3바이트를 1토큰으로 계산 (한글 1글자 ≈ 1토큰, 영문 3글자 ≈ 1토큰)
+    """
+    def encode(self, text):
+        data = text.encode("utf-8")
+        return [data[i:i+3] for i in range(0, len(data), 3)]
+
+    def decode(self, tokens):
+        return self.decode_bytes(tokens).decode("utf-8", errors="ignore")
+
+    def decode_bytes(self, tokens):
+        return b"".join(tokens)
+
+def get_tokenizer(encoding_name=DEFAULT_ENCODING):
+    """
+    encoding_name에 해당하는 토크나이저를 반환합니다.
+    프로세스 내에서 한 번만 생성하여 모든 스레드가 같은 인스턴스를 공유합니다.
+    tiktoken이 없거나 인코딩 파일을 받을 수 없으면 근사 토크나이저를 사용합니다.
+    """
+    tokenizer = _tokenizers.get(encoding_name)
+    if tokenizer is None:
+        with _tokenizer_lock:
+            tokenizer = _tokenizers.get(encoding_name)
+            if tokenizer is None:
+                tokenizer = None
+                if tiktoken is not None:
+                    try:
+                        tokenizer = tiktoken.get_encoding(encoding_name)
+                    except Exception as e:
+                        print(f"🚨 tiktoken 인코딩({encoding_name}) 로드 실패, 근사 토큰 수를 사용합니다: {e}")
+                if tokenizer is None:
+                    tokenizer = _ApproxTokenizer()
+                _tokenizers[encoding_name] = tokenizer
+    return tokenizer
+
+def count_tokens(text, tokenizer=None):
+    """
+    텍스트의 토큰 수를 반환합니다.
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    return len(tokenizer.encode(text))
+
+def _ends_mid_character(tokenizer, tokens):
+    """
+    토큰들을 이어 붙인 UTF-8 바이트가 글자 중간에서 끝나면 True
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    decoder.decode(tokenizer.decode_bytes(tokens), final=False)
+    return bool(decoder.getstate()[0])
+
+def _split_by_tokens(text, max_tokens, tokenizer):
+    """
+    문장 하나가 max_tokens보다 길 때 토큰 단위로 자릅니다.
+    → 자르는 위치가 글자(UTF-8) 중간이면 그 글자의 토큰을 다음 조각으로 넘겨 글자가 사라지지 않게 합니다.
+      (max_tokens 안에서 글자 경계를 찾을 수 없을 때만 글자가 끝나는 토큰까지 늘림)
+    """
+    tokens = tokenizer.encode(text)
+    pieces = []
+    start = 0
+    while start < len(tokens):
+        end = min(start + max_tokens, len(tokens))
+        cut = end
+        while cut > start + 1 and cut < len(tokens) and _ends_mid_character(tokenizer, tokens[start:cut]):
+            cut -= 1
+        if cut < len(tokens) and _ends_mid_character(tokenizer, tokens[start:cut]):
+            cut = end
+            while cut < len(tokens) and _ends_mid_character(tokenizer, tokens[start:cut]):
+                cut += 1
+        pieces.append(tokenizer.decode(tokens[start:cut]))
+        start = cut
+    return pieces
+
+def _split_units(text, max_tokens, tokenizer):
+    """
+    텍스트를 max_tokens 이하의 (조각, 토큰 수, 앞 구분자) 리스트로 나눕니다.
+    요소 경계("\n\n")로 먼저 나누고, 그래도 긴 요소는 문장 경계, 마지막으로 토큰 단위로 나눕니다.
+    """
+    units = []
+    for element in text.split(ELEMENT_SEPARATOR):
+        if not element.strip():
+            continue
+        n_tokens = count_tokens(element, tokenizer)
+        if n_tokens <= max_tokens:
+            units.append((element, n_tokens, ELEMENT_SEPARATOR))
+            continue
+        separator = ELEMENT_SEPARATOR
+        for sentence in SENTENCE_PATTERN.split(element):
+            if not sentence or not sentence.strip():
+                continue
+            n_tokens = count_tokens(sentence, tokenizer)
+            pieces = [sentence] if n_tokens <= max_tokens else _split_by_tokens(sentence, max_tokens, tokenizer)
+            for piece in pieces:
+                units.append((piece, count_tokens(piece, tokenizer), separator))
+                separator = " "
+    return units
+
+def split_text_into_chunks_by_tokens(text, max_tokens, overlap_tokens=0, tokenizer=None):
+    """
+    텍스트를 요소/문장 경계 기준으로 나눈 뒤, 각 청크가 max_tokens에 최대한 가깝도록 채워 반환합니다.
+    overlap_tokens > 0이면 이전 청크 끝의 조각을 overlap_tokens 이내에서 다음 청크 앞에 반복합니다.
+
+    Args:
+        text (str): 분할할 텍스트.
+        max_tokens (int): 청크당 최대 토큰 수.
+        overlap_tokens (int): 청크 간 겹치는 최대 토큰 수.
+        tokenizer: encode/decode를 제공하는 토크나이저 (기본값: get_tokenizer()).
+
+    Returns:
+        list[str]: 토큰 수가 max_tokens 이하인 청크 리스트.
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    separator_tokens = count_tokens(ELEMENT_SEPARATOR, tokenizer)
+    units = _split_units(text, max_tokens, tokenizer)
+
+    chunks = []
+    current = []       # 현재 청크에 담긴 (조각, 토큰 수, 앞 구분자)
+    current_tokens = 0
+    for unit in units:
+        unit_tokens = unit[1] + (separator_tokens if current else 0)
+        if current and current_tokens + unit_tokens > max_tokens:
+            chunks.append(current)
+            # 겹침: 이전 청크 끝에서부터 overlap_tokens 이내의 조각을 새 청크로 가져옴
+            overlap = []
+            overlap_total = 0
+            for prev in reversed(current):
+                if overlap_total + prev[1] + separator_tokens > overlap_tokens:
+                    break
+                overlap.insert(0, prev)
+                overlap_total += prev[1] + separator_tokens
+            if overlap_total + unit[1] > max_tokens:
+                overlap, overlap_total = [], 0
+            current, current_tokens = overlap, overlap_total
+            unit_tokens = unit[1] + (separator_tokens if current else 0)
+        current.append(unit)
+        current_tokens += unit_tokens
+    if current:
+        chunks.append(current)
+
+    results = []
+    for chunk in chunks:
+        parts = [chunk[0][0]]
+        for piece, _, separator in chunk[1:]:
+            parts.append(separator + piece)
+        results.append("".join(parts))
+    return results
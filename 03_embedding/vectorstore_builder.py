@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import sqlite3
+import numpy as np
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from construct_loader import find_construct_files, load_documents, COMBINATION_FILE_PATTERN
+
+# 공용 모듈(common/lexical_index.py, pca_projection.py)을 불러올 수 있도록 경로 추가
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common")
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+from lexical_index import LexicalIndex, LEXICAL_INDEX_FILENAME
+from pca_projection import fit_projection, save_projection
+
+# FAISS 인덱스 종류와 기본 파라미터
+# → flat: 정확한 전체 탐색 (기본값)
+# → ivf_flat / ivf_pq: nlist개 클러스터로 나눠 검색 시 nprobe개 클러스터만 탐색 (ivf_pq는 벡터를 m개 부분 × nbits 비트로 압축)
+# → hnsw: 그래프 기반 탐색, hnsw_m은 노드당 연결 수, ef_search가 클수록 정확하고 느림
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+DEFAULT_INDEX_PARAMS = {
+    "nlist": None,          # None이면 4 * sqrt(n)
+    "nprobe": 16,
+    "pq_m": 16,             # dim의 약수 중 pq_m 이하 최댓값을 사용
+    "pq_nbits": 8,
+    "hnsw_m": 32,
+    "ef_construction": 200,
+    "ef_search": 64,
+    "train_size": 100000,   # 학습에 사용할 최대 표본 수
+}
+INDEX_CONFIG_FILENAME = "index_config.json"
+# ANN 인덱스는 원본 벡터를 복원하기 어려우므로 검색 앱의 코사인/시각화용 벡터를 따로 저장 (np.load mmap으로 읽음)
+VECTORS_FILENAME = "vectors.npy"
+# 검색 앱이 검색 결과 문서만 읽을 수 있도록 docstore를 SQLite로도 저장 (04_search/sqlite_docstore.py)
+DOCSTORE_FILENAME = "docstore.sqlite"
+
+# 거리 기준
+# → l2: 원본 벡터의 L2 거리 (FAISS는 거리의 제곱을 반환)
+# → ip: L2 정규화한 벡터의 내적 = 코사인 유사도 (L2 거리 제곱은 2 - 2·cos로 계산)
+METRICS = ("l2", "ip")
+
+def prepare_vectors(matrix, metric="l2"):
+    """
+    인덱스에 저장할 형태의 float32 벡터를 반환합니다. metric="ip"이면 L2 정규화한 복사본입니다.
+    """
+    if metric != "ip":
+        return np.ascontiguousarray(matrix, dtype=np.float32)
+    matrix = np.array(matrix, dtype=np.float32)
+    faiss.normalize_L2(matrix)
+    return matrix
+
+def create_index(matrix, index_type="flat", index_params=None, metric="l2"):
+    """
+    matrix (n, dim) 벡터로 index_type의 FAISS 인덱스를 만들어 벡터를 추가합니다.
+    IVF 계열은 최대 train_size개의 무작위 표본으로 학습합니다.
+    metric="ip"이면 벡터를 L2 정규화한 뒤 내적(Inner Product) 인덱스에 추가하므로
+    검색 점수가 곧 코사인 유사도가 됩니다.
+
+    Returns:
+        tuple: (index, index_config) - index_config는 검색 시 필요한 설정 (index_config.json에 저장)
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"알 수 없는 index_type: {index_type} (사용 가능: {', '.join(INDEX_TYPES)})")
+    if metric not in METRICS:
+        raise ValueError(f"알 수 없는 metric: {metric} (사용 가능: {', '.join(METRICS)})")
+    params = dict(DEFAULT_INDEX_PARAMS, **(index_params or {}))
+    n, dim = matrix.shape
+    config = {"index_type": index_type, "metric": metric, "normalized": metric == "ip", "dim": dim, "ntotal": n}
+    faiss_metric = faiss.METRIC_INNER_PRODUCT if metric == "ip" else faiss.METRIC_L2
+    matrix = prepare_vectors(matrix, metric)
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim) if metric == "ip" else faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["hnsw_m"], faiss_metric)
+        index.hnsw.efConstruction = params["ef_construction"]
+        index.hnsw.efSearch = params["ef_search"]
+        config.update(hnsw_m=params["hnsw_m"], ef_search=params["ef_search"])
+    else:
+        # 클러스터당 학습 표본이 최소 39개는 되도록 nlist 제한
+        nlist = params["nlist"] or int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n // 39 or 1))
+        quantizer = faiss.IndexFlatIP(dim) if metric == "ip" else faiss.IndexFlatL2(dim)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss_metric)
+        else:
+            pq_m = max(m for m in range(1, min(params["pq_m"], dim) + 1) if dim % m == 0)
+            # 코드북(2^nbits개) 학습 표본이 부족하면 nbits를 줄임
+            pq_nbits = max(1, min(params["pq_nbits"], int(np.log2(max(2, n // 39)))))
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_nbits, faiss_metric)
+            config.update(pq_m=pq_m, pq_nbits=pq_nbits)
+        train_size = min(n, params["train_size"])
+        sample = matrix if train_size == n else matrix[np.random.default_rng(0).choice(n, train_size, replace=False)]
+        index.train(np.ascontiguousarray(sample))
+        index.nprobe = min(params["nprobe"], nlist)
+        config.update(nlist=nlist, nprobe=index.nprobe)
+
+    index.add(matrix)
+    return index, config
+
+def content_group_key(file):
+    """
+    construct 결과 파일의 content 번호("1"~"4")를 반환합니다. 형식이 다르면 파일명(확장자 제외)을 반환합니다.
+    """
+    stem = os.path.splitext(os.path.basename(file))[0]
+    match = COMBINATION_FILE_PATTERN.match(stem)
+    return match.group(1) if match else stem
+
+def group_construct_files(construct_files):
+    """
+    construct 결과 파일 경로를 content 번호별로 묶습니다 (파일은 읽지 않음).
+
+    Returns:
+        list[list[str]]: content 번호별 파일 경로 리스트 (construct_files 순서)
+    """
+    batches = {}
+    for file in construct_files:
+        batches.setdefault(content_group_key(file), []).append(file)
+    return list(batches.values())
+
+def load_content_groups(construct_files):
+    """
+    construct 결과 파일들을 읽어 content가 같은 파일끼리 묶습니다.
+    → 임베딩 대상(content)은 content 번호에만 의존하고 metadata 번호와는 무관하므로,
+      1-1 / 1-2 / 1-3 처럼 content 번호가 같은 파일은 같은 벡터를 사용할 수 있습니다.
+    → 같은 content 번호라도 content 리스트가 실제로 다르면 별도 그룹으로 둡니다.
+    → 읽을 수 없는 파일은 건너뜁니다.
+
+    Returns:
+        list[dict]: [{"texts": content 리스트, "files": [(파일 경로, Document 리스트), ...]}, ...]
+    """
+    groups = {}
+    for file in construct_files:
+        try:
+            documents = load_documents(file)
+        except Exception as e:
+            print(f"🚨 파일 {file} 읽기 실패: {e}")
+            continue
+        if not documents:
+            print(f"파일 {file}에서 처리할 문서가 없습니다.")
+            continue
+        texts = [doc.page_content for doc in documents]
+        candidates = groups.setdefault(content_group_key(file), [])
+        for group in candidates:
+            if group["texts"] == texts:
+                group["files"].append((file, documents))
+                break
+        else:
+            candidates.append({"texts": texts, "files": [(file, documents)]})
+    return [group for candidates in groups.values() for group in candidates]
+
+def save_sqlite_docstore(documents, path):
+    """
+    documents를 SQLite 파일로 저장합니다.
+    → documents(row INTEGER PRIMARY KEY = FAISS 인덱스 번호, doc_id TEXT, page_content TEXT, metadata TEXT(JSON))
+    → doc_id는 인덱스 번호 문자열이며 index_to_docstore_id와 같습니다.
+    """
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE documents (row INTEGER PRIMARY KEY, doc_id TEXT NOT NULL, page_content TEXT, metadata TEXT)")
+        conn.executemany(
+            "INSERT INTO documents VALUES (?, ?, ?, ?)",
+            ((i, str(i), doc.page_content, json.dumps(doc.metadata, ensure_ascii=False)) for i, doc in enumerate(documents))
+        )
+        conn.execute("CREATE UNIQUE INDEX idx_documents_doc_id ON documents (doc_id)")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+def save_vectorstore(index, documents, embedding_function, save_path, index_config=None, vectors=None, lexical_index=None,
+                     projection=None):
+    """
+    이미 벡터가 추가된 FAISS index와 documents로 벡터스토어를 만들어 save_path에 저장합니다.
+    index_config가 있으면 save_path/index_config.json으로 함께 저장합니다 (검색 시 load_vectorstore가 사용).
+    vectors가 있으면 save_path/vectors.npy로 저장하고, 없으면 이전에 저장된 vectors.npy를 지웁니다.
+    lexical_index(LexicalIndex)가 있으면 하이브리드 검색용 BM25 역색인을 save_path/bm25.npz로 저장합니다.
+    projection(fit_projection 결과)이 있으면 시각화용 PCA 투영을 save_path/pca.npz로 저장합니다.
+    문서는 index.pkl(langchain 호환)과 docstore.sqlite(검색 앱의 지연 로딩용)에 함께 저장합니다.
+    """
+    vectorstore = FAISS(
+        embedding_function=embedding_function,
+        index=index,
+        docstore=InMemoryDocstore({str(i): doc for i, doc in enumerate(documents)}),
+        index_to_docstore_id={i: str(i) for i in range(len(documents))}
+    )
+    vectorstore.save_local(save_path)
+    save_sqlite_docstore(documents, os.path.join(save_path, DOCSTORE_FILENAME))
+    if index_config is not None:
+        with open(os.path.join(save_path, INDEX_CONFIG_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(index_config, f, ensure_ascii=False, indent=2)
+    vectors_path = os.path.join(save_path, VECTORS_FILENAME)
+    if vectors is not None:
+        np.save(vectors_path, vectors)
+    elif os.path.exists(vectors_path):
+        os.remove(vectors_path)
+    if lexical_index is not None:
+        lexical_index.save(os.path.join(save_path, LEXICAL_INDEX_FILENAME))
+    if projection is not None:
+        save_projection(projection, save_path)
+    return save_path
+
+def build_group_vectorstores(group, engine, embedding_function, save_folder, suffix, index_type="flat", index_params=None,
+                             metric="l2"):
+    """
+    content 그룹 하나(load_content_groups 결과의 원소)를 임베딩하여 그룹의 파일마다 벡터스토어를 저장합니다.
+    → FAISS 인덱스, BM25 역색인, PCA 투영은 그룹당 한 번만 생성하고 각 파일의 docstore(metadata만 다름)와 함께 저장합니다.
+
+    Returns:
+        list[str]: 저장된 벡터스토어 경로 리스트.
+    """
+    group_matrix = prepare_vectors(np.asarray(engine.embed_texts(group["texts"]), dtype=np.float32), metric)
+    index, index_config = create_index(group_matrix, index_type, index_params, metric)
+    # flat 인덱스는 검색 앱이 (IO_FLAG_MMAP_IFC로 연) 인덱스 내부 벡터를 그대로 참조하므로 vectors.npy 불필요
+    vectors = None if index_type == "flat" else group_matrix
+    lexical_index = LexicalIndex.build(group["texts"])
+    projection = fit_projection(group_matrix)
+
+    results = []
+    for file, documents in group["files"]:
+        construct_filename = os.path.splitext(os.path.basename(file))[0]
+        save_path = os.path.join(save_folder, f"{construct_filename}_{suffix}")
+        results.append(save_vectorstore(index, documents, embedding_function, save_path, index_config, vectors, lexical_index, projection))
+        print(f"║   -> {construct_filename} 파일의 임베딩이 성공적으로 저장되었습니다.")
+    return results
+
+def build_vectorstores(folder_path, engine, embedding_function, save_folder, suffix, index_type="flat", index_params=None,
+                       metric="l2"):
+    """
+    folder_path 내의 construct 결과 파일마다 {save_folder}/{파일명}_{suffix} 벡터스토어를 생성합니다.
+    → content가 같은 파일끼리 묶어(load_content_groups) 그룹별 content를 한 번만 임베딩하고,
+      그룹의 FAISS 인덱스 하나를 각 파일의 docstore(metadata만 다름)와 함께 저장합니다.
+    → content 번호별로 파일을 읽고 바로 임베딩/저장하므로 모든 파일을 한꺼번에 메모리에 올리지 않으며,
+      그룹 하나의 읽기/임베딩/저장이 실패해도 나머지 그룹은 계속 생성합니다.
+    → content로 만든 BM25 역색인(bm25.npz)도 그룹당 한 번 생성하여 함께 저장합니다 (하이브리드 검색용).
+    → 시각화용 PCA 투영(pca.npz, 3개 성분 + 전체 문서 좌표)도 그룹당 한 번 학습하여 함께 저장합니다.
+
+    Args:
+        folder_path (str): construct 결과 폴더.
+        engine (EmbeddingEngine): 임베딩 엔진.
+        embedding_function (Embeddings): 저장되는 벡터스토어의 embedding_function.
+        save_folder (str): 벡터스토어 상위 폴더 (예: vdb/openai_small).
+        suffix (str): 벡터스토어 폴더명 접미사 (모델명).
+        index_type (str): FAISS 인덱스 종류 (INDEX_TYPES 중 하나, 기본값 "flat").
+        index_params (dict, optional): DEFAULT_INDEX_PARAMS 중 바꿀 값.
+        metric (str): "l2"(기본값) 또는 "ip"(정규화 벡터 + 내적, 점수 = 코사인 유사도).
+
+    Returns:
+        list[str]: 저장된 벡터스토어 경로 리스트.
+    """
+    # folder_path 내의 모든 construct 결과 파일(.parquet, 없으면 .xlsx) 찾기
+    construct_files = find_construct_files(folder_path)
+    if not construct_files:
+        print("처리할 Parquet/Excel 파일이 없습니다.")
+        return []
+
+    results = []
+    n_groups = 0
+    # content 번호별로 파일을 읽고 → 임베딩 → 저장한 뒤 다음 번호로 넘어감 (한 번에 한 content 번호의 문서만 메모리에 유지)
+    for files in group_construct_files(construct_files):
+        for group in load_content_groups(files):
+            names = ", ".join(os.path.splitext(os.path.basename(file))[0] for file, _ in group["files"])
+            try:
+                results.extend(build_group_vectorstores(
+                    group, engine, embedding_function, save_folder, suffix, index_type, index_params, metric
+                ))
+                n_groups += 1
+            except Exception as e:
+                print(f"🚨 {names} 벡터스토어 생성 실패: {str(e)}")
+    print(f"║   -> content 그룹 {n_groups}개로 벡터스토어 {len(results)}개 생성")
+    return results
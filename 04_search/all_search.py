@@ -1,13 +1,21 @@
 import os
 import io
+import re
+import sys
+import time
 import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 import streamlit as st
 
-from config import load_db_options  # DB 옵션 불러오기 관련 함수
-from vectorsearch import load_vectorstore, search_query_vectorstore  # 벡터스토어 로드 및 검색 함수
-from visualization import create_visualization_2d, create_visualization_3d  # 2D, 3D 시각화 함수
+# 공용 API 클라이언트(common/api_clients.py)를 불러올 수 있도록 경로 추가
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common")
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+from config import load_db_options, list_db_options  # DB 옵션 불러오기 관련 함수
+from vectorsearch import load_store_cached, load_projection_cached, get_store_mtime, search_query_vectorstore, hybrid_search_vectorstore, search_stores_parallel  # 벡터스토어 로드 및 검색 함수
+from visualization import create_visualization_2d, create_visualization_3d, create_neighborhood_visualization, DEFAULT_MAX_POINTS  # 2D, 3D, 쿼리 주변 시각화 함수
 
 # .env 파일 로드 (환경 변수 설정)
 load_dotenv()
@@ -81,17 +89,22 @@ st.write(f"**사용 할 VectorDB Path**: `{vdb_index_path}`")
 st.write(f"임베딩모델 | 임베딩한 내용(content)설명 | metadata구성")
 st.write(f"{base_description}")
 
-# FAISS 벡터스토어 로드 (vectorsearch.py의 load_vectorstore 함수 사용)
-vectorstore = load_vectorstore(vdb_index_path, selected_category)
-
-# 저장소에서 DB 문서와 임베딩 배열 추출
-# 만약 vectorstore.docstore가 InMemoryDocstore라면 내부 _dict를 사용함
-docs = vectorstore.docstore._dict if hasattr(vectorstore.docstore, '_dict') else vectorstore.docstore
-db_texts = [doc.page_content for doc in docs.values()]
-db_embeddings = vectorstore.index.reconstruct_n(0, vectorstore.index.ntotal)
+# FAISS 벡터스토어와 문서 임베딩(메모리 맵), 문서 노름, 시각화 라벨 로드
+# → st.cache_resource로 캐시되어 위젯 조작/rerun/다른 세션에서는 다시 로드하지 않음 (경로+수정시각 기준)
+vectorstore, db_embeddings, db_norms, db_texts = load_store_cached(vdb_index_path, selected_category, get_store_mtime(vdb_index_path))
 
 # 사이드바에 DB 선택 및 계산 방식 설명 출력
 with st.sidebar:
+    # ANN 인덱스(IVF, HNSW)이면 검색 파라미터를 조정할 수 있음
+    # → 캐시된 인덱스는 모든 세션이 공유하므로 인덱스를 바꾸지 않고 검색할 때마다 전달
+    index_config = vectorstore.index_config
+    nprobe = ef_search = None
+    st.header("인덱스 설정")
+    st.write(f"인덱스 종류: `{index_config['index_type']}` / 거리 기준: `{index_config.get('metric', 'l2')}`")
+    if index_config["index_type"] in ("ivf_flat", "ivf_pq"):
+        nprobe = st.number_input("nprobe (탐색할 클러스터 수)", min_value=1, max_value=int(index_config["nlist"]), value=int(index_config["nprobe"]), key="nprobe")
+    elif index_config["index_type"] == "hnsw":
+        ef_search = st.number_input("efSearch (탐색 후보 수)", min_value=1, max_value=4096, value=int(index_config["ef_search"]), key="ef_search")
     st.header("점수 계산 방식 안내")
     st.markdown("""
                 **L2 Distance (Euclidean Distance)**  
@@ -105,12 +118,118 @@ with st.sidebar:
                 **FAISS Score (옵션)**  
                 - `similarity_search_with_score()` 반환값.  
                 - 주로 IndexFlatL2이면 L2 거리(혹은 그 제곱)를 반환 → **범위**: [0, ∞).
+                - 거리 기준이 `ip`(정규화 벡터 + 내적)인 DB는 검색 점수가 곧 코사인 유사도이며,
+                  L2 거리 제곱은 \\(2 - 2\\cos\\) 로 계산합니다.
+                - 검색 결과의 **L2 거리²** 는 두 거리 기준 모두 FAISS와 같은 L2 거리의 제곱입니다.
+                - 여러 DB 비교의 **정규화 L2 거리²** 는 DB마다 벡터 정규화 여부가 달라도 비교할 수 있도록
+                  코사인 유사도로 계산한 \\(2 - 2\\cos\\) (정규화 벡터 사이 L2 거리의 제곱)입니다.
                 ---
                 **시각화**
                 - 각 점은 원본 텍스트의 앞 15글자를 표시합니다.
                 - 2D와 3D를 지원합니다 탭을 바꿔서 확인 하실 수 있습니다.
                 """)
 
+def store_label(store):
+    """
+    비교 표의 열 이름: "임베딩모델 조합번호" (예: upstage_passage 1-1)
+    """
+    match = re.match(r"^(\d+-\d+)", os.path.basename(store["path"]))
+    return f"{store['embedding']} {match.group(1) if match else os.path.basename(store['path'])}"
+
+def diversity_options(key_prefix=""):
+    """
+    결과 다양화 옵션 (MMR, 페이지별 최대 결과 수) 입력 위젯을 출력하고 (mmr_lambda, max_per_page)를 반환합니다.
+    사용하지 않는 옵션은 None입니다.
+    """
+    with st.expander("결과 다양화 (같은 페이지의 비슷한 결과 줄이기)"):
+        use_mmr = st.checkbox("MMR 재정렬", value=False, key=f"{key_prefix}use_mmr",
+                              help="이미 고른 결과와 비슷한 결과의 순위를 낮춥니다.")
+        mmr_lambda = st.slider("MMR λ (1: 관련도만, 0: 다양성만)", min_value=0.0, max_value=1.0, value=0.5, step=0.05,
+                               key=f"{key_prefix}mmr_lambda", disabled=not use_mmr)
+        max_per_page = int(st.number_input("페이지별 최대 결과 수 (0이면 제한 없음)", min_value=0, max_value=100, value=0,
+                                           key=f"{key_prefix}max_per_page"))
+    return (mmr_lambda if use_mmr else None), (max_per_page or None)
+
+def compare_stores():
+    """
+    여러 DB 비교 화면.
+    
+    기능:
+      - 선택한 벡터스토어들을 같은 검색어로 동시에 검색하고(search_stores_parallel),
+        DB별 요약표와 순위별 결과를 나란히 놓은 표, DB별 상세 결과를 출력함.
+      - 쿼리 임베딩은 임베딩모델마다 한 번만 생성함.
+    """
+    st.header("여러 DB 비교")
+    query = st.text_input("검색할 텍스트를 입력하세요:", placeholder="예: 관세", key="compare_query_input")
+    
+    embeddings = st.multiselect("비교할 임베딩모델", options=list(db_options.keys()), default=[selected_category], key="compare_embeddings")
+    candidates = list_db_options(db_options, embeddings)
+    labels = [store_label(store) for store in candidates]
+    selected_labels = st.multiselect("비교할 DB (기본값: 선택한 임베딩모델의 전체 DB)", options=labels, default=labels, key="compare_stores")
+    stores = [store for store, label in zip(candidates, labels) if label in selected_labels]
+    
+    k_col, threshold_col = st.columns(2)
+    with k_col:
+        k = int(st.number_input("DB별 k (결과 수)", min_value=1, max_value=100, value=5, key="compare_k"))
+    with threshold_col:
+        score_threshold = st.number_input("최소 코사인 유사도 (-1이면 제한 없음)", min_value=-1.0, max_value=1.0, value=-1.0, step=0.05, key="compare_threshold")
+    score_threshold = None if score_threshold <= -1.0 else score_threshold
+    hybrid = st.checkbox("하이브리드 검색 (BM25 + 벡터, 순위 융합)", value=True, key="compare_hybrid",
+                         help="BM25 역색인(bm25.npz)이 없는 DB는 벡터 검색만 사용합니다.")
+    mmr_lambda, max_per_page = diversity_options("compare_")
+    
+    # 검색 실행 후 옵션을 바꿔도 결과가 유지되도록 검색어를 세션에 저장
+    if st.button("비교 검색 실행", key="compare_run") and query:
+        st.session_state["active_compare_query"] = query
+    query = st.session_state.get("active_compare_query")
+    if not query or not stores:
+        return
+    
+    start = time.perf_counter()
+    outcomes = search_stores_parallel(query, stores, k=k, score_threshold=score_threshold, hybrid=hybrid,
+                                      mmr_lambda=mmr_lambda, max_per_page=max_per_page)
+    total_elapsed = time.perf_counter() - start
+    
+    st.subheader("비교 결과")
+    st.write(f"**검색 질의:** {query}")
+    st.write(f"**DB {len(outcomes)}개 검색 시간:** {total_elapsed * 1000:.1f}ms (쿼리 임베딩 포함)")
+    
+    # DB별 요약
+    summary = pd.DataFrame([{
+        "DB": store_label(outcome),
+        "설명": outcome["description"],
+        "결과 수": len(outcome["results"]),
+        "최고 코사인 유사도": max((result[1] for result in outcome["results"]), default=np.nan),
+        "평균 코사인 유사도": np.mean([result[1] for result in outcome["results"]]) if outcome["results"] else np.nan,
+        "검색 시간(ms)": outcome["elapsed"] * 1000,
+        "오류": outcome["error"] or "",
+    } for outcome in outcomes])
+    st.dataframe(summary.style.format({"최고 코사인 유사도": "{:.4f}", "평균 코사인 유사도": "{:.4f}", "검색 시간(ms)": "{:.1f}"}))
+    
+    # 순위별 결과를 DB별 열로 나란히 배치 (셀: "코사인 유사도 | 텍스트 앞부분")
+    side_by_side = pd.DataFrame(
+        {
+            store_label(outcome): [f"{cosine:.4f} | {text[:80]}" for _, cosine, text, _ in outcome["results"]] + [""] * (k - len(outcome["results"]))
+            for outcome in outcomes
+        },
+        index=pd.RangeIndex(1, k + 1, name="순위")
+    )
+    st.dataframe(side_by_side)
+    
+    # DB별 상세 결과
+    for outcome in outcomes:
+        with st.expander(f"{store_label(outcome)} | {outcome['description']}"):
+            if outcome["results"]:
+                # l2 DB(원본 벡터)와 ip DB(정규화 벡터)의 L2 거리는 기준이 달라 비교할 수 없으므로
+                # 모든 DB를 코사인 유사도로 계산한 정규화 벡터 사이 L2 거리 제곱(2 - 2·cos)으로 표시
+                df_results = pd.DataFrame(
+                    [(max(2 - 2 * cosine, 0.0), cosine, text, metadata) for _, cosine, text, metadata in outcome["results"]],
+                    columns=["정규화 L2 거리²", "코사인 유사도", "텍스트", "메타데이터"]
+                )
+                st.dataframe(df_results.style.format({"정규화 L2 거리²": "{:.4f}", "코사인 유사도": "{:.4f}"}))
+            else:
+                st.warning(outcome["error"] or "검색 결과가 없습니다.")
+
 # 검색 인터페이스 함수
 def main():
     """
@@ -119,6 +238,7 @@ def main():
     기능:
       - 사용자가 검색어를 입력하면 선택한 벡터스토어에서 검색을 수행하고,
         결과를 DataFrame으로 출력하며 XLSX 다운로드 및 2D/3D 시각화를 제공함.
+      - "여러 DB 비교"를 선택하면 compare_stores() 화면을 출력함.
     
     Input:
       - 검색할 텍스트 (Streamlit 텍스트 입력)
@@ -126,20 +246,80 @@ def main():
     Output:
       - 화면에 검색 결과, XLSX 다운로드 버튼, 2D/3D 시각화 탭 등을 제공함.
     """
+    view = st.radio("검색 화면", options=["단일 DB 검색", "여러 DB 비교"], horizontal=True, key="search_view")
+    if view == "여러 DB 비교":
+        compare_stores()
+        return
+    
     st.header("검색")
     query = st.text_input("검색할 텍스트를 입력하세요:", placeholder="예: 관세", key="query")
     
+    # 검색 모드: 상위 k개(기본) 또는 전체 문서를 페이지 단위로 보기
+    mode_col, k_col, threshold_col = st.columns(3)
+    with mode_col:
+        search_mode = st.radio("검색 모드", options=["상위 k개", "전체 보기(페이지)"], horizontal=True, key="search_mode")
+    with k_col:
+        if search_mode == "상위 k개":
+            k = int(st.number_input("k (결과 수)", min_value=1, max_value=max(1, vectorstore.index.ntotal), value=min(10, max(1, vectorstore.index.ntotal)), key="top_k"))
+        else:
+            k = int(st.number_input("페이지 크기", min_value=1, max_value=1000, value=50, key="page_size"))
+    with threshold_col:
+        score_threshold = st.number_input("최소 코사인 유사도 (-1이면 제한 없음)", min_value=-1.0, max_value=1.0, value=-1.0, step=0.05, key="score_threshold")
+    score_threshold = None if score_threshold <= -1.0 else score_threshold
+    
+    # 하이브리드 검색: 증권번호/조항 번호/금액처럼 정확히 일치해야 하는 질의를 BM25로 보완
+    has_lexical_index = vectorstore.lexical_index is not None
+    hybrid = st.checkbox(
+        "하이브리드 검색 (BM25 + 벡터, 순위 융합)", value=has_lexical_index, disabled=not has_lexical_index, key="hybrid",
+        help="벡터 검색과 BM25(문자 2-gram / 영숫자 토큰) 검색 순위를 RRF로 합칩니다. "
+             "BM25 역색인(bm25.npz)은 03_embedding에서 벡터스토어와 함께 생성됩니다."
+    )
+    mmr_lambda, max_per_page = diversity_options()
+    diversify = mmr_lambda is not None or max_per_page is not None
+    
+    offset = 0
+    if search_mode == "전체 보기(페이지)":
+        n_pages = max(1, -(-vectorstore.index.ntotal // k))
+        page = int(st.number_input(f"페이지 (전체 {n_pages}페이지)", min_value=1, max_value=n_pages, value=1, key="page"))
+        offset = (page - 1) * k
+    
+    # 검색 실행 후 페이지/옵션을 바꿔도 결과가 유지되도록 검색어를 세션에 저장
     if st.button("검색 실행") and query:
-        # 벡터 검색 수행
-        results, query_vector = search_query_vectorstore(query, selected_category, vectorstore, db_embeddings)
+        st.session_state["active_query"] = query
+    active_query = st.session_state.get("active_query")
+    
+    if active_query:
+        query = active_query
+        # 벡터 검색 또는 하이브리드 검색 수행
+        if hybrid:
+            results, query_vector = hybrid_search_vectorstore(
+                query, selected_category, vectorstore, db_embeddings, db_norms,
+                k=k, score_threshold=score_threshold, offset=offset,
+                mmr_lambda=mmr_lambda, max_per_page=max_per_page, nprobe=nprobe, ef_search=ef_search
+            )
+        else:
+            results, query_vector = search_query_vectorstore(
+                query, selected_category, vectorstore, db_norms,
+                k=k, score_threshold=score_threshold, offset=offset,
+                db_embeddings=db_embeddings, mmr_lambda=mmr_lambda, max_per_page=max_per_page,
+                nprobe=nprobe, ef_search=ef_search
+            )
         if results:
-            # 결과를 DataFrame으로 구성 (컬럼 순서: L2 거리, 코사인 유사도, 텍스트, 메타데이터)
-            df_results = pd.DataFrame(results, columns=["L2 거리", "코사인 유사도", "텍스트", "메타데이터"])
-            df_results = df_results.sort_values(by="코사인 유사도", ascending=False)
+            # 결과를 DataFrame으로 구성 (컬럼 순서: L2 거리 제곱, 코사인 유사도, 텍스트, 메타데이터)
+            # 하이브리드 검색/결과 다양화는 재정렬된 순위를 그대로 보여주고, 벡터 검색은 코사인 유사도순으로 정렬
+            # → 전체 보기(페이지)는 offset이 검색 순위 기준이므로 다시 정렬하지 않고, 행 번호를 전체 순위로 표시
+            df_results = pd.DataFrame(results, columns=["L2 거리²", "코사인 유사도", "텍스트", "메타데이터"])
+            if search_mode == "전체 보기(페이지)":
+                df_results.index = range(offset + 1, offset + 1 + len(df_results))
+            elif not hybrid and not diversify:
+                df_results = df_results.sort_values(by="코사인 유사도", ascending=False)
             st.subheader("검색 결과")
             st.write(f"**검색 질의:** {query}")
-            st.write(f"**검색 결과:** 전체 {vectorstore.index.ntotal}개 중 {len(results)}개")
-            st.dataframe(df_results.style.format({"L2 거리": "{:.4f}", "코사인 유사도": "{:.4f}"}))
+            if search_mode == "전체 보기(페이지)":
+                st.write(f"**검색 결과:** 전체 {vectorstore.index.ntotal}개 중 {offset + 1}~{offset + len(results)}번째 (순위 기준)")
+            else:
+                st.write(f"**검색 결과:** 전체 {vectorstore.index.ntotal}개 중 상위 {len(results)}개")
+            st.dataframe(df_results.style.format({"L2 거리²": "{:.4f}", "코사인 유사도": "{:.4f}"}))
             
             # XLSX 다운로드 기능
             import io
@@ -158,13 +338,30 @@ def main():
             )
             
             # 2D, 3D 시각화 탭 추가
-            tab2d, tab3d = st.tabs(["2D 시각화", "3D 시각화"])
+            # PCA 투영은 벡터스토어마다 한 번만 준비 (3개 성분 하나로 2D/3D 모두 사용)
+            # 문서가 많으면 최대 점 수만큼 층화 표본만 그리고, 검색 결과와 쿼리는 항상 표시
+            projection = load_projection_cached(vdb_index_path, selected_category, get_store_mtime(vdb_index_path))
+            max_points = int(st.number_input(
+                "시각화 최대 점 수", min_value=100, max_value=200000, value=DEFAULT_MAX_POINTS, step=1000, key="max_points",
+                help="전체 문서 수가 이보다 많으면 PCA 좌표 분포를 유지하도록 층화 표본을 뽑아 표시합니다."
+            ))
+            hit_indices = results.indices
+            query_embedding = query_vector.reshape(1, -1)
+            tab2d, tab3d, tab_neighborhood = st.tabs(["2D 시각화", "3D 시각화", "쿼리 주변"])
             with tab2d:
-                fig2d = create_visualization_2d(db_embeddings, db_texts, query_embedding=query_vector.reshape(1, -1), query_text=query)
+                fig2d = create_visualization_2d(projection, db_texts, query_embedding=query_embedding, query_text=query,
+                                                hit_indices=hit_indices, max_points=max_points)
                 st.plotly_chart(fig2d, use_container_width=True)
             with tab3d:
-                fig3d = create_visualization_3d(db_embeddings, db_texts, query_embedding=query_vector.reshape(1, -1), query_text=query)
+                fig3d = create_visualization_3d(projection, db_texts, query_embedding=query_embedding, query_text=query,
+                                                hit_indices=hit_indices, max_points=max_points)
                 st.plotly_chart(fig3d, use_container_width=True)
+            with tab_neighborhood:
+                # 검색 결과와 쿼리만으로 PCA를 다시 학습하여 결과 사이의 거리를 확대해서 보여줌
+                fig_neighborhood = create_neighborhood_visualization(
+                    db_embeddings[hit_indices], [db_texts[i] for i in hit_indices], query_embedding, query
+                )
+                st.plotly_chart(fig_neighborhood, use_container_width=True)
         else:
             st.warning("검색 결과가 없습니다.")
 
@@ -13,13 +13,37 @@ def load_db_options(filepath="db_options.json"):
     with open(filepath, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def list_db_options(db_options, embeddings=None):
+    """
+    중첩된 DB 옵션(임베딩모델 → content 구성 → metadata 구성)을 벡터스토어 목록으로 펼칩니다.
+    
+    Parameters:
+        db_options (dict): load_db_options()의 반환값.
+        embeddings (list, optional): 포함할 임베딩모델 목록 (None이면 전체).
+    
+    Returns:
+        list[dict]: {"embedding", "content", "metadata", "path", "description"} 리스트 (db_options.json 순서).
+    """
+    stores = []
+    for embedding, contents in db_options.items():
+        if embeddings is not None and embedding not in embeddings:
+            continue
+        for content, descriptions in contents.items():
+            for metadata, info in descriptions.items():
+                stores.append({
+                    "embedding": embedding, "content": content, "metadata": metadata,
+                    "path": info["path"], "description": info["description"]
+                })
+    return stores
+
 def get_document(docstore, doc_id):
     """
     docstore에서 주어진 doc_id에 해당하는 문서를 반환합니다.
     만약 docstore가 InMemoryDocstore라면 내부 _dict를 사용하여 문서를 찾습니다.
+    SqliteDocstore는 해당 문서 한 건만 조회합니다.
     
     Parameters:
-        docstore: 문서를 저장하는 객체 (딕셔너리 또는 InMemoryDocstore).
+        docstore: 문서를 저장하는 객체 (딕셔너리, InMemoryDocstore 또는 SqliteDocstore).
         doc_id: 반환할 문서의 식별자.
     
     Returns:
@@ -29,3 +53,36 @@ def get_document(docstore, doc_id):
         return docstore._dict[doc_id]
     else:
         return docstore[doc_id]
+
+def get_documents(docstore, doc_ids):
+    """
+    docstore에서 여러 doc_id의 문서를 doc_ids 순서대로 반환합니다.
+    SqliteDocstore는 한 번의 쿼리로 조회합니다.
+    
+    Parameters:
+        docstore: 문서를 저장하는 객체 (딕셔너리, InMemoryDocstore 또는 SqliteDocstore).
+        doc_ids (list): 반환할 문서의 식별자 리스트.
+    
+    Returns:
+        list: doc_ids 순서의 문서 객체 리스트.
+    """
+    if hasattr(docstore, 'mget'):
+        return docstore.mget(doc_ids)
+    return [get_document(docstore, doc_id) for doc_id in doc_ids]
+
+def get_document_labels(docstore, index_to_docstore_id, n_chars=15):
+    """
+    FAISS 인덱스 순서대로 각 문서 텍스트의 앞 n_chars 글자를 반환합니다 (시각화 라벨용).
+    SqliteDocstore는 문서 전체를 읽지 않고 앞부분만 조회합니다.
+    
+    Parameters:
+        docstore: 문서를 저장하는 객체.
+        index_to_docstore_id: FAISS 인덱스 번호 → doc_id 매핑.
+        n_chars (int): 라벨 글자 수 (기본값: 15).
+    
+    Returns:
+        list[str]: 인덱스 순서의 라벨 리스트.
+    """
+    if hasattr(docstore, 'labels'):
+        return docstore.labels(n_chars)
+    return [get_document(docstore, index_to_docstore_id[i]).page_content[:n_chars] for i in range(len(index_to_docstore_id))]
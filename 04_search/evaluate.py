@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# 임베딩 엔진/캐시(03_embedding)와 공용 API 클라이언트(common)를 불러올 수 있도록 경로 추가
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in [os.path.join(ROOT_DIR, "03_embedding"), os.path.join(ROOT_DIR, "common")]:
+    if path not in sys.path:
+        sys.path.append(path)
+
+from embedding_engine import create_engine
+from embedding_cache import EmbeddingCache, text_key
+from config import load_db_options, list_db_options, get_documents
+from vectorsearch import load_vectorstore, make_search_params, fuse_rankings, HYBRID_CANDIDATES
+
+# db_options.json의 임베딩모델 → (임베딩 엔진 공급자, 모델명)
+# → 검색 화면(custom_embeddings.py)과 같은 모델로 쿼리를 임베딩합니다.
+EMBEDDING_MODELS = {
+    "upstage_passage": ("upstage", "embedding-passage"),
+    "openai_small": ("openai", "text-embedding-3-small"),
+}
+LATENCY_PERCENTILES = (50, 95, 99)
+
+def parse_targets(value):
+    """
+    정답 칸 값("12", "12;15", 12, NaN)을 정수 집합으로 변환합니다.
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return set()
+    return {int(float(part)) for part in str(value).replace(",", ";").split(";") if part.strip()}
+
+def load_eval_queries(filepath):
+    """
+    평가 질의 파일(.csv, .xlsx, .jsonl)을 읽습니다.
+    → query 열은 필수, elementid / page 열 중 하나 이상에 정답을 적습니다 (여러 개는 ";"로 구분).
+    → filename 열이 있으면 해당 파일의 문서만 정답으로 인정합니다.
+
+    Returns:
+        list[dict]: {"query", "elementid": set, "page": set, "filename": str 또는 None} 리스트
+    """
+    if filepath.lower().endswith(".xlsx"):
+        df = pd.read_excel(filepath)
+    elif filepath.lower().endswith(".jsonl"):
+        df = pd.read_json(filepath, lines=True)
+    else:
+        df = pd.read_csv(filepath)
+    if "query" not in df.columns:
+        raise ValueError(f"평가 파일에 query 열이 없습니다: {filepath}")
+
+    queries = []
+    for row in df.to_dict("records"):
+        filename = row.get("filename")
+        item = {
+            "query": str(row["query"]),
+            "elementid": parse_targets(row.get("elementid")),
+            "page": parse_targets(row.get("page")),
+            "filename": filename if isinstance(filename, str) and filename else None,
+        }
+        if not item["elementid"] and not item["page"]:
+            print(f"║ 정답(elementid/page)이 없어 제외: {item['query']}")
+            continue
+        queries.append(item)
+    return queries
+
+def embed_queries(queries, embedding, offline=False):
+    """
+    쿼리들을 한 번에 임베딩합니다 (EmbeddingEngine 배치 요청 + 임베딩 캐시).
+    → offline=True면 API를 호출하지 않고 캐시에 있는 벡터만 사용하며, 없는 쿼리가 있으면 오류를 냅니다.
+
+    Returns:
+        np.ndarray: (len(queries), dim) float32
+    """
+    provider, model = EMBEDDING_MODELS[embedding]
+    texts = [item["query"] for item in queries]
+    if offline:
+        keys = [text_key(text) for text in texts]
+        cached = EmbeddingCache(model).get_many(keys)
+        missing = [text for text, key in zip(texts, keys) if key not in cached]
+        if missing:
+            raise RuntimeError(
+                f"{model} 캐시에 없는 쿼리 {len(missing)}개 (예: {missing[0]!r}). "
+                "--offline 없이 한 번 실행하여 캐시를 채우세요."
+            )
+        return np.array([cached[key] for key in keys], dtype=np.float32)
+    engine = create_engine(provider, model)
+    return np.array(engine.embed_texts(texts), dtype=np.float32)
+
+def is_relevant(metadata, item):
+    """
+    검색된 문서의 metadata가 질의의 정답(elementid / page)을 포함하면 포함된 정답 목록을 반환합니다.
+    """
+    if item["filename"] and metadata.get("filename") != item["filename"]:
+        return set()
+    found = {("elementid", value) for value in item["elementid"] if value in (metadata.get("elementid") or [])}
+    found |= {("page", value) for value in item["page"] if value in (metadata.get("page") or [])}
+    return found
+
+def score_ranking(hit_metadatas, item, k):
+    """
+    한 질의의 검색 결과(순위순 metadata 리스트)로 recall@k, reciprocal rank, nDCG@k를 계산합니다.
+    → recall@k: 정답(elementid/page 값) 중 상위 k개 안에서 찾은 비율
+    → reciprocal rank: 처음 정답을 포함한 결과 순위의 역수 (없으면 0)
+    → nDCG@k: 새 정답을 처음 포함한 결과만 이득 1로 계산 (이상적 순위는 정답 수만큼 앞에서부터)
+    """
+    targets = {("elementid", value) for value in item["elementid"]} | {("page", value) for value in item["page"]}
+    seen = set()
+    reciprocal_rank = 0.0
+    dcg = 0.0
+    for rank, metadata in enumerate(hit_metadatas[:k], start=1):
+        found = is_relevant(metadata, item)
+        if found and reciprocal_rank == 0.0:
+            reciprocal_rank = 1.0 / rank
+        if found - seen:
+            dcg += 1.0 / np.log2(rank + 1)
+        seen |= found
+    idcg = sum(1.0 / np.log2(rank + 1) for rank in range(1, min(k, len(targets)) + 1))
+    return len(seen) / len(targets), reciprocal_rank, dcg / idcg if idcg else 0.0
+
+def evaluate_store(store, queries, query_vectors, k=10, nprobe=None, ef_search=None, hybrid=False):
+    """
+    벡터스토어 하나에서 모든 질의를 한 건씩 검색하여 평균 지표와 검색 지연 시간 백분위를 계산합니다.
+    → 지연 시간은 쿼리 임베딩을 제외한 FAISS 검색 + 문서 조회 시간입니다 (검색 화면과 같은 경로).
+    → hybrid=True면 BM25 검색 + 순위 융합(RRF)까지 포함합니다 (bm25.npz가 없는 벡터스토어는 벡터 검색만).
+    """
+    vectorstore = load_vectorstore(store["path"], store["embedding"])
+    search_params = make_search_params(vectorstore.index, nprobe=nprobe, ef_search=ef_search)
+    vectors = np.ascontiguousarray(query_vectors, dtype=np.float32)
+    if vectorstore.index_config.get("metric") == "ip":
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    lexical_index = vectorstore.lexical_index if hybrid else None
+    n_search = min(max(k, HYBRID_CANDIDATES) if lexical_index else k, vectorstore.index.ntotal)
+
+    recalls, reciprocal_ranks, ndcgs, latencies = [], [], [], []
+    for item, vector in zip(queries, vectors):
+        start = time.perf_counter()
+        _, indices = vectorstore.index.search(vector.reshape(1, -1), n_search, params=search_params)
+        indices = [idx for idx in indices[0] if idx >= 0]
+        if lexical_index is not None:
+            indices = fuse_rankings([indices, lexical_index.search(item["query"], n_search)[0]])[:k]
+        docs = get_documents(vectorstore.docstore, [vectorstore.index_to_docstore_id[idx] for idx in indices])
+        latencies.append((time.perf_counter() - start) * 1000)
+        recall, reciprocal_rank, ndcg = score_ranking([doc.metadata for doc in docs], item, k)
+        recalls.append(recall)
+        reciprocal_ranks.append(reciprocal_rank)
+        ndcgs.append(ndcg)
+
+    row = {
+        "임베딩모델": store["embedding"],
+        "DB": os.path.basename(store["path"]),
+        "인덱스": vectorstore.index_config.get("index_type", "flat") + ("+bm25" if lexical_index else ""),
+        "질의 수": len(queries),
+        f"recall@{k}": float(np.mean(recalls)),
+        "MRR": float(np.mean(reciprocal_ranks)),
+        f"nDCG@{k}": float(np.mean(ndcgs)),
+    }
+    for percentile, value in zip(LATENCY_PERCENTILES, np.percentile(latencies, LATENCY_PERCENTILES)):
+        row[f"p{percentile}(ms)"] = float(value)
+    return row
+
+def evaluate(queries_path, db_options_path="04_search/db_options.json", k=10, embeddings=None,
+             offline=False, nprobe=None, ef_search=None, hybrid=False):
+    """
+    db_options.json의 모든(또는 embeddings로 지정한 임베딩모델의) 벡터스토어를 평가 질의로 검색하여
+    벡터스토어별 recall@k / MRR / nDCG@k / 검색 지연 시간(p50, p95, p99)을 반환합니다.
+    쿼리는 임베딩모델마다 한 번에 임베딩하며, offline=True면 캐시된 쿼리 임베딩만 사용합니다.
+    hybrid=True면 벡터 검색과 BM25 검색을 순위 융합한 결과를 평가합니다.
+
+    Returns:
+        pd.DataFrame: 벡터스토어별 평가 결과 (db_options.json 순서)
+    """
+    queries = load_eval_queries(queries_path)
+    stores = [store for store in list_db_options(load_db_options(db_options_path), embeddings) if os.path.isdir(store["path"])]
+    print("╔════════════════════════════════════════")
+    print(f"║ 평가 질의 {len(queries)}개, 벡터스토어 {len(stores)}개, k={k}")
+    rows = []
+    for embedding in dict.fromkeys(store["embedding"] for store in stores):
+        query_vectors = embed_queries(queries, embedding, offline=offline)
+        for store in stores:
+            if store["embedding"] != embedding:
+                continue
+            row = evaluate_store(store, queries, query_vectors, k=k, nprobe=nprobe, ef_search=ef_search, hybrid=hybrid)
+            print(f"║   -> {row['임베딩모델']} {row['DB']:<50} recall@{k} {row[f'recall@{k}']:.3f}  "
+                  f"MRR {row['MRR']:.3f}  nDCG@{k} {row[f'nDCG@{k}']:.3f}  "
+                  f"p50 {row['p50(ms)']:.2f}ms  p95 {row['p95(ms)']:.2f}ms  p99 {row['p99(ms)']:.2f}ms")
+            rows.append(row)
+    print("╚════════════════════════════════════════\n")
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="평가 질의(query, elementid/page)로 벡터스토어별 검색 품질과 지연 시간을 측정")
+    parser.add_argument("queries", help="평가 질의 파일 (.csv, .xlsx, .jsonl: query, elementid, page, filename 열)")
+    parser.add_argument("--db-options", default="04_search/db_options.json", help="db_options.json 경로")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--embedding", action="append", default=None, choices=list(EMBEDDING_MODELS),
+                        help="평가할 임베딩모델 (여러 번 지정 가능, 없으면 전체)")
+    parser.add_argument("--offline", action="store_true", help="API를 호출하지 않고 캐시된 쿼리 임베딩만 사용")
+    parser.add_argument("--nprobe", type=int, default=None, help="IVF 인덱스 nprobe (없으면 저장된 값)")
+    parser.add_argument("--ef-search", type=int, default=None, help="HNSW 인덱스 efSearch (없으면 저장된 값)")
+    parser.add_argument("--hybrid", action="store_true", help="벡터 + BM25 하이브리드 검색(RRF)으로 평가")
+    parser.add_argument("--output", default=None, help="결과 저장 경로 (.csv, .xlsx, .json)")
+    args = parser.parse_args()
+
+    results = evaluate(args.queries, args.db_options, k=args.k, embeddings=args.embedding,
+                       offline=args.offline, nprobe=args.nprobe, ef_search=args.ef_search, hybrid=args.hybrid)
+    if args.output:
+        if args.output.lower().endswith(".xlsx"):
+            results.to_excel(args.output, index=False)
+        elif args.output.lower().endswith(".json"):
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results.to_dict("records"), f, ensure_ascii=False, indent=2)
+        else:
+            results.to_csv(args.output, index=False, encoding="utf-8-sig")
+        print(f"평가 결과 저장 완료: {args.output}")
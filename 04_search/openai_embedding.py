@@ -1,8 +1,14 @@
 # openai_embedding.py
 import os
-from dotenv import load_dotenv
+import sys
 import numpy as np
-from langchain_openai.embeddings import OpenAIEmbeddings
+
+# 공용 API 클라이언트(common/api_clients.py)를 불러올 수 있도록 경로 추가
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common")
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+from api_clients import get_client
 
 def get_openai_embedding(query: str, model: str):
     """
@@ -10,26 +16,18 @@ def get_openai_embedding(query: str, model: str):
 
     Parameters:
         query (str): 임베딩할 텍스트.
-        openai_api_key (str): OpenAI API 키.
+        model (str): 모델 크기 ("small" → text-embedding-3-small).
 
     Returns:
         np.ndarray: query의 임베딩 결과를 넘파이 배열로 반환.
     """
-    
-    load_dotenv()
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-        
-    if not openai_api_key:
-        raise ValueError("OPENAI_API_KEY 환경변수가 설정되어 있지 않습니다.")
-    
-    embedding_model = OpenAIEmbeddings(
+    # 공용 OpenAI 클라이언트 재사용 (keep-alive 커넥션 풀, 키가 없으면 ValueError)
+    client = get_client("openai")
+    response = client.embeddings.create(
         model=f"text-embedding-3-{model}",
-        openai_api_key=openai_api_key
+        input=[query]
     )
-    
-    # 임베딩 결과는 리스트 형태이므로 첫 번째(유일한) 값을 선택 후 numpy 배열로 변환
-    embedding = embedding_model.embed_documents([query])[0]
-    return np.array(embedding)
+    return np.array(response.data[0].embedding)
 
 
 if __name__ == "__main__":
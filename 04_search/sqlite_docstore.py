@@ -0,0 +1,105 @@
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping
+from langchain_community.docstore.base import Docstore
+from langchain.schema import Document
+
+# 03_embedding/vectorstore_builder.py 가 저장하는 형식
+# documents(row INTEGER PRIMARY KEY = FAISS 인덱스 번호, doc_id TEXT, page_content TEXT, metadata TEXT(JSON))
+DOCSTORE_FILENAME = "docstore.sqlite"
+
+class SqliteDocstore(Docstore):
+    """
+    docstore.sqlite 에서 필요한 문서만 읽어오는 docstore
+    → 로드 시 문서를 읽지 않고, 검색 결과(hit)의 문서만 조회하여 Document로 변환합니다.
+    → 읽기 전용으로 열며, Streamlit 스레드마다 별도 연결을 사용합니다.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._count = None
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_document(page_content, metadata):
+        return Document(page_content=page_content, metadata=json.loads(metadata) if metadata else {})
+
+    def __len__(self):
+        if self._count is None:
+            self._count = self._connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return self._count
+
+    def __getitem__(self, doc_id: str) -> Document:
+        row = self._connection().execute(
+            "SELECT page_content, metadata FROM documents WHERE doc_id = ?", (doc_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(doc_id)
+        return self._to_document(*row)
+
+    def search(self, search: str):
+        """
+        langchain Docstore 인터페이스: doc_id의 Document, 없으면 안내 문자열
+        """
+        try:
+            return self[search]
+        except KeyError:
+            return f"ID {search} not found."
+
+    def add(self, texts):
+        """읽기 전용 docstore이므로 문서를 추가하지 않고 PermissionError를 발생시킵니다."""
+        raise PermissionError("read-only docstore: SqliteDocstore에는 문서를 추가할 수 없습니다 (03_embedding에서 벡터스토어를 다시 생성하세요).")
+
+    def delete(self, ids):
+        """읽기 전용 docstore이므로 문서를 삭제하지 않고 PermissionError를 발생시킵니다."""
+        raise PermissionError("read-only docstore: SqliteDocstore의 문서는 삭제할 수 없습니다 (03_embedding에서 벡터스토어를 다시 생성하세요).")
+
+    def mget(self, doc_ids) -> list:
+        """
+        여러 doc_id의 Document를 한 번의 쿼리로 읽어 doc_ids 순서대로 반환합니다.
+        """
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return []
+        placeholders = ",".join("?" * len(doc_ids))
+        rows = self._connection().execute(
+            f"SELECT doc_id, page_content, metadata FROM documents WHERE doc_id IN ({placeholders})", doc_ids
+        ).fetchall()
+        found = {doc_id: self._to_document(page_content, metadata) for doc_id, page_content, metadata in rows}
+        return [found[doc_id] for doc_id in doc_ids]
+
+    def labels(self, n_chars: int = 15) -> list:
+        """
+        FAISS 인덱스 순서대로 각 문서 page_content의 앞 n_chars 글자를 반환합니다 (시각화 라벨용).
+        """
+        rows = self._connection().execute(
+            "SELECT substr(page_content, 1, ?) FROM documents ORDER BY row", (n_chars,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+class RowIdMapping(Mapping):
+    """
+    FAISS 인덱스 번호 → doc_id 매핑 (docstore.sqlite의 doc_id는 인덱스 번호 문자열)
+    index_to_docstore_id 딕셔너리를 만들지 않고 같은 역할을 합니다.
+    """
+    def __init__(self, count: int):
+        self.count = count
+
+    def __getitem__(self, idx):
+        idx = int(idx)
+        if not 0 <= idx < self.count:
+            raise KeyError(idx)
+        return str(idx)
+
+    def __iter__(self):
+        return iter(range(self.count))
+
+    def __len__(self):
+        return self.count
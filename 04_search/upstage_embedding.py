@@ -1,6 +1,12 @@
 import os
-from dotenv import load_dotenv
-from openai import OpenAI  # pip install openai (openai==1.52.2)
+import sys
+
+# 공용 API 클라이언트(common/api_clients.py)를 불러올 수 있도록 경로 추가
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common")
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+from api_clients import get_client
 
 def get_upstage_embedding(text, model):
     """
@@ -14,16 +20,8 @@ def get_upstage_embedding(text, model):
     반환값:
         임베딩 벡터 (list[float]) 또는 임베딩 생성 실패 시 None.
     """
-    load_dotenv()  # .env 파일 로드
-    
-    api_key = os.getenv("UPSTAGE_API_KEY")
-    if not api_key:
-        raise ValueError("ERROR: UPSTAGE_API_KEY가 .env 파일에 설정되어 있지 않습니다.")
-    
-    # 모델 파라미터에 따른 실제 모델 이름 매핑
-    
-    # Upstage API 클라이언트 초기화 (base_url은 제공된 코드 기준 사용)
-    client = OpenAI(api_key=api_key, base_url="https://api.upstage.ai/v1/solar")
+    # 공용 Upstage 클라이언트 재사용 (keep-alive 커넥션 풀, 키가 없으면 ValueError)
+    client = get_client("upstage")
     
     try:
         response = client.embeddings.create(
@@ -1,15 +1,121 @@
+import os
+import sys
+import json
+import time
+import pickle
+import threading
+import faiss
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 import streamlit as st
-from config import get_document
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from config import get_documents, get_document_labels
+from sqlite_docstore import SqliteDocstore, RowIdMapping, DOCSTORE_FILENAME
 from custom_embeddings import CustomEmbeddings
 
+# 공용 모듈(common/lexical_index.py, pca_projection.py)을 불러올 수 있도록 경로 추가
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common")
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+from lexical_index import load_lexical_index
+from pca_projection import PCA_FILENAME, fit_projection, load_projection, save_projection
+
+INDEX_CONFIG_FILENAME = "index_config.json"
+VECTORS_FILENAME = "vectors.npy"
+STORE_CACHE_SIZE = 22        # 메모리에 유지할 벡터스토어 수 (db_options.json의 전체 DB 수)
+QUERY_CACHE_SIZE = 1024      # 메모리에 유지할 쿼리 임베딩 수
+MAX_SEARCH_WORKERS = 8       # 여러 DB 비교 검색에 사용할 최대 스레드 수
+RRF_K = 60                   # 하이브리드 검색 순위 융합(RRF) 상수
+HYBRID_CANDIDATES = 100      # 하이브리드 검색에서 벡터/BM25 각각 가져올 최소 후보 수
+DIVERSITY_FETCH_K = 50       # MMR / 페이지별 제한 재정렬에 사용할 최소 후보 수
+
+# BM25 검색은 쿼리 임베딩(API 호출)을 기다리는 동안 이 스레드 풀에서 실행
+_lexical_executor = ThreadPoolExecutor(max_workers=4)
+
+def load_index_config(vdb_index_path: str) -> dict:
+    """
+    벡터스토어 폴더의 index_config.json(03_embedding에서 저장한 인덱스 종류/검색 파라미터)을 읽습니다.
+    파일이 없는 이전 벡터스토어는 flat(IndexFlatL2)으로 간주합니다.
+    
+    Args:
+        vdb_index_path (str): FAISS 벡터스토어가 저장된 폴더 경로.
+    
+    Returns:
+        dict: 인덱스 설정 (index_type, metric, nprobe, ef_search 등).
+    """
+    config_path = os.path.join(vdb_index_path, INDEX_CONFIG_FILENAME)
+    if not os.path.exists(config_path):
+        return {"index_type": "flat", "metric": "l2"}
+    with open(config_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def set_search_params(index, nprobe: int = None, ef_search: int = None):
+    """
+    인덱스의 기본 ANN 파라미터를 설정합니다. 해당하지 않는 인덱스 종류에서는 무시됩니다.
+    → 인덱스 객체 자체를 바꾸므로 로드 직후(공유되기 전)에만 사용합니다.
+      캐시되어 여러 세션/스레드가 공유하는 인덱스는 make_search_params로 검색마다 파라미터를 전달합니다.
+    
+    Args:
+        index: FAISS 인덱스.
+        nprobe (int, optional): IVF 계열에서 탐색할 클러스터 수.
+        ef_search (int, optional): HNSW 탐색 후보 수.
+    """
+    if nprobe is not None:
+        try:
+            ivf = faiss.extract_index_ivf(index)
+            ivf.nprobe = min(int(nprobe), ivf.nlist)
+        except RuntimeError:
+            pass
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = int(ef_search)
+
+def make_search_params(index, nprobe: int = None, ef_search: int = None):
+    """
+    검색 한 번에만 적용할 ANN 파라미터를 만듭니다 (index.search(..., params=...)로 전달).
+    → 인덱스의 nprobe / efSearch를 바꾸지 않으므로 같은 인덱스를 동시에 검색하는 세션/스레드끼리 영향이 없습니다.
+    
+    Returns:
+        faiss.SearchParametersIVF / faiss.SearchParametersHNSW, 해당하는 값이 없으면 None (저장된 기본값 사용).
+    """
+    if nprobe is not None:
+        try:
+            ivf = faiss.extract_index_ivf(index)
+        except RuntimeError:
+            ivf = None
+        if ivf is not None:
+            return faiss.SearchParametersIVF(nprobe=min(int(nprobe), ivf.nlist))
+    if ef_search is not None and hasattr(index, "hnsw"):
+        return faiss.SearchParametersHNSW(efSearch=int(ef_search))
+    return None
+
+def read_index_mmap(index_path: str):
+    """
+    FAISS 인덱스 파일을 읽기 전용 메모리 맵으로 엽니다.
+    → IO_FLAG_MMAP_IFC(in-place)로 열어 flat 벡터/역리스트를 파일 매핑에서 바로 참조합니다.
+      벡터 데이터는 RAM(익명 메모리)으로 복사되지 않고 OS 페이지 캐시를 통해 모든 세션/프로세스가 공유합니다.
+      (IO_FLAG_MMAP은 flat 인덱스의 벡터를 익명 메모리로 복사하므로 사용하지 않음)
+    → IO_FLAG_MMAP_IFC가 없는 이전 버전은 IO_FLAG_MMAP, 메모리 맵을 지원하지 않는 인덱스면 일반 읽기로 대체합니다.
+    """
+    for flag_name in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP"):
+        try:
+            return faiss.read_index(index_path, getattr(faiss, flag_name) | faiss.IO_FLAG_READ_ONLY)
+        except (RuntimeError, AttributeError):
+            continue
+    return faiss.read_index(index_path)
+
 def load_vectorstore(vdb_index_path: str, selected_embedding: str):
     """
     주어진 벡터스토어 경로와 선택된 임베딩 모델에 따라 FAISS 벡터스토어를 로드합니다.
     
     임베딩은 CustomEmbeddings 객체를 사용합니다.
+    index.faiss는 읽기 전용 메모리 맵으로 열고(read_index_mmap), docstore.sqlite가 있으면 문서를 미리 읽지 않는
+    SqliteDocstore를 사용합니다 (검색 결과 문서만 조회). 없으면(이전 형식) index.pkl을 읽습니다.
+    index_config.json에 저장된 인덱스 종류에 맞춰 검색 파라미터(nprobe, efSearch)를 설정하며,
+    설정은 vectorstore.index_config, 경로는 vectorstore.vdb_index_path로 확인할 수 있습니다.
     
     Args:
         vdb_index_path (str): FAISS 벡터스토어가 저장된 폴더 경로.
@@ -19,45 +125,487 @@ def load_vectorstore(vdb_index_path: str, selected_embedding: str):
         FAISS: 로드된 FAISS 벡터스토어 객체.
     """
     embedding_obj = CustomEmbeddings(selected_embedding)
-    return FAISS.load_local(
-         folder_path=vdb_index_path,
-         embeddings=embedding_obj,
-         allow_dangerous_deserialization=True
+    index_config = load_index_config(vdb_index_path)
+    index = read_index_mmap(os.path.join(vdb_index_path, "index.faiss"))
+    sqlite_path = os.path.join(vdb_index_path, DOCSTORE_FILENAME)
+    if os.path.exists(sqlite_path):
+        docstore = SqliteDocstore(sqlite_path)
+        index_to_docstore_id = RowIdMapping(index.ntotal)
+    else:
+        with open(os.path.join(vdb_index_path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+    
+    # 내적(ip) 인덱스는 정규화된 벡터로 저장되어 있으므로 langchain 검색도 같은 기준을 사용
+    is_ip = index_config.get("metric") == "ip"
+    vectorstore = FAISS(
+        embedding_function=embedding_obj,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT if is_ip else DistanceStrategy.EUCLIDEAN_DISTANCE
     )
+    if is_ip:
+        # similarity_search 계열에서도 쿼리 벡터를 정규화하도록 설정
+        vectorstore._normalize_L2 = True
+    set_search_params(vectorstore.index, index_config.get("nprobe"), index_config.get("ef_search"))
+    vectorstore.index_config = index_config
+    vectorstore.vdb_index_path = vdb_index_path
+    # 하이브리드 검색용 BM25 역색인 (없는 이전 벡터스토어는 None)
+    vectorstore.lexical_index = load_lexical_index(vdb_index_path)
+    return vectorstore
+
+def load_db_embeddings(vectorstore: FAISS) -> np.ndarray:
+    """
+    벡터스토어의 문서 임베딩 (ntotal, dim) 배열을 복사 없이 읽기 전용으로 반환합니다.
+    → vectors.npy가 있으면 np.load(mmap_mode="r") 메모리 맵 (ANN 인덱스는 03_embedding에서 함께 저장)
+    → flat 인덱스는 (read_index_mmap이 파일 매핑 위에 연) 인덱스 내부 벡터 버퍼를 그대로 참조
+    → 둘 다 아니면(이전 형식의 ANN 인덱스) reconstruct_n으로 복원
+    
+    Args:
+        vectorstore (FAISS): load_vectorstore()로 로드한 벡터스토어.
+    
+    Returns:
+        np.ndarray: 문서 임베딩 배열 (ip 인덱스는 정규화된 벡터).
+    """
+    vectors_path = os.path.join(getattr(vectorstore, "vdb_index_path", ""), VECTORS_FILENAME)
+    if os.path.exists(vectors_path):
+        return np.load(vectors_path, mmap_mode="r")
+    index = vectorstore.index
+    if isinstance(index, faiss.IndexFlat):
+        view = faiss.rev_swig_ptr(index.get_xb(), index.ntotal * index.d).reshape(index.ntotal, index.d)
+        view.flags.writeable = False
+        return view
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+def get_store_mtime(vdb_index_path: str) -> float:
+    """
+    벡터스토어 폴더 내 파일들의 최종 수정 시각(가장 최근 값)을 반환합니다.
+    캐시 키에 포함하여 벡터스토어를 다시 생성하면 캐시가 자동으로 갱신되도록 합니다.
+    """
+    # 검색 앱이 나중에 저장하는 pca.npz는 제외 (저장하면서 캐시가 무효화되지 않도록)
+    return max((entry.stat().st_mtime for entry in os.scandir(vdb_index_path)
+                if entry.is_file() and entry.name != PCA_FILENAME), default=0.0)
+
+@st.cache_resource(max_entries=STORE_CACHE_SIZE, show_spinner="벡터스토어를 불러오는 중...")
+def load_store_cached(vdb_index_path: str, selected_embedding: str, mtime: float):
+    """
+    벡터스토어와 검색/시각화에 필요한 값을 한 번만 로드하여 모든 세션과 rerun에서 재사용합니다.
+    (vdb_index_path, selected_embedding, mtime)을 키로 최대 STORE_CACHE_SIZE개를 유지하며,
+    초과하면 가장 오래 사용하지 않은 벡터스토어부터 제거합니다.
+    
+    Args:
+        vdb_index_path (str): FAISS 벡터스토어가 저장된 폴더 경로.
+        selected_embedding (str): 선택된 임베딩 모델.
+        mtime (float): get_store_mtime(vdb_index_path) 값 (캐시 키 용도).
+    
+    Returns:
+        tuple: (vectorstore, db_embeddings, db_norms, db_texts)
+            - db_norms: 문서 임베딩 노름 (ip 인덱스는 None)
+            - db_texts: 시각화 라벨 (문서 앞 15글자)
+    """
+    vectorstore = load_vectorstore(vdb_index_path, selected_embedding)
+    db_embeddings = load_db_embeddings(vectorstore)
+    db_norms = None if vectorstore.index_config.get("metric") == "ip" else compute_doc_norms(db_embeddings)
+    db_texts = get_document_labels(vectorstore.docstore, vectorstore.index_to_docstore_id)
+    return vectorstore, db_embeddings, db_norms, db_texts
+
+@st.cache_resource(max_entries=STORE_CACHE_SIZE, show_spinner="시각화용 PCA 투영을 준비하는 중...")
+def load_projection_cached(vdb_index_path: str, selected_embedding: str, mtime: float) -> dict:
+    """
+    벡터스토어의 PCA 투영(3개 성분 + 전체 문서 좌표)을 한 번만 준비하여 2D/3D 시각화와 모든 검색에서 재사용합니다.
+    → 03_embedding이 저장한 pca.npz를 읽고, 없거나 문서 수가 다른 이전 벡터스토어는
+      문서 임베딩으로 한 번 학습한 뒤 pca.npz로 저장합니다 (저장 실패 시 메모리에만 유지).
+    
+    Args:
+        vdb_index_path (str): FAISS 벡터스토어가 저장된 폴더 경로.
+        selected_embedding (str): 선택된 임베딩 모델.
+        mtime (float): get_store_mtime(vdb_index_path) 값 (캐시 키 용도).
+    
+    Returns:
+        dict: {"mean", "components", "coords"} (pca_projection.fit_projection 결과)
+    """
+    vectorstore, db_embeddings, _, _ = load_store_cached(vdb_index_path, selected_embedding, mtime)
+    projection = load_projection(vdb_index_path)
+    if projection is None or len(projection["coords"]) != vectorstore.index.ntotal:
+        projection = fit_projection(db_embeddings)
+        try:
+            save_projection(projection, vdb_index_path)
+        except OSError as e:
+            print(f"PCA 투영 저장 실패 ({vdb_index_path}): {e}")
+    return projection
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _embed_query_cached(selected_embedding: str, query: str) -> tuple:
+    embedding = CustomEmbeddings(selected_embedding).embed_query(query)
+    if embedding is None:
+        # 실패한 결과는 캐시하지 않도록 예외로 빠져나감
+        raise ValueError("쿼리 임베딩 생성 실패")
+    return tuple(embedding)
+
+def embed_query(selected_embedding: str, query: str):
+    """
+    쿼리 임베딩을 (selected_embedding, query) 키의 LRU 캐시(최대 QUERY_CACHE_SIZE개)에서 찾고,
+    없으면 CustomEmbeddings로 생성합니다. 같은 쿼리를 반복하거나 DB만 바꿔 검색하면 API를 호출하지 않습니다.
+    
+    Args:
+        selected_embedding (str): 선택된 임베딩 모델 식별자.
+        query (str): 쿼리 텍스트.
+    
+    Returns:
+        np.ndarray | None: (1, dim) float32 쿼리 벡터 (실패 시 None).
+    """
+    try:
+        return np.array(_embed_query_cached(selected_embedding, query), dtype=np.float32).reshape(1, -1)
+    except ValueError:
+        return None
+
+def compute_doc_norms(db_embeddings: np.ndarray) -> np.ndarray:
+    """
+    문서 임베딩의 L2 노름을 계산합니다. 벡터스토어 로드 시 한 번만 계산하여 검색마다 재사용합니다.
+    
+    Args:
+        db_embeddings (np.ndarray): DB 문서 임베딩 배열 (ntotal, dim).
+    
+    Returns:
+        np.ndarray: 문서별 L2 노름 (ntotal,).
+    """
+    return np.linalg.norm(db_embeddings, axis=1).astype(np.float32)
 
-def search_query_vectorstore(query: str, selected_embedding: str, vectorstore: FAISS, db_embeddings: np.ndarray):
+def search_query_vectorstore(query: str, selected_embedding: str, vectorstore: FAISS, doc_norms: np.ndarray,
+                             k: int = 10, score_threshold: float = None, offset: int = 0,
+                             db_embeddings: np.ndarray = None, mmr_lambda: float = None, max_per_page: int = None,
+                             fetch_k: int = None, nprobe: int = None, ef_search: int = None):
     """
-    주어진 쿼리에 대해 벡터스토어 내의 모든 문서를 검색하고,
-    결과를 (L2 거리, 코사인 유사도, 텍스트, 메타데이터) 순서의 튜플 리스트로 반환합니다.
+    주어진 쿼리로 벡터스토어에서 상위 (offset + k)개를 검색하고, 그중 offset번째부터 k개 결과를
+    (L2 거리 제곱, 코사인 유사도, 텍스트, 메타데이터) 순서의 튜플 리스트로 반환합니다.
+    
+    코사인 유사도는 같은 FAISS 검색 결과에서 구합니다.
+    → l2 인덱스: L2 거리 제곱(d²)과 미리 계산한 문서 노름으로 계산
+        q·x = (|q|² + |x|² - d²) / 2,  cos = q·x / (|q| |x|)
+    → ip 인덱스(정규화 벡터): 검색 점수가 곧 코사인 유사도, L2 거리 제곱 = 2 - 2·cos
+      (두 인덱스 모두 L2 거리는 FAISS IndexFlatL2와 같은 거리 제곱)
+    문서(Document)는 반환되는 결과에 대해서만 docstore에서 가져옵니다.
+    
+    mmr_lambda 또는 max_per_page를 지정하면 fetch_k개 후보를 검색한 뒤 diversify_hits로 다시 골라
+    같은 페이지의 거의 같은 결과가 상위를 채우지 않도록 합니다.
     
     Args:
         query (str): 사용자 입력 쿼리.
         selected_embedding (str): 선택된 임베딩 모델 식별자.
         vectorstore (FAISS): 로드된 FAISS 벡터스토어 객체.
-        db_embeddings (np.ndarray): DB 문서 임베딩 배열.
+        doc_norms (np.ndarray): compute_doc_norms()로 계산한 문서 임베딩 노름 (ip 인덱스는 None 가능).
+        k (int): 반환할 최대 결과 수. 전체 보기(페이지) 모드에서는 페이지 크기.
+        score_threshold (float, optional): 이 값보다 코사인 유사도가 낮은 결과는 제외.
+        offset (int): 건너뛸 상위 결과 수. 전체 보기(페이지) 모드에서 page * page_size.
+        db_embeddings (np.ndarray, optional): 문서 임베딩 (MMR 재정렬에 필요).
+        mmr_lambda (float, optional): MMR 가중치 (1이면 관련도만, 0이면 다양성만). None이면 MMR 미사용.
+        max_per_page (int, optional): 같은 파일/페이지 결과의 최대 개수. None이면 제한 없음.
+        fetch_k (int, optional): 재정렬 후보 수 (기본값: max(DIVERSITY_FETCH_K, 4 * (offset + k))).
+        nprobe / ef_search (int, optional): 이번 검색에만 적용할 IVF nprobe / HNSW efSearch (없으면 저장된 값).
     
     Returns:
         tuple: (results, query_vector)
-            - results: 각 결과가 (L2 거리, 코사인 유사도, 텍스트, 메타데이터)인 튜플 리스트.
-            - query_vector: 쿼리 텍스트의 임베딩 벡터 (numpy 배열).
+            - results: 각 결과가 (L2 거리 제곱, 코사인 유사도, 텍스트, 메타데이터)인 튜플 리스트.
+            - query_vector: 쿼리 텍스트의 임베딩 벡터 (numpy 배열, ip 인덱스는 정규화된 벡터).
     """
-    # CustomEmbeddings 객체를 생성하여 쿼리 임베딩 생성
-    embedding_obj = CustomEmbeddings(selected_embedding)
-    query_embedding = embedding_obj.embed_query(query)
-    if query_embedding is None:
+    # 쿼리 임베딩 생성 (LRU 캐시 사용)
+    query_vector = embed_query(selected_embedding, query)
+    if query_vector is None:
         st.error("쿼리 임베딩 생성 실패")
         return [], None
-    query_vector = np.array(query_embedding, dtype=np.float32).reshape(1, -1)
-    
-    # 전체 문서를 대상으로 검색 (k = vectorstore.index.ntotal)
-    k = vectorstore.index.ntotal
-    distances, indices = vectorstore.index.search(query_vector, k)
-    cos_sim_all = cosine_similarity(db_embeddings, query_vector).flatten()
-    
-    results = []
-    for distance, idx in zip(distances[0], indices[0]):
-        doc_id = vectorstore.index_to_docstore_id[idx]
-        doc = get_document(vectorstore.docstore, doc_id)
-        cosine_value = cos_sim_all[idx]
+    is_ip = getattr(vectorstore, "index_config", {}).get("metric") == "ip"
+    if is_ip:
+        faiss.normalize_L2(query_vector)
+    
+    # 상위 offset + k개만 검색 (재정렬할 때는 fetch_k개 후보)
+    diversify = mmr_lambda is not None or max_per_page is not None
+    n_search = offset + k
+    if diversify:
+        n_search = max(n_search, fetch_k or max(DIVERSITY_FETCH_K, 4 * (offset + k)))
+    n_search = min(n_search, vectorstore.index.ntotal)
+    if n_search <= offset:
+        return [], query_vector
+    distances, indices = vectorstore.index.search(query_vector, n_search, params=make_search_params(vectorstore.index, nprobe, ef_search))
+    distances, indices = distances[0], indices[0]
+    if not diversify:
+        distances, indices = distances[offset:], indices[offset:]
+    
+    # FAISS가 못 채운 자리(-1) 제외
+    valid = indices >= 0
+    distances, indices = distances[valid], indices[valid]
+    if is_ip:
+        # 검색 점수 = 코사인 유사도, 정규화 벡터 사이의 L2 거리 제곱으로 변환
+        cosines = distances
+        distances = np.maximum(2 - 2 * cosines, 0)
+    else:
+        # 같은 검색 결과의 L2 거리 제곱으로 코사인 유사도 계산
+        query_norm = np.linalg.norm(query_vector)
+        hit_norms = doc_norms[indices]
+        dots = (query_norm ** 2 + hit_norms ** 2 - distances) / 2
+        cosines = dots / np.maximum(query_norm * hit_norms, 1e-12)
+    
+    if diversify:
+        if score_threshold is not None:
+            keep = cosines >= score_threshold
+            distances, cosines, indices = distances[keep], cosines[keep], indices[keep]
+        picks = diversify_hits(vectorstore, indices, cosines, db_embeddings, offset + k, mmr_lambda, max_per_page)[offset:]
+        return build_results(vectorstore, indices[picks], distances[picks], cosines[picks]), query_vector
+    return build_results(vectorstore, indices, distances, cosines, score_threshold), query_vector
+
+def page_group_key(metadata: dict):
+    """
+    페이지 다양화 기준: (파일명, 페이지 번호들). 같은 페이지 내용을 공유하는 결과는 같은 키를 가집니다.
+    """
+    pages = metadata.get("page") or []
+    pages = pages if isinstance(pages, (list, tuple)) else [pages]
+    return metadata.get("filename"), tuple(sorted(set(pages)))
+
+def diversify_hits(vectorstore: FAISS, indices: np.ndarray, relevance: np.ndarray, db_embeddings: np.ndarray,
+                   n_select: int, mmr_lambda: float = None, max_per_page: int = None) -> np.ndarray:
+    """
+    후보(indices, 관련도순)에서 n_select개를 골라 선택 순서대로 후보 위치를 반환합니다.
+    → MMR: 매 단계 λ·관련도 − (1−λ)·(이미 고른 결과와의 최대 코사인 유사도)가 가장 큰 후보 선택
+      후보 벡터를 정규화한 뒤 후보 간 코사인 유사도 행렬을 한 번의 행렬곱으로 계산하고,
+      최대 유사도는 선택할 때마다 벡터 연산(np.maximum)으로 갱신합니다.
+    → max_per_page: 같은 page_group_key 결과가 이 개수에 도달하면 나머지 후보를 제외
+    → 둘 다 없으면 원래 순서를 유지합니다.
+    
+    Args:
+        vectorstore (FAISS): docstore에서 후보 metadata를 읽기 위한 벡터스토어.
+        indices (np.ndarray): 후보 FAISS 인덱스 번호 (관련도순).
+        relevance (np.ndarray): 후보의 관련도 (코사인 유사도 등, 클수록 관련).
+        db_embeddings (np.ndarray): 문서 임베딩 (MMR 사용 시 필수).
+        n_select (int): 고를 결과 수.
+        mmr_lambda (float, optional): MMR 가중치. None이면 관련도순.
+        max_per_page (int, optional): 페이지별 최대 결과 수.
+    
+    Returns:
+        np.ndarray: 선택된 후보 위치 (indices 기준).
+    """
+    n = len(indices)
+    available = np.ones(n, dtype=bool)
+    if mmr_lambda is not None:
+        if db_embeddings is None:
+            raise ValueError("MMR 재정렬에는 db_embeddings가 필요합니다.")
+        vectors = np.asarray(db_embeddings[indices], dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        pairwise = vectors @ vectors.T
+        max_similarity = np.zeros(n, dtype=np.float32)
+        base_scores = mmr_lambda * np.asarray(relevance, dtype=np.float32)
+    else:
+        # 관련도순(원래 순서) 유지
+        base_scores = -np.arange(n, dtype=np.float32)
+    if max_per_page is not None:
+        docs = get_documents(vectorstore.docstore, [vectorstore.index_to_docstore_id[idx] for idx in indices])
+        group_ids = {}
+        groups = np.array([group_ids.setdefault(page_group_key(doc.metadata), len(group_ids)) for doc in docs], dtype=np.int64)
+        group_counts = np.zeros(len(group_ids), dtype=np.int64)
+    
+    selected = []
+    while len(selected) < n_select and available.any():
+        scores = base_scores - (1 - mmr_lambda) * max_similarity if mmr_lambda is not None and selected else base_scores
+        pick = int(np.argmax(np.where(available, scores, -np.inf)))
+        selected.append(pick)
+        available[pick] = False
+        if mmr_lambda is not None:
+            np.maximum(max_similarity, pairwise[pick], out=max_similarity)
+        if max_per_page is not None:
+            group_counts[groups[pick]] += 1
+            if group_counts[groups[pick]] >= max_per_page:
+                available &= groups != groups[pick]
+    return np.array(selected, dtype=np.int64)
+
+class SearchResults(list):
+    """
+    (L2 거리 제곱, 코사인 유사도, 텍스트, 메타데이터) 튜플 리스트 + 각 결과의 FAISS 인덱스 번호(indices)
+    → 일반 리스트처럼 DataFrame 등에 그대로 사용하고, 시각화에서 검색 결과 위치를 표시할 때 indices를 사용합니다.
+    """
+    def __init__(self, results=(), indices=()):
+        super().__init__(results)
+        self.indices = np.asarray(indices, dtype=np.int64)
+
+def build_results(vectorstore: FAISS, indices, distances, cosines, score_threshold: float = None) -> list:
+    """
+    검색된 인덱스 번호 순서대로 (L2 거리 제곱, 코사인 유사도, 텍스트, 메타데이터) 튜플 리스트(SearchResults)를 만듭니다.
+    score_threshold보다 코사인 유사도가 낮은 결과는 제외하고, 남은 결과의 문서만 한 번에 조회합니다.
+    """
+    indices, distances, cosines = np.asarray(indices), np.asarray(distances), np.asarray(cosines)
+    if score_threshold is not None:
+        keep = cosines >= score_threshold
+        distances, cosines, indices = distances[keep], cosines[keep], indices[keep]
+    
+    docs = get_documents(vectorstore.docstore, [vectorstore.index_to_docstore_id[idx] for idx in indices])
+    results = SearchResults(indices=indices)
+    for distance, cosine_value, doc in zip(distances, cosines, docs):
         results.append((distance, cosine_value, doc.page_content, doc.metadata))
-    return results, query_vector
+    return results
+
+def fuse_rankings(rankings: list, rrf_k: int = RRF_K, with_scores: bool = False) -> list:
+    """
+    여러 검색 결과 순위를 Reciprocal Rank Fusion으로 합칩니다.
+    → 문서 점수 = Σ 1 / (rrf_k + 순위), 점수가 같으면 앞선 ranking에 먼저 나온 문서가 우선
+    
+    Args:
+        rankings (list[list[int]]): 순위순 인덱스 번호 리스트들 (예: [벡터 검색 결과, BM25 결과]).
+        with_scores (bool): True면 (인덱스 번호 리스트, 융합 점수 리스트)를 반환.
+    
+    Returns:
+        list[int]: 융합 점수 내림차순 인덱스 번호 리스트.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, idx in enumerate(ranking, start=1):
+            scores[int(idx)] = scores.get(int(idx), 0.0) + 1.0 / (rrf_k + rank)
+    fused = sorted(scores, key=scores.get, reverse=True)
+    if with_scores:
+        return fused, [scores[idx] for idx in fused]
+    return fused
+
+def hybrid_search_vectorstore(query: str, selected_embedding: str, vectorstore: FAISS, db_embeddings: np.ndarray,
+                              doc_norms: np.ndarray, k: int = 10, score_threshold: float = None, offset: int = 0,
+                              mmr_lambda: float = None, max_per_page: int = None, fetch_k: int = None,
+                              nprobe: int = None, ef_search: int = None):
+    """
+    벡터 검색과 BM25(vectorstore.lexical_index) 검색 결과를 RRF로 합친 하이브리드 검색.
+    증권번호, 조항 번호, 금액처럼 정확히 일치해야 하는 질의를 상위에 올립니다.
+    → BM25 검색은 API 호출이 없으며, 쿼리 임베딩을 기다리는 동안 별도 스레드에서 실행합니다.
+    → 벡터/BM25 각각 max(offset + k, HYBRID_CANDIDATES)개 후보를 융합한 뒤 offset번째부터 k개를 반환합니다.
+    → 결과 형식은 search_query_vectorstore와 같고 (융합 순위순), 코사인 유사도와 L2 거리는
+      db_embeddings로 직접 계산합니다 (BM25로만 찾은 문서 포함, 검색 점수와 같은 L2 거리 제곱).
+    → mmr_lambda / max_per_page를 지정하면 융합된 후보를 diversify_hits로 다시 고릅니다
+      (MMR 관련도는 최댓값이 1이 되도록 나눈 RRF 점수).
+    BM25 역색인이 없는 벡터스토어는 search_query_vectorstore로 검색합니다.
+    
+    Args:
+        db_embeddings (np.ndarray): 문서 임베딩 (load_db_embeddings 결과, ip 인덱스는 정규화된 벡터).
+        그 밖의 인자는 search_query_vectorstore와 같음.
+    
+    Returns:
+        tuple: (results, query_vector) — search_query_vectorstore와 같음.
+    """
+    lexical_index = getattr(vectorstore, "lexical_index", None)
+    if lexical_index is None:
+        return search_query_vectorstore(query, selected_embedding, vectorstore, doc_norms,
+                                        k=k, score_threshold=score_threshold, offset=offset, db_embeddings=db_embeddings,
+                                        mmr_lambda=mmr_lambda, max_per_page=max_per_page, fetch_k=fetch_k,
+                                        nprobe=nprobe, ef_search=ef_search)
+    diversify = mmr_lambda is not None or max_per_page is not None
+    n_candidates = max(offset + k, HYBRID_CANDIDATES, fetch_k or 0)
+    if diversify:
+        n_candidates = max(n_candidates, 4 * (offset + k))
+    n_candidates = min(n_candidates, vectorstore.index.ntotal)
+    lexical_future = _lexical_executor.submit(lexical_index.search, query, n_candidates)
+    
+    query_vector = embed_query(selected_embedding, query)
+    if query_vector is None:
+        st.error("쿼리 임베딩 생성 실패")
+        return [], None
+    is_ip = getattr(vectorstore, "index_config", {}).get("metric") == "ip"
+    if is_ip:
+        faiss.normalize_L2(query_vector)
+    _, vector_indices = vectorstore.index.search(query_vector, n_candidates, params=make_search_params(vectorstore.index, nprobe, ef_search))
+    lexical_indices, _ = lexical_future.result()
+    
+    fused, fused_scores = fuse_rankings([vector_indices[0][vector_indices[0] >= 0], lexical_indices], with_scores=True)
+    if diversify:
+        # 재정렬은 융합된 후보 전체에서 (offset 적용은 재정렬 후)
+        indices, fused_scores = np.array(fused, dtype=np.int64), np.array(fused_scores, dtype=np.float32)
+    else:
+        indices = np.array(fused[offset:offset + k], dtype=np.int64)
+    if len(indices) == 0:
+        return [], query_vector
+    
+    # 융합된 결과의 코사인 유사도 / L2 거리를 문서 임베딩으로 직접 계산
+    dots = np.asarray(db_embeddings[indices], dtype=np.float32) @ query_vector[0]
+    if is_ip:
+        cosines = dots
+        distances = np.maximum(2 - 2 * cosines, 0)
+    else:
+        query_norm = np.linalg.norm(query_vector)
+        hit_norms = doc_norms[indices]
+        cosines = dots / np.maximum(query_norm * hit_norms, 1e-12)
+        distances = np.maximum(query_norm ** 2 + hit_norms ** 2 - 2 * dots, 0)
+    
+    if diversify:
+        if score_threshold is not None:
+            keep = cosines >= score_threshold
+            distances, cosines, indices, fused_scores = distances[keep], cosines[keep], indices[keep], fused_scores[keep]
+        relevance = fused_scores / max(float(fused_scores.max()), 1e-12) if len(fused_scores) else fused_scores
+        picks = diversify_hits(vectorstore, indices, relevance, db_embeddings, offset + k, mmr_lambda, max_per_page)[offset:]
+        return build_results(vectorstore, indices[picks], distances[picks], cosines[picks]), query_vector
+    return build_results(vectorstore, indices, distances, cosines, score_threshold), query_vector
+
+def _thread_pool(max_workers: int) -> ThreadPoolExecutor:
+    """
+    현재 Streamlit 실행 컨텍스트를 작업 스레드에도 연결한 ThreadPoolExecutor를 생성합니다.
+    (작업 스레드에서 st.error 등을 호출해도 경고 없이 현재 화면에 표시됨)
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ThreadPoolExecutor(
+        max_workers=max_workers,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx) if ctx else None
+    )
+
+def search_stores_parallel(query: str, stores: list, k: int = 10, score_threshold: float = None,
+                           max_workers: int = MAX_SEARCH_WORKERS, hybrid: bool = False,
+                           mmr_lambda: float = None, max_per_page: int = None) -> list:
+    """
+    여러 벡터스토어에서 같은 쿼리를 동시에 검색하여 벡터스토어별 결과를 반환합니다.
+    → 쿼리 임베딩은 임베딩모델마다 한 번만 생성합니다 (모델끼리는 동시에 요청, embed_query 캐시 사용).
+    → 벡터스토어는 load_store_cached로 불러오므로 두 번째 비교부터는 다시 로드하지 않습니다.
+    → FAISS 검색은 GIL을 해제하므로 스레드 풀에서 벡터스토어들을 동시에 검색합니다.
+    
+    Args:
+        query (str): 사용자 입력 쿼리.
+        stores (list[dict]): 검색할 벡터스토어 목록 (config.list_db_options()의 항목, "embedding"과 "path" 필수).
+        k (int): 벡터스토어별 반환할 최대 결과 수.
+        score_threshold (float, optional): 이 값보다 코사인 유사도가 낮은 결과는 제외.
+        max_workers (int): 최대 스레드 수.
+        hybrid (bool): True면 hybrid_search_vectorstore(BM25 + 벡터)로 검색.
+        mmr_lambda / max_per_page: 결과 다양화 옵션 (search_query_vectorstore 참고).
+    
+    Returns:
+        list[dict]: stores 순서대로 각 항목에 "results"(search_query_vectorstore 결과),
+            "elapsed"(검색 시간, 초), "error"(실패 사유 또는 None)를 추가한 리스트.
+    """
+    if not stores:
+        return []
+    max_workers = max(1, min(max_workers, len(stores)))
+    
+    # 1) 임베딩모델별 쿼리 임베딩 (이후 검색은 캐시된 벡터를 사용)
+    embeddings = list(dict.fromkeys(store["embedding"] for store in stores))
+    with _thread_pool(len(embeddings)) as executor:
+        query_vectors = dict(zip(embeddings, executor.map(lambda embedding: embed_query(embedding, query), embeddings)))
+    
+    # 2) 벡터스토어 로드 (캐시)
+    loaded = [
+        load_store_cached(store["path"], store["embedding"], get_store_mtime(store["path"]))
+        if query_vectors[store["embedding"]] is not None else None
+        for store in stores
+    ]
+    
+    # 3) 벡터스토어별 검색을 동시에 실행
+    def search(store, store_data):
+        if store_data is None:
+            return [], 0.0, "쿼리 임베딩 생성 실패"
+        vectorstore, db_embeddings, db_norms, _ = store_data
+        start = time.perf_counter()
+        if hybrid:
+            results, _ = hybrid_search_vectorstore(query, store["embedding"], vectorstore, db_embeddings, db_norms,
+                                                   k=k, score_threshold=score_threshold,
+                                                   mmr_lambda=mmr_lambda, max_per_page=max_per_page)
+        else:
+            results, _ = search_query_vectorstore(query, store["embedding"], vectorstore, db_norms,
+                                                  k=k, score_threshold=score_threshold, db_embeddings=db_embeddings,
+                                                  mmr_lambda=mmr_lambda, max_per_page=max_per_page)
+        return results, time.perf_counter() - start, None
+    
+    with _thread_pool(max_workers) as executor:
+        outcomes = list(executor.map(search, stores, loaded))
+    return [
+        {**store, "results": results, "elapsed": elapsed, "error": error}
+        for store, (results, elapsed, error) in zip(stores, outcomes)
+    ]
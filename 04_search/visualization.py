@@ -1,88 +1,173 @@
-import pandas as pd
+import os
+import sys
+import numpy as np
 
-def create_visualization_2d(embeddings_array, texts, query_embedding=None, query_text=None):
+# 공용 PCA 투영 모듈(common/pca_projection.py)을 불러올 수 있도록 경로 추가
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common")
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+from pca_projection import fit_projection, project
+
+DEFAULT_MAX_POINTS = 5000     # 전체 문서 시각화에 표시할 최대 점 수 (초과하면 층화 표본 추출)
+LABEL_POINT_LIMIT = 300       # 점 옆에 텍스트 라벨을 표시할 최대 점 수 (초과하면 마우스 오버로만 표시)
+SAMPLE_GRID_BINS = 32         # 층화 표본 추출에 사용하는 PCA 1, 2성분 분위수 격자 크기
+
+def sample_indices(coords, max_points, include=(), n_bins=SAMPLE_GRID_BINS, seed=0):
     """
-    2D 시각화를 위해 주어진 문서 임베딩 배열을 PCA로 2차원으로 축소하고,
-    Plotly Express를 사용하여 산점도 형태의 시각화를 생성합니다.
-    
-    Args:
-        embeddings_array: 문서 임베딩이 저장된 numpy 배열.
-        texts (list[str]): 각 문서의 텍스트 리스트.
-        query_embedding (numpy array, optional): 검색 쿼리의 임베딩 (2D 배열).
-        query_text (str, optional): 검색한 쿼리 텍스트.
-    
+    문서가 max_points개보다 많으면 PCA 좌표 격자로 층화 표본을 뽑아 표시할 문서 번호를 반환합니다.
+    → include(검색 결과)는 항상 포함합니다.
+    → PCA 1, 2성분의 분위수로 n_bins × n_bins 격자를 만들고, 칸마다 문서 수에 비례하여 뽑습니다.
+      비례 배분으로 0개가 되는 칸(드문 영역)도 남는 예산 안에서 1개씩 먼저 뽑아 분포의 가장자리를 유지합니다.
+
     Returns:
-        fig: 생성된 2D Plotly figure 객체.
+        np.ndarray: 정렬된 문서 번호
     """
-    from sklearn.decomposition import PCA
-    import plotly.express as px
-    import plotly.graph_objects as go
+    n = len(coords)
+    include = np.unique(np.asarray(include, dtype=np.int64))
+    if n <= max_points:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    budget = max(max_points - len(include), 0)
 
-    # PCA를 사용하여 2차원으로 축소
-    pca = PCA(n_components=2)
-    reduced = pca.fit_transform(embeddings_array)
-    df = pd.DataFrame(reduced, columns=['X축', 'Y축'])
-    df['text'] = [t[:15] for t in texts]
+    # 격자 칸 번호 (분위수 경계이므로 각 축의 칸마다 문서 수가 비슷함)
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    cell_x = np.searchsorted(np.quantile(coords[:, 0], quantiles), coords[:, 0])
+    cell_y = np.searchsorted(np.quantile(coords[:, 1], quantiles), coords[:, 1]) if coords.shape[1] > 1 else 0
+    cells = cell_x * n_bins + cell_y
 
-    # 산점도 생성
-    fig = px.scatter(df, x='X축', y='Y축', text='text', title='검색 결과 임베딩 2D 시각화 (PCA)')
-    fig.update_traces(textposition='top center', marker=dict(size=6))
+    candidates = np.ones(n, dtype=bool)
+    candidates[include] = False
+    candidate_ids = rng.permutation(np.flatnonzero(candidates))
+    candidate_cells = cells[candidate_ids]
+    counts = np.bincount(candidate_cells, minlength=n_bins * n_bins)
+    quotas = np.floor(counts * budget / max(len(candidate_ids), 1)).astype(np.int64)
+    # 비례 배분으로 0개가 된 칸에 남는 예산을 1개씩 배분
+    empty_cells = rng.permutation(np.flatnonzero((counts > 0) & (quotas == 0)))
+    quotas[empty_cells[:max(budget - int(quotas.sum()), 0)]] = 1
 
+    # 칸별로 무작위 순서(permutation) 앞에서부터 quota개 선택
+    order = np.argsort(candidate_cells, kind="stable")
+    sorted_cells = candidate_cells[order]
+    starts = np.searchsorted(sorted_cells, np.arange(n_bins * n_bins))
+    rank_in_cell = np.arange(len(order)) - starts[sorted_cells]
+    chosen = candidate_ids[order[rank_in_cell < quotas[sorted_cells]]]
+    # 반올림으로 남은 예산은 선택되지 않은 문서에서 무작위로 채움
+    shortfall = budget - len(chosen)
+    if shortfall > 0:
+        rest = np.setdiff1d(candidate_ids, chosen, assume_unique=True)
+        chosen = np.concatenate([chosen, rng.choice(rest, size=min(shortfall, len(rest)), replace=False)])
+    return np.sort(np.concatenate([chosen[:budget], include]))
+
+def _scatter(go, points, labels, dims, show_labels, **kwargs):
+    """
+    2D는 WebGL(Scattergl), 3D는 Scatter3d(WebGL) 산점도 trace를 생성합니다.
+    점이 많으면 텍스트 라벨 없이 마우스 오버(hovertext)로만 표시합니다.
+    """
+    mode = "markers+text" if show_labels else "markers"
+    common = dict(mode=mode, text=labels if show_labels else None, hovertext=labels, hoverinfo="text", **kwargs)
+    if show_labels:
+        common["textposition"] = "top center"
+    if dims == 2:
+        return go.Scattergl(x=points[:, 0], y=points[:, 1], **common)
+    return go.Scatter3d(x=points[:, 0], y=points[:, 1], z=points[:, 2], **common)
+
+def _create_visualization(dims, projection, texts, query_embedding=None, query_text=None, hit_indices=None,
+                          max_points=DEFAULT_MAX_POINTS):
+    import plotly.graph_objects as go
+
+    coords = projection["coords"][:, :dims]
+    hit_indices = np.asarray(hit_indices if hit_indices is not None else [], dtype=np.int64)
+    shown = sample_indices(projection["coords"], max_points, include=hit_indices)
+    show_labels = len(shown) <= LABEL_POINT_LIMIT
+    sampled = len(shown) < len(coords)
+
+    title = f"검색 결과 임베딩 {dims}D 시각화 (PCA)"
+    if sampled:
+        title += f" — 전체 {len(coords)}개 중 {len(shown)}개 표시"
+    fig = go.Figure()
+    # 문서 점 (검색 결과는 아래에서 따로 표시)
+    documents = np.setdiff1d(shown, hit_indices, assume_unique=False)
+    fig.add_trace(_scatter(
+        go, coords[documents], [texts[i][:15] for i in documents], dims, show_labels,
+        marker=dict(size=6 if dims == 2 else 5, color="#636efa", opacity=0.7 if sampled else 1.0), name="문서"
+    ))
+    # 검색 결과 (순위 라벨 포함, 항상 표시)
+    if len(hit_indices):
+        fig.add_trace(_scatter(
+            go, coords[hit_indices], [f"{rank}. {texts[i][:15]}" for rank, i in enumerate(hit_indices, start=1)], dims, True,
+            marker=dict(size=9 if dims == 2 else 6, color="orange", line=dict(width=1, color="black")), name="검색 결과"
+        ))
     # 검색 쿼리 표시 (빨간색 점)
     if query_embedding is not None and query_text is not None:
-        query_reduced = pca.transform(query_embedding)
-        fig.add_trace(
-            go.Scatter(
-                x=[query_reduced[0, 0]],
-                y=[query_reduced[0, 1]],
-                mode='markers+text',
-                marker=dict(size=8, color='red'),
-                text=[query_text],
-                name='Query'
-            )
-        )
+        query_reduced = project(projection, query_embedding)[:, :dims]
+        fig.add_trace(_scatter(go, query_reduced, [query_text], dims, True, marker=dict(size=8, color="red"), name="Query"))
+
+    if dims == 2:
+        fig.update_layout(title=title, xaxis_title="X축", yaxis_title="Y축")
+    else:
+        fig.update_layout(title=title, scene=dict(xaxis_title="X축", yaxis_title="Y축", zaxis_title="Z축"))
     return fig
 
-def create_visualization_3d(embeddings_array, texts, query_embedding=None, query_text=None):
+def create_visualization_2d(projection, texts, query_embedding=None, query_text=None, hit_indices=None,
+                            max_points=DEFAULT_MAX_POINTS):
     """
-    3D 시각화를 위해 주어진 문서 임베딩 배열을 PCA로 3차원으로 축소하고,
-    Plotly Express를 사용하여 3D 산점도 형태의 시각화를 생성합니다.
-    
+    2D 시각화를 위해 벡터스토어의 PCA 투영(pca.npz) 좌표 중 앞 2개 성분을 사용하고,
+    WebGL(Scattergl) 산점도를 생성합니다.
+    → 문서가 max_points개보다 많으면 층화 표본(sample_indices)만 표시하며, 검색 결과와 쿼리는 항상 표시합니다.
+    → 표시하는 점이 LABEL_POINT_LIMIT개 이하일 때만 점 옆에 텍스트 라벨을 붙입니다.
+
     Args:
-        embeddings_array: 문서 임베딩이 저장된 numpy 배열.
+        projection (dict): 벡터스토어별로 한 번 학습한 PCA 투영 (load_projection_cached 결과).
         texts (list[str]): 각 문서의 텍스트 리스트.
-        query_embedding (numpy array, optional): 검색 쿼리의 임베딩 (2D 배열).
+        query_embedding (numpy array, optional): 검색 쿼리의 임베딩 (2D 배열). 같은 PCA 성분으로 투영.
         query_text (str, optional): 검색한 쿼리 텍스트.
-    
+        hit_indices (array, optional): 검색 결과의 FAISS 인덱스 번호 (순위순).
+        max_points (int): 표시할 최대 점 수.
+
+    Returns:
+        fig: 생성된 2D Plotly figure 객체.
+    """
+    return _create_visualization(2, projection, texts, query_embedding, query_text, hit_indices, max_points)
+
+def create_visualization_3d(projection, texts, query_embedding=None, query_text=None, hit_indices=None,
+                            max_points=DEFAULT_MAX_POINTS):
+    """
+    3D 시각화를 위해 벡터스토어의 PCA 투영(pca.npz) 좌표 중 앞 3개 성분을 사용하고,
+    3D 산점도(Scatter3d, WebGL)를 생성합니다. 표본 추출과 라벨 규칙은 create_visualization_2d와 같습니다.
+
+    Args:
+        create_visualization_2d와 같음.
+
     Returns:
         fig: 생성된 3D Plotly figure 객체.
     """
-    from sklearn.decomposition import PCA
-    import plotly.express as px
-    import plotly.graph_objects as go
+    return _create_visualization(3, projection, texts, query_embedding, query_text, hit_indices, max_points)
 
-    # PCA를 사용하여 3차원으로 축소
-    pca = PCA(n_components=3)
-    reduced = pca.fit_transform(embeddings_array)
-    df = pd.DataFrame(reduced, columns=['X축', 'Y축', 'Z축'])
-    df['text'] = [t[:15] for t in texts]
+def create_neighborhood_visualization(hit_embeddings, hit_texts, query_embedding, query_text, dims=2):
+    """
+    쿼리 주변 시각화: 검색 결과 벡터와 쿼리만으로 PCA를 새로 학습하여 검색 결과 사이의 거리를 자세히 보여줍니다.
+    → 전체 문서를 다루지 않으므로 벡터스토어 크기와 관계없이 가볍습니다.
 
-    # 3D 산점도 생성
-    fig = px.scatter_3d(df, x='X축', y='Y축', z='Z축', text='text', title='검색 결과 임베딩 3D 시각화 (PCA)')
-    fig.update_traces(textposition='top center', marker=dict(size=5))
+    Args:
+        hit_embeddings (np.ndarray): 검색 결과의 문서 임베딩 (순위순, (k, dim)).
+        hit_texts (list[str]): 검색 결과 텍스트 (순위순).
+        query_embedding (np.ndarray): 쿼리 임베딩 (1, dim).
+        query_text (str): 검색한 쿼리 텍스트.
+        dims (int): 2 또는 3.
 
-    # 검색 쿼리 표시 (빨간색 점)
-    if query_embedding is not None and query_text is not None:
-        query_reduced = pca.transform(query_embedding)
-        fig.add_trace(
-            go.Scatter3d(
-                x=[query_reduced[0, 0]],
-                y=[query_reduced[0, 1]],
-                z=[query_reduced[0, 2]],
-                mode='markers+text',
-                marker=dict(size=8, color='red'),
-                text=[query_text],
-                name='Query'
-            )
-        )
+    Returns:
+        fig: 생성된 Plotly figure 객체.
+    """
+    import plotly.graph_objects as go
+
+    vectors = np.vstack([np.asarray(hit_embeddings, dtype=np.float32), np.asarray(query_embedding, dtype=np.float32)])
+    coords = fit_projection(vectors, n_components=dims)["coords"]
+    fig = go.Figure()
+    fig.add_trace(_scatter(
+        go, coords[:-1], [f"{rank}. {text[:15]}" for rank, text in enumerate(hit_texts, start=1)], dims, True,
+        marker=dict(size=9 if dims == 2 else 6, color="orange", line=dict(width=1, color="black")), name="검색 결과"
+    ))
+    fig.add_trace(_scatter(go, coords[-1:], [query_text], dims, True, marker=dict(size=10, color="red"), name="Query"))
+    fig.update_layout(title=f"쿼리 주변 {dims}D 시각화 (검색 결과 {len(hit_texts)}개로 학습한 PCA)")
     return fig
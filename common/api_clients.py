@@ -0,0 +1,99 @@
+import os
+import threading
+import httpx
+from dotenv import load_dotenv
+from openai import OpenAI, AsyncOpenAI
+
+# 공급자별 API 클라이언트 설정
+# → api_key_env / base_url_env: API 키와 base_url을 읽을 환경변수 (base_url 환경변수가 없으면 base_url 사용)
+# → max_connections: 커넥션 풀 크기 (환경변수 {API키 접두어}_MAX_CONNECTIONS 로 덮어쓰기 가능)
+#   캡션 생성(8 스레드)과 임베딩 엔진(동시 요청 8개)이 풀을 기다리지 않도록 여유 있게 잡습니다.
+CLIENT_CONFIGS = {
+    "upstage": {
+        "api_key_env": "UPSTAGE_API_KEY",
+        "base_url_env": "UPSTAGE_BASE_URL",
+        "base_url": "https://api.upstage.ai/v1/solar",
+        "max_connections": 16,
+    },
+    "openai": {
+        "api_key_env": "OPENAI_API_KEY",
+        "base_url_env": "OPENAI_BASE_URL",
+        "base_url": None,
+        "max_connections": 32,
+    },
+}
+# 유휴 커넥션(keep-alive)을 유지하는 시간(초)
+KEEPALIVE_EXPIRY = 120.0
+DEFAULT_TIMEOUT = 60.0
+
+# .env는 모듈을 처음 불러올 때 한 번만 읽습니다 (요청마다 읽지 않음)
+load_dotenv()
+
+_clients = {}
+_lock = threading.Lock()
+
+def pool_limits(provider, max_connections=None):
+    """
+    provider의 커넥션 풀 크기(httpx.Limits)를 반환합니다.
+    → 유휴 커넥션도 같은 수만큼 keep-alive로 유지하여 요청마다 TLS 핸드셰이크를 하지 않습니다.
+    """
+    config = CLIENT_CONFIGS[provider]
+    prefix = config["api_key_env"].replace("_API_KEY", "")
+    max_connections = max_connections or int(os.getenv(f"{prefix}_MAX_CONNECTIONS") or config["max_connections"])
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+
+def resolve_credentials(provider, api_key=None, base_url=None):
+    """
+    전달한 값이 없으면 환경변수에서 provider의 API 키와 base_url을 읽습니다.
+    """
+    config = CLIENT_CONFIGS[provider]
+    api_key = api_key or os.getenv(config["api_key_env"])
+    if not api_key:
+        raise ValueError(f"ERROR: {config['api_key_env']}가 .env 파일에 설정되어 있지 않습니다.")
+    base_url = base_url or os.getenv(config["base_url_env"]) or config["base_url"]
+    return api_key, base_url
+
+def get_client(provider, api_key=None, base_url=None):
+    """
+    provider("upstage" 또는 "openai")의 공용 동기 OpenAI 클라이언트를 반환합니다.
+    → (provider, api_key, base_url)마다 한 번만 생성하고 이후에는 같은 클라이언트를 재사용합니다.
+    → 클라이언트는 스레드 안전하므로 ThreadPoolExecutor / Streamlit 세션이 함께 사용해도 됩니다.
+    """
+    api_key, base_url = resolve_credentials(provider, api_key, base_url)
+    key = (provider, api_key, base_url)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                http_client = httpx.Client(limits=pool_limits(provider), timeout=DEFAULT_TIMEOUT)
+                client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+                _clients[key] = client
+    return client
+
+def create_async_client(provider, api_key=None, base_url=None, max_connections=None, **kwargs):
+    """
+    provider의 커넥션 풀 설정을 적용한 AsyncOpenAI 클라이언트를 생성합니다.
+    → 비동기 클라이언트는 이벤트 루프에 묶이므로 공유하지 않고, asyncio.run 한 번 동안
+      async with 블록 안에서 재사용한 뒤 닫습니다.
+    → kwargs(max_retries, timeout 등)는 AsyncOpenAI에 그대로 전달합니다.
+    """
+    api_key, base_url = resolve_credentials(provider, api_key, base_url)
+    http_client = httpx.AsyncClient(
+        limits=pool_limits(provider, max_connections),
+        timeout=kwargs.get("timeout", DEFAULT_TIMEOUT)
+    )
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client, **kwargs)
+
+def close_clients():
+    """
+    공용 클라이언트를 모두 닫고 레지스트리를 비웁니다.
+    """
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
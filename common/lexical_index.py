@@ -0,0 +1,131 @@
+import os
+import re
+import unicodedata
+from collections import Counter
+import numpy as np
+
+# 03_embedding이 벡터스토어 폴더에 함께 저장하고 04_search가 읽는 BM25 역색인 파일
+LEXICAL_INDEX_FILENAME = "bm25.npz"
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 토큰화
+# → 영문/숫자는 붙어 있는 한 덩어리를 그대로 토큰으로 사용 (증권번호 FA20246734777000, 조항 번호 등 정확히 일치)
+#   숫자의 천 단위 쉼표는 제거 (1,000,000원 → 1000000 / 원)
+# → 한글 등 그 밖의 글자는 문자 2-gram으로 나눠 조사가 붙어도 일치 (보험료는 → 보험, 험료, 료는)
+TOKEN_PATTERN = re.compile(r"[0-9a-z]+|[^\W\d_a-z]+")
+THOUSANDS_SEPARATOR_PATTERN = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+ALNUM_PATTERN = re.compile(r"[0-9a-z]+")
+
+def tokenize(text):
+    """
+    검색용 토큰 리스트를 반환합니다 (NFKC 정규화 + 소문자 변환 후 TOKEN_PATTERN 규칙 적용).
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = THOUSANDS_SEPARATOR_PATTERN.sub("", text)
+    tokens = []
+    for run in TOKEN_PATTERN.findall(text):
+        if ALNUM_PATTERN.fullmatch(run) or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+class LexicalIndex:
+    """
+    문자 n-gram / 영숫자 토큰 기반 BM25 역색인
+    → 용어별 (문서 번호, 빈도) 목록을 CSR 형태의 배열(indptr, doc_ids, tfs)로 저장합니다.
+    → 문서 번호는 FAISS 인덱스 번호(docstore.sqlite의 row)와 같습니다.
+    """
+    def __init__(self, terms, indptr, doc_ids, tfs, doc_lengths, k1=BM25_K1, b=BM25_B):
+        self.terms = terms
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.term_ids = {term: i for i, term in enumerate(terms.tolist())}
+        n_docs = len(doc_lengths)
+        doc_freqs = np.diff(indptr)
+        self.idf = np.log1p((n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        # 문서 길이 정규화 항 k1 * (1 - b + b * |d| / avgdl) 은 미리 계산
+        avgdl = float(doc_lengths.mean()) if n_docs else 0.0
+        self.length_norm = (k1 * (1 - b + b * doc_lengths / max(avgdl, 1e-9))).astype(np.float32)
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, texts, k1=BM25_K1, b=BM25_B):
+        """
+        texts(문서 순서 = FAISS 인덱스 순서)로 역색인을 생성합니다.
+        """
+        vocab = {}
+        term_ids, doc_ids, tfs = [], [], []
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+        term_ids = np.array(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=indptr[1:])
+        terms = np.array(list(vocab), dtype=str) if vocab else np.array([], dtype="<U1")
+        return cls(
+            terms, indptr,
+            np.array(doc_ids, dtype=np.int32)[order], np.array(tfs, dtype=np.float32)[order],
+            doc_lengths, k1, b
+        )
+
+    def save(self, path):
+        np.savez(
+            path, terms=self.terms, indptr=self.indptr, doc_ids=self.doc_ids, tfs=self.tfs,
+            doc_lengths=self.doc_lengths, params=np.array([self.k1, self.b], dtype=np.float32)
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            k1, b = data["params"].tolist()
+            return cls(data["terms"], data["indptr"], data["doc_ids"], data["tfs"], data["doc_lengths"], k1, b)
+
+    def scores(self, query):
+        """
+        query에 대한 전체 문서의 BM25 점수 (len(self),) 를 반환합니다.
+        """
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term, query_tf in Counter(tokenize(query)).items():
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            doc_ids, tfs = self.doc_ids[start:end], self.tfs[start:end]
+            scores[doc_ids] += query_tf * self.idf[term_id] * tfs * (self.k1 + 1) / (tfs + self.length_norm[doc_ids])
+        return scores
+
+    def search(self, query, k=10):
+        """
+        BM25 점수 상위 k개 문서를 반환합니다 (점수가 0인 문서는 제외).
+
+        Returns:
+            tuple: (indices, scores) 점수 내림차순 np.ndarray
+        """
+        scores = self.scores(query)
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return top, scores[top]
+
+def load_lexical_index(vdb_index_path):
+    """
+    벡터스토어 폴더의 bm25.npz를 읽습니다. 파일이 없는 이전 벡터스토어는 None을 반환합니다.
+    """
+    path = os.path.join(vdb_index_path, LEXICAL_INDEX_FILENAME)
+    return LexicalIndex.load(path) if os.path.exists(path) else None
@@ -0,0 +1,57 @@
+import os
+import numpy as np
+
+# 03_embedding이 벡터스토어 폴더에 함께 저장하고 04_search 시각화가 읽는 PCA 투영 파일
+PCA_FILENAME = "pca.npz"
+PCA_COMPONENTS = 3            # 3개 성분 하나로 2D(앞 2개)와 3D 시각화를 모두 그림
+PCA_FIT_SAMPLES = 20000       # PCA 학습에 사용할 최대 표본 수 (투영은 전체 벡터)
+PROJECT_BATCH_SIZE = 65536    # 전체 벡터를 나눠서 투영할 행 수 (메모리 맵 벡터를 한꺼번에 읽지 않음)
+
+def fit_projection(vectors, n_components=PCA_COMPONENTS, max_samples=PCA_FIT_SAMPLES, seed=0):
+    """
+    vectors (n, dim)에 PCA를 학습하고 전체 벡터의 투영 좌표까지 계산합니다 (NumPy SVD, sklearn PCA와 같은 결과).
+    → 벡터가 max_samples개보다 많으면 무작위 표본으로 성분을 학습합니다.
+
+    Returns:
+        dict: {"mean": (dim,), "components": (n_components, dim), "coords": (n, n_components)} float32
+    """
+    n = len(vectors)
+    if n > max_samples:
+        sample = np.asarray(vectors[np.sort(np.random.default_rng(seed).choice(n, size=max_samples, replace=False))], dtype=np.float64)
+    else:
+        sample = np.asarray(vectors, dtype=np.float64)
+    mean = sample.mean(axis=0)
+    _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+    components = np.zeros((n_components, sample.shape[1]), dtype=np.float64)
+    components[:min(n_components, len(vt))] = vt[:n_components]
+    # 성분 부호 고정: 절댓값이 가장 큰 원소가 양수 (sklearn svd_flip과 같은 규칙)
+    signs = np.sign(components[np.arange(n_components), np.argmax(np.abs(components), axis=1)])
+    components *= np.where(signs == 0, 1, signs)[:, None]
+
+    projection = {"mean": mean.astype(np.float32), "components": components.astype(np.float32)}
+    projection["coords"] = project(projection, vectors)
+    return projection
+
+def project(projection, vectors):
+    """
+    학습된 projection으로 vectors (m, dim)를 (m, n_components) 좌표로 변환합니다 (쿼리 벡터 포함).
+    """
+    mean, components = projection["mean"], projection["components"]
+    coords = np.empty((len(vectors), len(components)), dtype=np.float32)
+    for start in range(0, len(vectors), PROJECT_BATCH_SIZE):
+        batch = np.asarray(vectors[start:start + PROJECT_BATCH_SIZE], dtype=np.float32)
+        coords[start:start + len(batch)] = (batch - mean) @ components.T
+    return coords
+
+def save_projection(projection, vdb_index_path):
+    np.savez(os.path.join(vdb_index_path, PCA_FILENAME), **projection)
+
+def load_projection(vdb_index_path):
+    """
+    벡터스토어 폴더의 pca.npz를 읽습니다. 파일이 없으면 None을 반환합니다.
+    """
+    path = os.path.join(vdb_index_path, PCA_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {key: data[key] for key in ("mean", "components", "coords")}
@@ -6,8 +6,9 @@ CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 UPSTAGE_SRC_DIR = os.path.join(CURRENT_DIR, "01_parse", "upstage_document_parse", "src")
 CONSTRUCT_DIR = os.path.join(CURRENT_DIR, "02_construct")
 EMBEDDING_DIR = os.path.join(CURRENT_DIR, "03_embedding")
+COMMON_DIR = os.path.join(CURRENT_DIR, "common")  # 공용 API 클라이언트 (api_clients.py)
 
-for path in [UPSTAGE_SRC_DIR, CONSTRUCT_DIR, EMBEDDING_DIR]:
+for path in [UPSTAGE_SRC_DIR, CONSTRUCT_DIR, EMBEDDING_DIR, COMMON_DIR]:
     if path not in sys.path:
         sys.path.append(path)
 
@@ -19,6 +20,11 @@ from upstageEmbedding import upstageEmbedding
 
 def main():
     pdf_folder = "pdf"
+    # 병합 결과 폴더 (None이면 기존처럼 실행마다 data/YYMMDD-HH-MM 새 폴더 생성)
+    # → 고정 경로(예: os.path.join("data", "merged"))를 지정하면 이전 결과를 덮어쓰며 입력이 바뀐 경우에만 다시 병합
+    construct_output_folder = None
+    # 폴더별 content|metadata 생성에 사용할 프로세스 수
+    construct_workers = min(4, os.cpu_count() or 1)
     pdf_filenames = [
         # "[보조교재]_연말정산 세무_이석정_한국_회원_3.5시간.pdf",
         # "차트2_표1.pdf",
@@ -56,7 +62,9 @@ def main():
     #     # 경로 구분자를 replace()로 통일: 백슬래시를 슬래시로 변경
     #     normalized_path = construct_path.replace("\\", "/")
     #     construct_paths.append(normalized_path)
-    construct_path = construct_embedding_contents(all_result_folders)
+    construct_path = construct_embedding_contents(
+        all_result_folders, output_folder=construct_output_folder, workers=construct_workers
+    )
     
     # construct_paths 리스트에 있는 폴더 경로를 사용하여 임베딩 실행
     print("║ ✅ openaiEmbedding 시작")
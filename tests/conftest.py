@@ -0,0 +1,11 @@
+import os
+import sys
+
+# 단계별 폴더(02_construct, 03_embedding, 04_search)와 공용 모듈(common)을 테스트에서 불러올 수 있도록 경로 추가
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ["02_construct", "03_embedding", "04_search"]:
+    path = os.path.join(ROOT_DIR, folder)
+    if path not in sys.path:
+        sys.path.append(path)
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
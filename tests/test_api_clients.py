@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from common import api_clients
+from common.api_clients import close_clients, get_client
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    for name in ("UPSTAGE_API_KEY", "UPSTAGE_BASE_URL", "OPENAI_API_KEY", "OPENAI_BASE_URL"):
+        monkeypatch.delenv(name, raising=False)
+    close_clients()
+    yield
+    close_clients()
+
+def test_get_client_is_cached_per_provider_and_key(monkeypatch):
+    client = get_client("upstage", "key-1")
+    assert get_client("upstage", "key-1") is client
+    assert str(client.base_url).startswith("https://api.upstage.ai/v1/solar")
+    # 키, 공급자, base_url이 다르면 각각 별도 클라이언트
+    assert get_client("upstage", "key-2") is not client
+    assert get_client("openai", "key-1") is not client
+    assert get_client("upstage", "key-1", "http://127.0.0.1:8765/v1") is not client
+    # 환경변수로 읽은 키도 같은 키로 취급
+    monkeypatch.setenv("UPSTAGE_API_KEY", "key-1")
+    assert get_client("upstage") is client
+    assert len(api_clients._clients) == 4
+
+def test_get_client_is_shared_across_threads():
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: get_client("openai", "key-1"), range(32)))
+    assert all(client is clients[0] for client in clients)
+
+def test_get_client_requires_api_key():
+    with pytest.raises(ValueError, match="UPSTAGE_API_KEY"):
+        get_client("upstage")
+
+def test_close_clients_resets_the_cache():
+    client = get_client("openai", "key-1")
+    close_clients()
+    assert get_client("openai", "key-1") is not client
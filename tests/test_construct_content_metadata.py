@@ -0,0 +1,53 @@
+import pandas as pd
+
+import construct_content_metadata
+from construct_content_metadata import ALL_COMBINATIONS, build_combination_outputs, get_cross_page_metadata
+
+def make_frame():
+    # elementid가 정렬되어 있지 않은 DataFrame (행 순서 ≠ elementid 순서)
+    return pd.DataFrame({
+        "elementid": [2, 1, 4, 3, 6, 5],
+        "페이지숫자": [1, 1, 2, 2, 3, 3],
+        "내용": ["b", "a", "d", "c", "f", "e"],
+        "data-category": ["paragraph"] * 6,
+        "파일명": ["doc.pdf"] * 6,
+    })
+
+def test_cross_page_neighbor_ids_follow_row_order():
+    metadata = get_cross_page_metadata(make_frame())
+    # 현재 페이지 elementid는 오름차순, 이전 페이지 마지막 / 다음 페이지 첫번째 elementid는 행 순서 기준
+    page2 = metadata[2]
+    assert page2["elementid"] == [3, 4, 1, 6]
+    assert page2["page"] == [2, 2, 1, 3]
+    # 텍스트의 이전 페이지 마지막 / 다음 페이지 첫번째 청크는 elementid 순서 기준
+    assert page2["text"] == "\n\n".join([
+        "[[[[[[현재페이지 전체내용]", "c\n\nd",
+        "[[[[[[이전페이지 마지막 청크]", "b",
+        "[[[[[[다음페이지 첫번째 청크]", "e",
+    ])
+    assert metadata[0]["elementid"] == [1, 2, 4]
+    assert metadata[5]["elementid"] == [5, 6, 3]
+
+def test_each_strategy_is_computed_once_and_shared(monkeypatch):
+    calls = []
+
+    def counted(kind, strategy_id, func):
+        def wrapper(df, page_index):
+            calls.append((kind, strategy_id))
+            return func(df, page_index)
+        return wrapper
+
+    contents = {key: (name, counted("content", key, func))
+                for key, (name, func) in construct_content_metadata.CONTENT_STRATEGIES.items()}
+    metadatas = {key: counted("metadata", key, func) for key, func in construct_content_metadata.METADATA_STRATEGIES.items()}
+    monkeypatch.setattr(construct_content_metadata, "CONTENT_STRATEGIES", contents)
+    monkeypatch.setattr(construct_content_metadata, "METADATA_STRATEGIES", metadatas)
+
+    outputs = build_combination_outputs(make_frame())
+    assert [name.split("_", 1)[0] for name in outputs] == ALL_COMBINATIONS
+    # 11개 조합이지만 content 4개, metadata 3개 전략만 계산
+    assert sorted(calls) == [("content", key) for key in "1234"] + [("metadata", key) for key in "123"]
+    # 같은 전략을 쓰는 조합은 같은 리스트를 공유
+    assert outputs["1-2_chunk_only"][0] is outputs["1-3_chunk_only"][0]
+    assert outputs["1-2_chunk_only"][1] is outputs["4-2_page_only"][1]
+    assert all(len(content) == len(metadata) == 6 for content, metadata in outputs.values())
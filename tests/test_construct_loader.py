@@ -0,0 +1,28 @@
+from construct_content_metadata import EXCEL_CELL_LIMIT, save_excel, save_parquet
+from construct_loader import load_documents
+
+CONTENTS = ["[[[[[[현재청크]첫 청크", "둘째 청크"]
+METADATAS = [
+    {"elementid": [1, 2], "category": "paragraph", "filename": "모니터1p", "page": [1], "text": "[[[[[[이전청크]앞 문맥"},
+    {"elementid": [2], "category": "table", "filename": "모니터1p", "page": [1, 2], "text": "뒤 문맥"},
+]
+
+def test_parquet_round_trip(tmp_path):
+    path = str(tmp_path / "1-1_chunk_only.parquet")
+    save_parquet(CONTENTS, METADATAS, path)
+    documents = load_documents(path)
+    # 라벨은 제거하고 metadata 필드와 text는 그대로 복원
+    assert [document.page_content for document in documents] == ["첫 청크", "둘째 청크"]
+    assert documents[0].metadata == dict(METADATAS[0], text="앞 문맥")
+    assert documents[1].metadata == METADATAS[1]
+
+def test_excel_round_trip_rejoins_long_text(tmp_path):
+    path = str(tmp_path / "1-1_chunk_only.xlsx")
+    long_text = "가" * EXCEL_CELL_LIMIT + "나" * 10
+    metadatas = [dict(METADATAS[0], text=long_text), METADATAS[1]]
+    save_excel(CONTENTS, metadatas, path)
+    documents = load_documents(path)
+    # 셀 길이 제한을 넘는 text는 C열부터 나눠 기록했다가 다시 이어 붙임
+    assert [document.page_content for document in documents] == ["첫 청크", "둘째 청크"]
+    assert documents[0].metadata == dict(METADATAS[0], text=long_text)
+    assert documents[1].metadata == METADATAS[1]
@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import construct_content_metadata
+from construct_content_metadata import ALL_COMBINATIONS, construct_embedding_contents, construct_input_path, read_combination_output
+from construct_loader import find_construct_files
+from vectorstore_builder import build_vectorstores, load_content_groups
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_FOLDER = os.path.join(ROOT_DIR, "data", "250409-09-29_모니터1p")
+
+def copy_parse_folder(tmp_path, name):
+    """
+    저장소의 파싱 결과 폴더에서 입력 엑셀만 복사하여 name 폴더를 만듭니다.
+    """
+    folder = tmp_path / name
+    folder.mkdir()
+    shutil.copy(construct_input_path(SOURCE_FOLDER), construct_input_path(str(folder)))
+    return str(folder)
+
+def assert_loadable(output_folder):
+    files = find_construct_files(output_folder)
+    assert len(files) == len(ALL_COMBINATIONS)
+    assert all(f.endswith(".parquet") for f in files)
+    groups = list(load_content_groups(files))
+    assert sum(len(group["files"]) for group in groups) == len(ALL_COMBINATIONS)
+    assert all(len(documents) == len(group["texts"]) for group in groups for _, documents in group["files"])
+
+def test_construct_output_is_loadable_by_embedding(tmp_path):
+    folders = [copy_parse_folder(tmp_path, "250409-09-29_모니터1p"), copy_parse_folder(tmp_path, "250409-09-30_모니터2p")]
+    output_folder = str(tmp_path / "merged")
+
+    assert construct_embedding_contents(folders, output_folder=output_folder) == output_folder
+    assert_loadable(output_folder)
+    # 파싱 결과 폴더(입력 엑셀이 있는 폴더)도 조합 결과만 찾음
+    assert_loadable(folders[0])
+
+    # 폴더 하나의 입력을 바꾸면 증분 갱신 경로를 거친 뒤에도 그대로 읽을 수 있어야 함
+    excel_path = construct_input_path(folders[1])
+    df = pd.read_excel(excel_path)
+    df.loc[0, "내용"] = "변경된 내용"
+    df.to_excel(excel_path, index=False)
+    assert construct_embedding_contents(folders, output_folder=output_folder) == output_folder
+    assert_loadable(output_folder)
+
+def test_incremental_construct_recomputes_only_changed_document(tmp_path, monkeypatch):
+    folders = [copy_parse_folder(tmp_path, "250409-09-29_모니터1p"), copy_parse_folder(tmp_path, "250409-09-30_모니터2p")]
+    output_folder = str(tmp_path / "merged")
+    construct_embedding_contents(folders, output_folder=output_folder)
+    first_contents, first_metadatas = read_combination_output(os.path.join(output_folder, "3-3_page_plus_chunk.parquet"))
+    n_rows = len(pd.read_excel(construct_input_path(folders[0])))
+    # 같은 입력을 복사한 두 문서는 같은 페이지 번호를 쓰지만 서로의 페이지 문맥에 섞이지 않음
+    assert first_contents[:n_rows] == first_contents[n_rows:]
+
+    excel_path = construct_input_path(folders[1])
+    df = pd.read_excel(excel_path)
+    df.loc[0, "내용"] = "변경된 내용"
+    df.to_excel(excel_path, index=False)
+
+    loaded = []
+    load_construct_frame = construct_content_metadata.load_construct_frame
+    monkeypatch.setattr(construct_content_metadata, "load_construct_frame", lambda folder: loaded.append(folder) or load_construct_frame(folder))
+    construct_embedding_contents(folders, output_folder=output_folder)
+    assert loaded == [folders[1]]
+
+    contents, metadatas = read_combination_output(os.path.join(output_folder, "3-3_page_plus_chunk.parquet"))
+    # 바뀌지 않은 문서의 행은 이전 결과 그대로, 바뀐 문서의 행만 변경 내용을 반영
+    assert contents[:n_rows] == first_contents[:n_rows]
+    assert metadatas[:n_rows] == first_metadatas[:n_rows]
+    assert all("변경된 내용" not in text for text in contents[:n_rows])
+    assert all("변경된 내용" in text for text in contents[n_rows:])
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="작업자 프로세스가 테스트의 함수 교체를 물려받아야 함")
+def test_parallel_construct_reads_each_input_once(tmp_path, monkeypatch):
+    folders = [copy_parse_folder(tmp_path, "250409-09-29_모니터1p"), copy_parse_folder(tmp_path, "250409-09-30_모니터2p")]
+    log_path = tmp_path / "loads.log"
+    load_construct_frame = construct_content_metadata.load_construct_frame
+
+    def logged_load(folder):
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(f"{os.getpid()}\t{folder}\n")
+        return load_construct_frame(folder)
+
+    monkeypatch.setattr(construct_content_metadata, "load_construct_frame", logged_load)
+    output_folder = construct_embedding_contents(folders, output_folder=str(tmp_path / "merged"), workers=2)
+    assert_loadable(output_folder)
+    # 입력 엑셀은 작업자 프로세스에서 폴더마다 한 번만 읽고, 병합 단계에서 다시 읽지 않음
+    loads = [line.split("\t") for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert sorted(folder for _, folder in loads) == sorted(folders)
+    assert all(int(pid) != os.getpid() for pid, _ in loads)
+
+def test_find_construct_files_ignores_non_combination_files(tmp_path):
+    for name in ["1-1_chunk_only.parquet", "1-1_chunk_only.xlsx", "4-3_page_only.xlsx",
+                 "construct_rows.parquet", "250409-09-29_모니터1p.xlsx", "notes.parquet"]:
+        (tmp_path / name).write_bytes(b"")
+    files = [os.path.basename(f) for f in find_construct_files(str(tmp_path))]
+    assert files == ["1-1_chunk_only.parquet", "4-3_page_only.xlsx"]
+
+class FakeEngine:
+    """
+    텍스트 해시로 고정 벡터를 만드는 임베딩 엔진 (API 호출 없음)
+    """
+    def embed_texts(self, texts):
+        return [np.random.default_rng(abs(hash(text)) % (2 ** 32)).standard_normal(8).tolist() for text in texts]
+
+def test_build_vectorstores_skips_unreadable_file(tmp_path):
+    folder = copy_parse_folder(tmp_path, "250409-09-29_모니터1p")
+    construct_embedding_contents([folder], output_folder=str(tmp_path / "merged"))
+    # 조합 파일 하나를 깨뜨려도 나머지 벡터스토어는 생성되어야 함
+    (tmp_path / "merged" / "1-2_chunk_only.parquet").write_bytes(b"broken")
+
+    results = build_vectorstores(str(tmp_path / "merged"), FakeEngine(), None, str(tmp_path / "vdb"), "fake")
+    names = sorted(os.path.basename(path) for path in results)
+    assert len(names) == len(ALL_COMBINATIONS) - 1
+    assert "1-2_chunk_only_fake" not in names
+    assert "1-1_chunk_only_fake" in names
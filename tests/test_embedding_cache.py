@@ -0,0 +1,49 @@
+import unicodedata
+
+import numpy as np
+import pytest
+
+from embedding_cache import EmbeddingCache, normalize_text, text_key
+
+def test_text_key_normalizes_unicode_and_whitespace():
+    # NFD로 분해된 한글, 연속 공백/줄바꿈, 앞뒤 공백은 같은 키
+    assert normalize_text("  보험료\n\n 납입 \t방법 ") == "보험료 납입 방법"
+    decomposed = unicodedata.normalize("NFD", "보험료 납입")
+    assert decomposed != "보험료 납입"
+    assert text_key("보험료 납입") == text_key(f" {decomposed.replace(' ', '  ')}\n")
+    assert text_key("보험료 납입") != text_key("보험료납입")
+
+def test_cache_hit_and_miss(tmp_path):
+    cache = EmbeddingCache("model/a", cache_dir=str(tmp_path))
+    vectors = np.arange(6, dtype=np.float32).reshape(2, 3)
+    keys = [text_key("첫 문장"), text_key("둘째 문장")]
+    assert cache.get_many(keys) == {}
+
+    cache.add_many(keys, vectors)
+    found = cache.get_many([text_key(" 첫  문장"), text_key("없는 문장")])
+    assert list(found) == [keys[0]]
+    np.testing.assert_array_equal(found[keys[0]], vectors[0])
+
+    # 이미 있는 키는 다시 추가하지 않고, 새 인스턴스도 디스크에서 같은 값을 읽음
+    cache.add_many(keys[:1], vectors[1:])
+    reopened = EmbeddingCache("model/a", cache_dir=str(tmp_path))
+    assert len(reopened) == 2
+    np.testing.assert_array_equal(np.stack([reopened.get_many(keys)[key] for key in keys]), vectors)
+    # 모델별로 분리된 캐시
+    assert EmbeddingCache("model/b", cache_dir=str(tmp_path)).get_many(keys) == {}
+    with pytest.raises(ValueError):
+        reopened.add_many([text_key("다른 차원")], np.zeros((1, 4), dtype=np.float32))
+
+def test_cache_ignores_rows_without_keys(tmp_path):
+    cache = EmbeddingCache("model", cache_dir=str(tmp_path))
+    keys = [text_key("a"), text_key("b")]
+    cache.add_many(keys, np.ones((2, 3), dtype=np.float32))
+    # 키를 쓰다가 중단된 경우(줄바꿈 없는 마지막 키)는 그 행을 사용하지 않음
+    with open(cache.keys_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    with open(cache.keys_path, "w", encoding="utf-8") as f:
+        f.write(content[:-1])
+    reopened = EmbeddingCache("model", cache_dir=str(tmp_path))
+    assert list(reopened.get_many(keys)) == [keys[0]]
+    reopened.add_many(keys[1:], np.full((1, 3), 2, dtype=np.float32))
+    np.testing.assert_array_equal(EmbeddingCache("model", cache_dir=str(tmp_path)).get_many(keys)[keys[1]], [2, 2, 2])
@@ -0,0 +1,119 @@
+import hashlib
+import time
+
+import httpx
+import numpy as np
+import pytest
+from openai import APIStatusError
+
+from embedding_cache import EmbeddingCache
+from embedding_engine import EmbeddingEngine, is_batch_too_large
+from mock_embedding_server import start_mock_server
+
+DIM = 8
+
+def make_status_error(status_code, message, code=None):
+    request = httpx.Request("POST", "http://127.0.0.1/v1/embeddings")
+    response = httpx.Response(status_code, request=request)
+    return APIStatusError(message, response=response, body={"message": message, "code": code})
+
+def test_only_size_errors_split_the_batch():
+    assert is_batch_too_large(make_status_error(413, "payload too large"))
+    assert is_batch_too_large(make_status_error(400, "bad request", code="context_length_exceeded"))
+    assert is_batch_too_large(make_status_error(
+        400, "This model's maximum context length is 8192 tokens, however you requested 9000 tokens"
+    ))
+    # 잘못된 모델, 빈 입력 등 다른 400은 나눠도 실패하므로 바로 실패 처리
+    assert not is_batch_too_large(make_status_error(400, "The model `nope` does not exist", code="model_not_found"))
+    assert not is_batch_too_large(make_status_error(400, "'$.input' is invalid: empty string"))
+    assert not is_batch_too_large(make_status_error(429, "rate limit"))
+
+@pytest.fixture
+def mock_server():
+    """
+    mock 임베딩 서버를 빈 포트로 시작하는 함수를 반환합니다. (base_url, stats)를 돌려주며 테스트가 끝나면 종료합니다.
+    """
+    servers = []
+
+    def start(**kwargs):
+        server, base_url = start_mock_server(port=0, dim=DIM, **kwargs)
+        servers.append(server)
+        return base_url, server.RequestHandlerClass.stats
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def make_engine(base_url, **kwargs):
+    options = dict(max_batch_inputs=4, max_concurrency=1, backoff_base=0.01, backoff_max=0.05)
+    options.update(kwargs)
+    return EmbeddingEngine(api_key="test", model="mock", base_url=base_url, provider="openai", **options)
+
+def expected_vector(text):
+    # mock_embedding_server와 같은 방식으로 텍스트 해시에서 만든 벡터
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(DIM)
+
+def assert_embeddings(embeddings, texts):
+    for vector, text in zip(embeddings, texts):
+        np.testing.assert_allclose(vector, expected_vector(text), rtol=1e-6)
+
+def test_retry_after_header_sets_retry_delay(mock_server):
+    base_url, stats = mock_server(fail_first=1, retry_after=0.5)
+    texts = ["첫 번째 문서", "두 번째 문서"]
+    # 백오프(5초 이상)가 아니라 Retry-After(0.5초)만큼 기다린 뒤 재시도해야 함
+    engine = make_engine(base_url, backoff_base=10.0, backoff_max=10.0)
+    started = time.monotonic()
+    assert_embeddings(engine.embed_texts(texts), texts)
+    assert time.monotonic() - started < 3.0
+    (first, _, first_status), (second, _, second_status) = stats["log"]
+    assert (first_status, second_status) == (429, 200)
+    assert second - first >= 0.45
+
+def test_rate_limit_blocks_every_worker(mock_server):
+    base_url, stats = mock_server(fail_first=1, retry_after=0.5)
+    texts = [f"문서 {i}" for i in range(400)]
+    engine = make_engine(base_url, max_batch_inputs=2, max_concurrency=4, rpm=1_000_000)
+    assert_embeddings(engine.embed_texts(texts), texts)
+    blocked_at = stats["log"][0][0]
+    assert stats["log"][0][2] == 429
+    # 429를 받은 뒤(이미 보낸 요청이 돌아올 시간을 제외) Retry-After 동안은 어떤 작업자도 요청하지 않음
+    during_block = [arrived for arrived, _, _ in stats["log"] if blocked_at + 0.1 < arrived < blocked_at + 0.45]
+    assert during_block == []
+    assert stats["inputs"] == len(texts)
+
+def test_oversized_batch_is_halved(mock_server):
+    base_url, stats = mock_server(max_inputs=4)
+    texts = [f"문서 {i}" for i in range(20)]
+    engine = make_engine(base_url, max_batch_inputs=16)
+    assert_embeddings(engine.embed_texts(texts), texts)
+    assert stats["413"] > 0
+    assert stats["inputs"] == len(texts)
+    assert all(n_inputs <= 4 for _, n_inputs, status in stats["log"] if status == 200)
+
+def test_duplicates_are_requested_once_and_cached(mock_server, tmp_path):
+    base_url, stats = mock_server()
+    texts = ["같은  문장", "같은 문장", " 같은 문장 ", "다른 문장"]
+    cache = EmbeddingCache("mock", cache_dir=str(tmp_path))
+    embeddings = make_engine(base_url, cache=cache).embed_texts(texts)
+    # 정규화 텍스트가 같은 입력은 한 번만 요청하고 같은 벡터를 공유
+    assert stats["inputs"] == 2
+    assert embeddings[0] == embeddings[1] == embeddings[2]
+    assert_embeddings(embeddings[:1] + embeddings[3:], [texts[0], texts[3]])
+
+    # 새 엔진도 디스크 캐시를 읽어 API를 호출하지 않음
+    requests = stats["requests"]
+    cached = make_engine(base_url, cache=EmbeddingCache("mock", cache_dir=str(tmp_path))).embed_texts(texts)
+    assert stats["requests"] == requests
+    np.testing.assert_allclose(cached, embeddings)
+
+def test_rejected_batch_falls_back_to_zero_vectors(mock_server):
+    base_url, stats = mock_server()
+    texts = ["hello", "world", "", "again"]
+    embeddings = make_engine(base_url, max_batch_inputs=2).embed_texts(texts)
+    assert_embeddings(embeddings[:2], texts[:2])
+    # 빈 입력으로 거절된 배치(400)는 나누지 않고 한 번만 요청한 뒤 0 벡터로 채움
+    assert embeddings[2] == embeddings[3] == [0.0] * DIM
+    assert stats["400"] == 1
+    assert stats["requests"] == 2
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from evaluate import is_relevant, parse_targets, score_ranking
+
+def make_item(elementid=(), page=(), filename=None):
+    return {"query": "질의", "elementid": set(elementid), "page": set(page), "filename": filename}
+
+def test_parse_targets():
+    assert parse_targets("12") == {12}
+    assert parse_targets("12; 15,17") == {12, 15, 17}
+    assert parse_targets(3.0) == {3}
+    assert parse_targets(float("nan")) == set()
+    assert parse_targets(None) == set()
+
+def test_is_relevant_checks_filename():
+    metadata = {"filename": "모니터1p", "elementid": [4, 5], "page": [2]}
+    assert is_relevant(metadata, make_item(elementid=[5, 9], page=[2])) == {("elementid", 5), ("page", 2)}
+    assert is_relevant(metadata, make_item(elementid=[5], filename="모니터1p")) == {("elementid", 5)}
+    assert is_relevant(metadata, make_item(elementid=[5], filename="보험약관")) == set()
+
+def test_score_ranking_metrics():
+    item = make_item(elementid=[1, 2])
+    hits = [{"elementid": [7]}, {"elementid": [1]}, {"elementid": [1]}, {"elementid": [2]}]
+    recall, reciprocal_rank, ndcg = score_ranking(hits, item, k=4)
+    assert recall == 1.0
+    assert reciprocal_rank == 0.5
+    # 새 정답을 찾은 2, 4위만 이득 (3위는 이미 찾은 정답이라 0)
+    expected_dcg = 1 / np.log2(3) + 1 / np.log2(5)
+    assert ndcg == pytest.approx(expected_dcg / (1 + 1 / np.log2(3)))
+
+    # k 밖의 정답은 세지 않음
+    recall, reciprocal_rank, ndcg = score_ranking(hits, item, k=3)
+    assert (recall, reciprocal_rank) == (0.5, 0.5)
+    assert ndcg == pytest.approx((1 / np.log2(3)) / (1 + 1 / np.log2(3)))
+
+    # 한 결과가 정답 두 개를 모두 포함해도 이득은 1 (이상적 순위는 정답 수만큼 앞에서부터)
+    assert score_ranking([{"elementid": [1, 2]}], item, k=10) == (1.0, 1.0, pytest.approx(1 / (1 + 1 / np.log2(3))))
+    assert score_ranking([{"elementid": [9]}], item, k=10) == (0.0, 0.0, 0.0)
@@ -0,0 +1,40 @@
+import numpy as np
+
+from common.lexical_index import LexicalIndex, load_lexical_index, tokenize
+from vectorsearch import fuse_rankings
+
+TEXTS = [
+    "증권번호 FA20246734777000 의 보험료는 1,000,000원입니다.",
+    "보험료 납입 방법과 납입 주기를 안내합니다.",
+    "모니터 화면 밝기 조절 방법",
+    "",
+]
+
+def test_tokenize_keeps_alnum_runs_and_bigrams_hangul():
+    assert tokenize("FA2024 보험료는 1,000,000원") == ["fa2024", "보험", "험료", "료는", "1000000", "원"]
+
+def test_bm25_build_save_load(tmp_path):
+    index = LexicalIndex.build(TEXTS)
+    # 정확히 일치하는 증권번호는 그 문서만, 한글은 2-gram으로 조사가 붙어도 찾음
+    ids, scores = index.search("FA20246734777000")
+    assert ids.tolist() == [0]
+    ids, scores = index.search("보험료 납입")
+    assert ids.tolist() == [1, 0]
+    assert np.all(np.diff(scores) <= 0)
+    assert index.search("존재하지않는단어")[0].tolist() == []
+
+    index.save(str(tmp_path / "bm25.npz"))
+    loaded = load_lexical_index(str(tmp_path))
+    assert len(loaded) == len(TEXTS)
+    for query in ["FA20246734777000", "보험료 납입", "모니터 밝기"]:
+        np.testing.assert_array_equal(loaded.scores(query), index.scores(query))
+    assert load_lexical_index(str(tmp_path / "missing")) is None
+
+def test_fuse_rankings_rrf_order():
+    # 두 순위에 모두 있는 1이 1등, 나머지는 1 / (rrf_k + 순위) 점수순
+    fused, scores = fuse_rankings([[1, 2, 3], [4, 1]], rrf_k=60, with_scores=True)
+    assert fused == [1, 4, 2, 3]
+    assert scores == [1 / 61 + 1 / 62, 1 / 61, 1 / 62, 1 / 63]
+    # 점수가 같으면 앞선 ranking에 먼저 나온 문서가 우선
+    assert fuse_rankings([[1, 2], [3, 4]]) == [1, 3, 2, 4]
+    assert fuse_rankings([np.array([5, 6]), np.array([], dtype=np.int64)]) == [5, 6]
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from common.pca_projection import fit_projection, load_projection, project, save_projection
+
+def make_vectors(n=500, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    # 성분별 분산이 뚜렷하게 다른 벡터 (PCA 성분 순서가 안정적)
+    return (rng.standard_normal((n, dim)) * np.linspace(5, 0.5, dim)).astype(np.float32)
+
+def test_projection_round_trip(tmp_path):
+    vectors = make_vectors()
+    projection = fit_projection(vectors)
+    components = projection["components"]
+    assert projection["coords"].shape == (len(vectors), 3)
+    np.testing.assert_allclose(components @ components.T, np.eye(3), atol=1e-5)
+    # 학습에 쓴 벡터를 다시 투영하면 저장된 좌표와 같음 (쿼리 벡터도 같은 방식으로 투영)
+    np.testing.assert_allclose(project(projection, vectors), projection["coords"], atol=1e-5)
+    np.testing.assert_allclose(project(projection, vectors[:1]), projection["coords"][:1], atol=1e-5)
+
+    save_projection(projection, str(tmp_path))
+    loaded = load_projection(str(tmp_path))
+    for key in ("mean", "components", "coords"):
+        np.testing.assert_array_equal(loaded[key], projection[key])
+    assert load_projection(str(tmp_path / "missing")) is None
+
+def test_projection_matches_sklearn_pca():
+    decomposition = pytest.importorskip("sklearn.decomposition")
+    vectors = make_vectors()
+    expected = decomposition.PCA(n_components=3, svd_solver="full").fit_transform(vectors)
+    np.testing.assert_allclose(fit_projection(vectors)["coords"], expected, rtol=1e-3, atol=1e-3)
+
+def test_projection_samples_large_inputs_and_pads_components():
+    vectors = make_vectors(n=300)
+    # 표본(100개)으로 학습해도 전체 벡터를 투영
+    projection = fit_projection(vectors, max_samples=100)
+    assert projection["coords"].shape == (300, 3)
+    np.testing.assert_allclose(project(projection, vectors), projection["coords"], atol=1e-5)
+    # 벡터가 성분 수보다 적으면 남는 성분은 0
+    small = fit_projection(vectors[:2])
+    assert small["coords"].shape == (2, 3)
+    assert not small["components"][2].any()
@@ -0,0 +1,46 @@
+import pytest
+from langchain.schema import Document
+
+from sqlite_docstore import RowIdMapping, SqliteDocstore
+from vectorstore_builder import save_sqlite_docstore
+
+def make_documents(n=5):
+    return [
+        Document(page_content=f"문서 {i} 본문입니다", metadata={"elementid": [i], "filename": "모니터1p", "page": [i // 2 + 1]})
+        for i in range(n)
+    ]
+
+def test_sqlite_docstore_round_trip(tmp_path):
+    documents = make_documents()
+    path = str(tmp_path / "docstore.sqlite")
+    save_sqlite_docstore(documents, path)
+
+    docstore = SqliteDocstore(path)
+    mapping = RowIdMapping(len(documents))
+    assert len(docstore) == len(documents)
+    # FAISS 인덱스 번호 → doc_id → 저장한 문서
+    for i, document in enumerate(documents):
+        assert docstore[mapping[i]] == document
+    # mget은 요청한 순서(중복 포함)대로 반환
+    assert docstore.mget([mapping[3], mapping[0], mapping[3]]) == [documents[3], documents[0], documents[3]]
+    assert docstore.labels(4) == [document.page_content[:4] for document in documents]
+    assert docstore.search("99") == "ID 99 not found."
+    with pytest.raises(KeyError):
+        docstore["99"]
+
+def test_row_id_mapping_matches_index_numbers():
+    mapping = RowIdMapping(3)
+    assert dict(mapping) == {0: "0", 1: "1", 2: "2"}
+    assert mapping[1] == mapping[1.0] == "1"
+    for idx in (-1, 3):
+        with pytest.raises(KeyError):
+            mapping[idx]
+
+def test_sqlite_docstore_is_read_only(tmp_path):
+    path = str(tmp_path / "docstore.sqlite")
+    save_sqlite_docstore(make_documents(1), path)
+    docstore = SqliteDocstore(path)
+    with pytest.raises(PermissionError, match="read-only"):
+        docstore.add({"1": Document(page_content="새 문서")})
+    with pytest.raises(PermissionError, match="read-only"):
+        docstore.delete(["0"])
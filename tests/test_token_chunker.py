@@ -0,0 +1,16 @@
+import pytest
+
+from token_chunker import _ApproxTokenizer, count_tokens, split_text_into_chunks_by_tokens
+
+@pytest.mark.parametrize("text", [
+    "가나다라마바사아자차카타파하" * 40,                 # 한글 (3바이트 글자)
+    "보험료abc1234납입기간ü" * 40,                         # 한글 + 영문 + 2바이트 글자 혼합
+    "a가" * 100 + "😀" * 30,                                # 토큰 경계와 글자 경계가 어긋나는 경우 + 4바이트 글자
+], ids=["hangul", "mixed", "misaligned"])
+@pytest.mark.parametrize("max_tokens", [7, 50])
+def test_approx_tokenizer_hard_split_keeps_all_text(text, max_tokens):
+    tokenizer = _ApproxTokenizer()
+    chunks = split_text_into_chunks_by_tokens(text, max_tokens, tokenizer=tokenizer)
+    assert len(chunks) > 1
+    assert "".join(chunks) == text
+    assert all(count_tokens(chunk, tokenizer) <= max_tokens for chunk in chunks)
@@ -0,0 +1,157 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+import pytest
+from langchain.schema import Document
+
+import vectorsearch
+from vectorsearch import diversify_hits, get_store_mtime, load_db_embeddings, make_search_params, read_index_mmap
+
+def make_ivf_index(n=4000, dim=16, nlist=64, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+    index.train(vectors)
+    index.add(vectors)
+    index.nprobe = 1
+    return index, vectors
+
+def test_search_params_do_not_change_shared_index():
+    index, vectors = make_ivf_index()
+    queries = vectors[:50]
+    expected = {nprobe: index.search(queries, 10, params=make_search_params(index, nprobe=nprobe))[1] for nprobe in (1, 8, 64)}
+
+    # 같은 인덱스를 서로 다른 nprobe로 동시에 검색해도 각자 순차 검색과 같은 결과
+    jobs = [1, 8, 64] * 20
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda nprobe: index.search(queries, 10, params=make_search_params(index, nprobe=nprobe))[1], jobs))
+    for nprobe, ids in zip(jobs, results):
+        np.testing.assert_array_equal(ids, expected[nprobe])
+    assert index.nprobe == 1
+
+def test_make_search_params_by_index_type():
+    index, _ = make_ivf_index()
+    assert make_search_params(index, nprobe=1000).nprobe == index.nlist
+    assert make_search_params(index) is None
+    hnsw = faiss.IndexHNSWFlat(16, 8)
+    assert make_search_params(hnsw, ef_search=128).efSearch == 128
+    assert make_search_params(faiss.IndexFlatL2(16), nprobe=4, ef_search=128) is None
+
+def file_mapped_ranges(path):
+    """
+    /proc/self/maps에서 path 파일을 매핑한 주소 범위 리스트를 반환합니다.
+    """
+    ranges = []
+    with open("/proc/self/maps") as f:
+        for line in f:
+            fields = line.split(maxsplit=5)
+            if len(fields) == 6 and fields[5].strip() == os.path.realpath(path):
+                start, end = (int(address, 16) for address in fields[0].split("-"))
+                ranges.append((start, end))
+    return ranges
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="/proc/self/maps 필요")
+def test_flat_index_vectors_stay_file_mapped(tmp_path):
+    vectors = np.random.default_rng(0).standard_normal((5000, 16)).astype(np.float32)
+    index = faiss.IndexFlatL2(16)
+    index.add(vectors)
+    index_path = str(tmp_path / "index.faiss")
+    faiss.write_index(index, index_path)
+
+    mapped = read_index_mmap(index_path)
+    embeddings = load_db_embeddings(SimpleNamespace(index=mapped, vdb_index_path=str(tmp_path)))
+    np.testing.assert_array_equal(embeddings, vectors)
+    assert not embeddings.flags.writeable
+    # 벡터 버퍼가 익명 메모리로 복사되지 않고 index.faiss 파일 매핑 안에 있어야 함
+    start = embeddings.ctypes.data
+    end = start + embeddings.nbytes
+    assert any(lo <= start and end <= hi for lo, hi in file_mapped_ranges(index_path))
+
+def make_diversity_store():
+    """
+    FAISS 인덱스 번호 10~14 후보: 10과 11은 거의 같은 벡터, 10~12는 1페이지, 13~14는 2페이지
+    """
+    db_embeddings = np.zeros((15, 3), dtype=np.float32)
+    db_embeddings[10:15] = [[1, 0, 0], [1, 0.01, 0], [0, 1, 0], [0, 0, 1], [0.7, 0.7, 0]]
+    pages = {10: 1, 11: 1, 12: 1, 13: 2, 14: 2}
+    docstore = {str(idx): Document(page_content=f"문서 {idx}", metadata={"filename": "모니터1p", "page": [page]})
+                for idx, page in pages.items()}
+    vectorstore = SimpleNamespace(docstore=docstore, index_to_docstore_id={idx: str(idx) for idx in pages})
+    indices = np.array([10, 11, 12, 13, 14])
+    relevance = np.array([0.9, 0.89, 0.8, 0.5, 0.4], dtype=np.float32)
+    return vectorstore, indices, relevance, db_embeddings
+
+def test_diversify_hits_mmr_skips_near_duplicates():
+    vectorstore, indices, relevance, db_embeddings = make_diversity_store()
+    # λ=0.5: 10과 거의 같은 11 대신 다른 방향의 12, 13을 먼저 고름
+    picks = diversify_hits(vectorstore, indices, relevance, db_embeddings, 3, mmr_lambda=0.5)
+    assert indices[picks].tolist() == [10, 12, 13]
+    # λ=1이면 관련도순, 옵션이 없으면 원래 순서
+    assert diversify_hits(vectorstore, indices, relevance, db_embeddings, 5, mmr_lambda=1.0).tolist() == [0, 1, 2, 3, 4]
+    assert diversify_hits(vectorstore, indices, relevance, db_embeddings, 2).tolist() == [0, 1]
+    with pytest.raises(ValueError):
+        diversify_hits(vectorstore, indices, relevance, None, 3, mmr_lambda=0.5)
+
+def test_diversify_hits_caps_results_per_page():
+    vectorstore, indices, relevance, db_embeddings = make_diversity_store()
+    assert indices[diversify_hits(vectorstore, indices, relevance, db_embeddings, 5, max_per_page=1)].tolist() == [10, 13]
+    assert indices[diversify_hits(vectorstore, indices, relevance, db_embeddings, 5, max_per_page=2)].tolist() == [10, 11, 13, 14]
+    # MMR과 함께 쓰면 페이지 제한 안에서 MMR 순서로 고름
+    picks = diversify_hits(vectorstore, indices, relevance, db_embeddings, 5, mmr_lambda=0.5, max_per_page=2)
+    assert indices[picks].tolist() == [10, 12, 13, 14]
+
+def test_store_mtime_ignores_pca_projection(tmp_path):
+    for name in ("index.faiss", "docstore.sqlite"):
+        (tmp_path / name).write_bytes(b"")
+    os.utime(tmp_path / "index.faiss", (100, 100))
+    os.utime(tmp_path / "docstore.sqlite", (200, 200))
+    assert get_store_mtime(str(tmp_path)) == 200
+    # 검색 앱이 나중에 저장하는 pca.npz는 캐시 키를 바꾸지 않음, 벡터스토어 파일을 다시 쓰면 바뀜
+    (tmp_path / "pca.npz").write_bytes(b"")
+    os.utime(tmp_path / "pca.npz", (300, 300))
+    assert get_store_mtime(str(tmp_path)) == 200
+    os.utime(tmp_path / "index.faiss", (400, 400))
+    assert get_store_mtime(str(tmp_path)) == 400
+
+def test_search_stores_parallel_embeds_once_per_model(monkeypatch):
+    # 저장소마다 다른 문서 3개, 쿼리 벡터는 임베딩모델 이름으로 구분
+    def make_store(path):
+        vectors = np.eye(3, dtype=np.float32)
+        index = faiss.IndexFlatL2(3)
+        index.add(vectors)
+        docstore = {str(i): Document(page_content=f"{path} 문서 {i}", metadata={"page": [i + 1]}) for i in range(3)}
+        vectorstore = SimpleNamespace(index=index, docstore=docstore, index_to_docstore_id={i: str(i) for i in range(3)})
+        return vectorstore, vectors, np.linalg.norm(vectors, axis=1), None
+
+    embed_calls = []
+
+    @lru_cache
+    def fake_embed(selected_embedding, query):
+        embed_calls.append(selected_embedding)
+        if selected_embedding == "broken":
+            raise ValueError("쿼리 임베딩 생성 실패")
+        return (1.0, 0.0, 0.0) if selected_embedding == "a" else (0.0, 0.0, 1.0)
+
+    loaded = []
+    monkeypatch.setattr(vectorsearch, "_embed_query_cached", fake_embed)
+    monkeypatch.setattr(vectorsearch, "get_store_mtime", lambda path: 0.0)
+    monkeypatch.setattr(vectorsearch, "load_store_cached", lambda path, embedding, mtime: loaded.append(path) or make_store(path))
+
+    stores = [{"path": "db1", "embedding": "a"}, {"path": "db2", "embedding": "b"},
+              {"path": "db3", "embedding": "a"}, {"path": "db4", "embedding": "broken"}]
+    outcomes = vectorsearch.search_stores_parallel("질의", stores, k=2, max_workers=4)
+
+    # 같은 모델의 저장소가 여러 개여도 쿼리 임베딩은 모델마다 한 번, 실패한 모델의 저장소는 로드하지 않음
+    assert sorted(embed_calls) == ["a", "b", "broken"]
+    assert loaded == ["db1", "db2", "db3"]
+    # 결과는 stores 순서, 저장소별로 자기 문서를 검색
+    assert [outcome["path"] for outcome in outcomes] == ["db1", "db2", "db3", "db4"]
+    assert [result[2] for result in outcomes[0]["results"]] == ["db1 문서 0", "db1 문서 1"]
+    assert outcomes[1]["results"][0][2] == "db2 문서 2"
+    assert outcomes[2]["results"][0][1] == pytest.approx(1.0)
+    assert [outcome["error"] for outcome in outcomes] == [None, None, None, "쿼리 임베딩 생성 실패"]
+    assert outcomes[3]["results"] == []
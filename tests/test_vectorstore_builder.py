@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from vectorstore_builder import create_index, prepare_vectors
+
+def random_matrix(n, dim, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+def test_ivf_pq_params_are_clamped_for_small_n():
+    matrix = random_matrix(200, 24)
+    index, config = create_index(matrix, "ivf_pq")
+    # nlist: 4·sqrt(200)=56 → 클러스터당 39개 이상이 되도록 200 // 39 = 5
+    # pq_m: 24의 약수 중 16 이하 최댓값 12, pq_nbits: log2(200 // 39) → 2
+    assert config["nlist"] == index.nlist == 5
+    assert config["nprobe"] == index.nprobe == 5
+    assert (config["pq_m"], config["pq_nbits"]) == (12, 2)
+    assert index.ntotal == config["ntotal"] == 200
+    # nprobe == nlist이므로 모든 클러스터를 탐색해 자기 자신을 찾음
+    _, ids = index.search(matrix[:5], 1)
+    assert ids[:, 0].tolist() == [0, 1, 2, 3, 4]
+
+def test_ivf_params_for_tiny_inputs():
+    matrix = random_matrix(20, 8)
+    _, config = create_index(matrix, "ivf_pq", {"nlist": 50, "nprobe": 4})
+    assert (config["nlist"], config["nprobe"], config["pq_m"], config["pq_nbits"]) == (1, 1, 8, 1)
+    # 명시한 nlist도 표본 수에 맞게 줄이고, nprobe는 nlist 이하
+    index, config = create_index(random_matrix(400, 8), "ivf_flat", {"nlist": 3, "nprobe": 16})
+    assert (config["nlist"], config["nprobe"]) == (3, 3)
+    assert "pq_m" not in config
+
+def test_ip_metric_normalizes_vectors():
+    matrix = random_matrix(10, 6) * 5
+    normalized = prepare_vectors(matrix, "ip")
+    np.testing.assert_allclose(np.linalg.norm(normalized, axis=1), 1.0, rtol=1e-5)
+    # 원본은 바꾸지 않음, l2는 그대로
+    assert not np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+    np.testing.assert_array_equal(prepare_vectors(matrix, "l2"), matrix)
+
+    index, config = create_index(matrix, "flat", metric="ip")
+    assert config["normalized"] is True
+    scores, ids = index.search(normalized[:1], 10)
+    cosine = normalized @ normalized[0]
+    np.testing.assert_allclose(scores[0], np.sort(cosine)[::-1], rtol=1e-5)
+    assert ids[0, 0] == 0
+
+def test_invalid_index_type_or_metric():
+    with pytest.raises(ValueError, match="index_type"):
+        create_index(random_matrix(4, 4), "annoy")
+    with pytest.raises(ValueError, match="metric"):
+        create_index(random_matrix(4, 4), "flat", metric="cosine")
@@ -0,0 +1,37 @@
+import numpy as np
+
+from visualization import sample_indices
+
+def grid_cells(coords, n_bins):
+    # sample_indices와 같은 PCA 1, 2성분 분위수 격자
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    cell_x = np.searchsorted(np.quantile(coords[:, 0], quantiles), coords[:, 0])
+    cell_y = np.searchsorted(np.quantile(coords[:, 1], quantiles), coords[:, 1])
+    return cell_x * n_bins + cell_y
+
+def test_small_inputs_are_not_sampled():
+    coords = np.random.default_rng(0).standard_normal((50, 3))
+    assert sample_indices(coords, 100).tolist() == list(range(50))
+
+def test_sample_keeps_results_and_budget():
+    coords = np.random.default_rng(0).standard_normal((5000, 3))
+    include = [4999, 7, 1234]
+    shown = sample_indices(coords, 500, include=include)
+    assert len(shown) == 500
+    assert np.all(np.diff(shown) > 0)
+    assert set(include) <= set(shown.tolist())
+    np.testing.assert_array_equal(shown, sample_indices(coords, 500, include=include))
+
+def test_sample_is_stratified_over_the_grid():
+    rng = np.random.default_rng(1)
+    # 한쪽으로 치우친 분포 (분위수 격자의 칸마다 문서 수가 크게 다름)
+    coords = np.column_stack([rng.lognormal(size=20000), rng.standard_normal(20000) ** 3, rng.standard_normal(20000)])
+    n_bins = 8
+    shown = sample_indices(coords, 2000, n_bins=n_bins)
+    cells = grid_cells(coords, n_bins)
+    population = np.bincount(cells, minlength=n_bins * n_bins)
+    sampled = np.bincount(cells[shown], minlength=n_bins * n_bins)
+    # 문서가 있는 모든 칸에서 뽑고, 칸별 표본 수는 문서 수에 비례 (반올림 보충분 이내)
+    assert np.all(sampled[population > 0] >= 1)
+    expected = population * 2000 / len(coords)
+    assert np.all(np.abs(sampled - expected) <= np.maximum(3, 0.2 * expected))